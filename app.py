@@ -1,172 +1,178 @@
 # Beginner Gardener AI – Fully Rebuilt and Deployable on Streamlit Cloud
 
 import streamlit as st
-import pandas as pd
-import matplotlib.pyplot as plt
-import qrcode
-import io
-from datetime import datetime
+import calendar
+from datetime import datetime, timedelta
+from functools import partial
+
+from gardener import metrics
+from gardener.assets import AssetCache
+from gardener.bed_editor import bed_editor, current_grid
+from gardener.bed_store import BedStore
+from gardener.catalog_store import CatalogStore
+from gardener.debug_panel import debug_panel
+from gardener.exports import ArtifactCache
+from gardener.fragments import fragment
+from gardener.frost import default_last_frost
+from gardener.planting import label, planting_index
+from gardener.render import render_layout_png
+from gardener.schedule import schedule_for, when
+from gardener.table import build_variety_table, display_table, variety_mask
 
 st.set_page_config(page_title="Beginner Gardener AI", layout="wide")
 st.title("🌿 Beginner Gardener AI Planner")
 
+# Section timings for the debug panel (?debug=1 where GARDENER_DEBUG allows it);
+# no-ops unless GARDENER_METRICS is set
+metrics.begin_run("app")
+metrics.section("setup")
+
 # Frost date lookup fallback
 def get_estimated_last_frost(zip_code):
-    return datetime(datetime.today().year, 3, 15)
-
-# Sample data
-spacing_guide = {
-    "Tomato": "18–24 in",
-    "Spinach": "6 in",
-    "Okra": "12–18 in"
-}
-
-container_guide = {
-    "Tomato": "5-gallon pot",
-    "Spinach": "6-inch pot",
-    "Okra": "5-gallon pot"
-}
-
-companion_guide = {
-    "Tomato": ["Basil", "Marigold"],
-    "Spinach": ["Radish"],
-    "Okra": ["Peppers"]
-}
-
-variety_guide = {
-    "Warm-Season": {
-        "Summer": [
-            {"name": "Tomato", "level": "Beginner", "image": "https://via.placeholder.com/100", "organic": True,
-             "tasks": ["Start indoors in Jan", "Transplant after frost"], "recurring": ["Fertilize every 2 weeks"]},
-            {"name": "Okra", "level": "Beginner", "image": "https://via.placeholder.com/100", "organic": False,
-             "tasks": ["Direct sow after frost"], "recurring": ["Harvest every 2–3 days"]}
-        ]
-    },
-    "Cold-Tolerant": {
-        "Early": [
-            {"name": "Spinach", "level": "Beginner", "image": "https://via.placeholder.com/100", "organic": True,
-             "tasks": ["Direct sow in cool soil"], "recurring": ["Water every 3 days"]}
-        ]
-    }
-}
-
-# Garden layout
-layout_rows, layout_cols = 4, 6
-if "bed_layout" not in st.session_state:
-    st.session_state.bed_layout = [["" for _ in range(layout_cols)] for _ in range(layout_rows)]
-
-selected_crop = st.selectbox("Select a crop to place:", [v["name"] for cat in variety_guide.values() for stage in cat.values() for v in stage])
-
-for i in range(layout_rows):
-    cols = st.columns(layout_cols)
-    for j in range(layout_cols):
-        label = st.session_state.bed_layout[i][j] or "[Empty]"
-        if cols[j].button(label, key=f"bed_{i}_{j}"):
-            st.session_state.bed_layout[i][j] = selected_crop
-
-if st.button("🧹 Clear Layout"):
-    st.session_state.bed_layout = [["" for _ in range(layout_cols)] for _ in range(layout_rows)]
-
-bed_df = pd.DataFrame(st.session_state.bed_layout)
-st.dataframe(bed_df)
+    return default_last_frost()
+
+# The demo catalog from the on-disk store, shared with the agent page: the
+# same cached function name gives both pages one store per server process.
+# The other loaders are named apart so they don't share entries.
+@st.cache_resource
+def catalog_store():
+    return CatalogStore()
+
+catalog_data = catalog_store().get("demo")
+catalog = catalog_data.catalog
+spacing_guide, companion_guide = catalog_data.spacing, catalog_data.companions
+container_guide = catalog_data.containers
+
+# Variety photos, downloaded once into a local cache and pre-sized for the
+# cards; prefetched in the background at startup
+@st.cache_resource
+def demo_asset_cache():
+    assets = AssetCache()
+    assets.prefetch([v.image for v in catalog])
+    return assets
+
+assets = demo_asset_cache()
+
+# (`_catalog` isn't hashed by st.cache_resource; the version keys the entry)
+@st.cache_resource(max_entries=4)
+def demo_variety_table(_catalog, version):
+    return build_variety_table(_catalog)
+
+# Exports are built on download click and shared across sessions by input hash
+@st.cache_resource
+def artifact_cache():
+    return ArtifactCache()
+
+artifacts = artifact_cache()
+
+# Every session's bed grid, with idle ones parked on disk
+@st.cache_resource
+def bed_store():
+    return BedStore()
+
+# Garden layout; bed edits rerun this section and the exports below, not the
+# whole page (gardener.fragments)
+@fragment("app", "bed_planner")
+def bed_planner():
+    selected_crop = st.selectbox("Select a crop to place:", catalog.names())
+    bed_editor(selected_crop, catalog.names(), bed_store(), spacing=spacing_guide, companions=companion_guide,
+               rerun=("bed_planner", "exports"))
+
+bed_planner()
 
 # --- Seasonal Crop Preview with Filters ---
+metrics.section("seasonal_preview")
 
 level_filter = st.selectbox("Filter by experience level:", ["All", "Beginner"])
 organic_filter = st.checkbox("Only show organic varieties")
+level_choice = None if level_filter == "All" else level_filter
+organic_choice = True if organic_filter else None
 
 st.subheader("🌿 Seasonal Crop Preview")
-current_month = datetime.today().month
-season = "Spring" if current_month in [1, 2, 3, 4, 5] else "Summer" if current_month in [6, 7, 8] else "Fall"
-
-for crop_group, stages in variety_guide.items():
-    for stage_name, crops in stages.items():
-        if season.lower() in stage_name.lower():
-            st.markdown(f"### {crop_group} – {stage_name}")
-            for v in crops:
-                if organic_filter and not v.get("organic"):
-                    continue
-                if level_filter != "All" and v.get("level") != level_filter:
-                    continue
-
-                with st.expander(v["name"]):
-                    st.image(v["image"], width=100)
-                    st.markdown(f"**Experience Level:** {v['level']}")
-                    st.markdown(f"**Organic:** {'Yes' if v['organic'] else 'No'}")
-                    st.markdown("**Tasks:**")
-                    for t in v.get("tasks", []):
-                        st.markdown(f"- {t}")
-                    st.markdown("**Recurring Care:**")
-                    for r in v.get("recurring", []):
-                        st.markdown(f"♻️ {r}")
-    
-
-# Container crops
-st.subheader("🪴 Container Gardening")
-selected_container = st.selectbox("Choose container crop:", list(container_guide.keys()))
-spacing = spacing_guide.get(selected_container, "N/A")
-container_size = container_guide.get(selected_container, "N/A")
-companions = companion_guide.get(selected_container, [])
-
-st.markdown(f"📦 **Container Size:** {container_size}")
-st.markdown(f"📏 **Spacing:** {spacing}")
-st.markdown(f"🌼 **Companions:** {', '.join(companions)}")
-
-for cat in variety_guide.values():
-    for stage in cat.values():
-        for v in stage:
-            if v["name"] == selected_container:
-                st.image(v["image"], width=100)
+today = datetime.today()
+# Same month view as the agent page: planting windows (gardener.planting) and
+# scheduled tasks, both dated from the fallback frost date
+frost = get_estimated_last_frost(None)
+month_tasks = schedule_for(catalog, frost, today).month(today.year, today.month)
+month_windows = {}
+for w in planting_index(catalog, today.year).between(today.replace(day=1), today.replace(day=calendar.monthrange(today.year, today.month)[1]),
+                                                     frost.date(), level=level_choice, organic=organic_choice):
+    month_windows.setdefault(w.variety.name, []).append(w)
+
+for crop_group in catalog.crops():
+    varieties = [v for v in catalog.filter(crop=crop_group, level=level_choice, organic=organic_choice)
+                 if v.name in month_tasks or v.name in month_windows]
+    if varieties:
+        st.markdown(f"### {crop_group}")
+        for v in varieties:
+            with st.expander(v.name):
+                st.image(assets.image(v.image, 100), width=100)
+                st.markdown(f"**Experience Level:** {v.level}")
+                st.markdown(f"**Organic:** {'Yes' if v.organic else 'No'}")
+                if v.name in month_windows:
+                    st.markdown("**Planting Windows:** " + ", ".join(label(w) for w in month_windows[v.name]))
                 st.markdown("**Tasks:**")
-                for t in v.get("tasks", []):
-                    st.markdown(f"- {t}")
+                for e in month_tasks.get(v.name, []):
+                    if not e.recurrence:
+                        st.markdown(f"- {when(e)}: {e.task}")
                 st.markdown("**Recurring Care:**")
-                for r in v.get("recurring", []):
-                    st.markdown(f"♻️ {r}")
+                for e in month_tasks.get(v.name, []):
+                    if e.recurrence:
+                        st.markdown(f"♻️ {e.task} ({when(e)})")
+
+
+# Container crops
+@fragment("app", "container")
+def container_picker():
+    st.subheader("🪴 Container Gardening")
+    # Crops with a planting window in the next four weeks come first
+    today = datetime.today().date()
+    ready = {w.variety.name for w in planting_index(catalog, today.year).between(today, today + timedelta(days=28), get_estimated_last_frost(None).date())}
+    options = sorted(container_guide, key=lambda name: name not in ready)
+    selected_container = st.selectbox("Choose container crop:", options,
+                                      format_func=lambda name: f"🌱 {name}" if name in ready else name)
+    spacing = spacing_guide.get(selected_container, "N/A")
+    container_size = container_guide.get(selected_container, "N/A")
+    companions = companion_guide.get(selected_container, [])
+
+    st.markdown(f"📦 **Container Size:** {container_size}")
+    st.markdown(f"📏 **Spacing:** {spacing}")
+    st.markdown(f"🌼 **Companions:** {', '.join(companions)}")
+
+    v = catalog.get(selected_container)
+    if v:
+        st.image(assets.image(v.image, 100), width=100)
+        st.markdown("**Tasks:**")
+        for t in v.tasks:
+            st.markdown(f"- {t}")
+        st.markdown("**Recurring Care:**")
+        for r in v.recurring:
+            st.markdown(f"♻️ {r}")
+
+container_picker()
 
 # Export garden layout as PNG
-fig, ax = plt.subplots(figsize=(layout_cols, layout_rows))
-ax.set_xlim(0, layout_cols)
-ax.set_ylim(0, layout_rows)
-ax.set_xticks(range(layout_cols + 1))
-ax.set_yticks(range(layout_rows + 1))
-ax.grid(True)
-ax.invert_yaxis()
-
-for i in range(layout_rows):
-    for j in range(layout_cols):
-        crop = st.session_state.bed_layout[i][j]
-        if crop:
-            ax.text(j + 0.5, i + 0.5, crop[:10], ha="center", va="center", fontsize=6)
-
-plt.tight_layout()
-buffer = io.BytesIO()
-plt.savefig(buffer, format="png")
-buffer.seek(0)
-
-st.download_button("🖼️ Download Garden Layout (PNG)", data=buffer, file_name="bed_layout.png", mime="image/png")
-
-st.info("✅ Planner ready for deployment on Streamlit Cloud.")
-
-# --- Mini Export Buttons ---
-st.subheader("📋 Export Crops as CSV")
-data_rows = []
-for group, stages in variety_guide.items():
-    for stage, crops in stages.items():
-        for v in crops:
-            if organic_filter and not v.get("organic"):
-                continue
-            if level_filter != "All" and v.get("level") != level_filter:
-                continue
-            data_rows.append({
-                "Crop": v["name"],
-                "Group": group,
-                "Season": stage,
-                "Organic": "Yes" if v["organic"] else "No",
-                "Level": v["level"]
-            })
-
-if data_rows:
-    df_export = pd.DataFrame(data_rows)
-    csv = df_export.to_csv(index=False).encode("utf-8")
-    st.download_button("📥 Download Crop List (CSV)", data=csv, file_name="crops_filtered.csv", mime="text/csv")
+def export_bed_png(bed):
+    return render_layout_png(bed.to_layout())
+
+@fragment("app", "exports")
+def exports(level_filter, organic_filter, level_choice, organic_choice):
+    bed = current_grid(bed_store()).copy()
+    st.download_button("🖼️ Download Garden Layout (PNG)", data=artifacts.lazy("bed_png", {"layout": bed.digest()}, partial(export_bed_png, bed)), file_name="bed_layout.png", mime="image/png", on_click="ignore")
+
+    st.info("✅ Planner ready for deployment on Streamlit Cloud.")
+
+    # --- Mini Export Buttons ---
+    st.subheader("📋 Export Crops as CSV")
+    table = demo_variety_table(catalog, catalog_data.version)
+    df_export = display_table(table, variety_mask(table, level=level_choice, organic=organic_choice))
+    df_export = df_export[["Variety", "Crop", "Season", "Organic", "Experience Level"]].rename(
+        columns={"Variety": "Crop", "Crop": "Group", "Experience Level": "Level"})
+
+    if len(df_export):
+        csv = artifacts.lazy("crop_csv", {"level": level_filter, "organic": organic_filter, "catalog": catalog_data.version}, partial(df_export.to_csv, index=False))
+        st.download_button("📥 Download Crop List (CSV)", data=csv, file_name="crops_filtered.csv", mime="text/csv", on_click="ignore")
+
+exports(level_filter, organic_filter, level_choice, organic_choice)
+
+debug_panel(metrics.end_run(), {"artifacts": artifacts, "beds": bed_store(), "assets": assets, "catalog": catalog_store()})
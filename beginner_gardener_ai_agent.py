@@ -1,433 +1,397 @@
 # Beginner Gardener AI Agent: Core Prototype (Texas-focused)
-# Dependencies: streamlit, pandas, datetime, requests, PIL, fpdf, ics
+# Dependencies: streamlit, pandas, requests, fpdf, qrcode, Pillow, pdf2image
+# Data and planning logic live in the side-effect-free `gardener` package; this
+# script is only the UI. Heavy export libraries load on first use.
 
 import streamlit as st
-import pandas as pd
-import requests
 from datetime import datetime, timedelta
-from PIL import Image
+import calendar
 import io
-from fpdf import FPDF
-from ics import Calendar, Event
-
-# --- Core Data ---
-usda_zone_by_zip = {
-    "77001": "9a",
-    "78701": "8b",
-    "75201": "8a",
-    "79901": "8a",
-    "76101": "8a"
-}
-
-variety_guide = {
-    "Warm-Season": {
-        "Late Summer": [
-            {"name": "Clemson Spineless Okra", "link": "https://www.burpee.com/okra-clemson-spineless-prod000695.html", "image": "https://images.burpee.com/is/image/Burpee/000695?wid=150", "level": "Beginner", "organic": True, "tasks": ["Direct sow in July or early August", "Harvest when pods are 2–3 inches long"], "recurring": ["Harvest every 2–3 days"]},
-            {"name": "Beauregard Sweet Potato", "link": "https://www.johnnyseeds.com/vegetables/sweet-potatoes/beauregard-sweet-potato-3250.html", "image": "https://www.johnnyseeds.com/on/demandware.static/-/Sites-jss-master/default/dwff754dd1/images/products/vegetables/03250.jpg", "level": "Intermediate", "organic": False, "tasks": ["Transplant slips in mid-summer", "Hill soil around base in August"], "recurring": ["Water every 5 days"]}
-        ]
-    },
-    "Cold-Tolerant": {
-        "Early": [
-            {"name": "Bloomsdale Spinach", "link": "https://www.edenbrothers.com/products/bloomsdale-spinach-seeds", "image": "https://www.edenbrothers.com/store/media/Seeds/Spinach/Spinach_Bloomsdale_LS.jpg", "level": "Beginner", "organic": True, "tasks": ["Direct sow 6 weeks before last frost", "Thin seedlings to 3 inches"], "recurring": ["Water every 3 days"]},
-            {"name": "Winterbor Kale", "link": "https://www.johnnyseeds.com/vegetables/kale/winterbor-f1-kale-seed-393.html", "image": "https://www.johnnyseeds.com/on/demandware.static/-/Sites-jss-master/default/dw419bf74d/images/products/vegetables/00393_01_winterbor.jpg", "level": "Beginner", "organic": False, "tasks": ["Sow indoors or direct-seed 4–6 weeks before frost"], "recurring": ["Fertilize every 21 days"]}
-        ]
-    },
-    "Tomatoes": {
-        "Spring": [
-            {"name": "Early Girl", "link": "https://www.burpee.com/early-girl-tomato.html", "image": "https://images.burpee.com/is/image/Burpee/early-girl-tomato?wid=150", "level": "Beginner", "organic": True, "tasks": ["Start seeds indoors mid-January", "Transplant outdoors after last frost in March", "Side-dress with compost in May"], "recurring": ["Fertilize every 14 days"]},
-            {"name": "Celebrity", "link": "https://bonnieplants.com/products/celebrity-tomato", "image": "https://cdn.shopify.com/s/files/1/0059/8835/2052/products/CelebrityTomatoPlant_900x.jpg", "level": "Beginner", "organic": False, "tasks": ["Start seeds indoors late January", "Harden off 10 days before transplanting", "Stake plants upon transplant"], "recurring": ["Water every 3 days"]}
-        ]
-    }
-}
-
-# Fetch average frost date from WeatherAPI (mock placeholder)
-def get_estimated_last_frost(zip_code):
+import os
+from concurrent.futures import TimeoutError
+from functools import partial
+
+from gardener import metrics, reports
+from gardener.assets import AssetCache
+from gardener.bed import BedGrid
+from gardener.bed_editor import bed_editor, current_grid
+from gardener.bed_store import BedStore
+from gardener.catalog_store import CatalogStore
+from gardener.debug_panel import debug_panel
+from gardener.exports import ArtifactCache
+from gardener.fragments import fragment
+from gardener.planting import SOW, label, planting_index, varieties
+from gardener.frost import FrostDateService
+from gardener.preview import PreviewService
+from gardener.render import render_layout_png
+from gardener.rollup import PRINTED, RollupIndex, harvest_windows, rollup
+from gardener.schedule import schedule_for, season_frost, season_schedule, when
+from gardener.table import build_variety_table, display_table, variety_mask
+from gardener.weather import WeatherClient
+from gardener.zipindex import usda_zone
+
+# Section timings for the debug panel (?debug=1 where GARDENER_DEBUG allows it);
+# no-ops unless GARDENER_METRICS is set
+metrics.begin_run("agent")
+metrics.section("setup")
+
+# Varieties and their spacing/companion guides come from the on-disk catalog
+# store, loaded and validated once per server process and reloaded when the
+# file changes. Both pages share this one store (same cached function name).
+@st.cache_resource
+def catalog_store():
+    return CatalogStore()
+
+catalog_data = catalog_store().get("texas")
+catalog = catalog_data.catalog
+spacing_guide, companion_guide = catalog_data.spacing, catalog_data.companions
+catalog_inputs = {"catalog": catalog_data.version}
+
+# Variety photos and the PDF logo, downloaded once into a local cache and
+# pre-sized for the cards; prefetched in the background at startup
+@st.cache_resource
+def asset_cache():
+    assets = AssetCache()
+    assets.prefetch([v.image for v in catalog] + [reports.LOGO_URL])
+    return assets
+
+assets = asset_cache()
+
+# Exports are built on download click and shared across sessions by input hash
+@st.cache_resource
+def artifact_cache():
+    return ArtifactCache()
+
+artifacts = artifact_cache()
+
+# Every session's bed grid, with idle ones parked on disk
+@st.cache_resource
+def bed_store():
+    return BedStore()
+
+# Frost dates come from a shared service: bundled climatology first, then a
+# persisted TTL cache, so reruns don't hit WeatherAPI for every widget click.
+# Forecast fetches run in the background; the page renders with the last known value.
+def _weather_api_key():
     try:
-        api_key = st.secrets.get("weatherapi_key")  # Ensure this key is set in Streamlit secrets
-        if not api_key:
-            raise ValueError("Weather API key not found.")
-        url = f"http://api.weatherapi.com/v1/forecast.json?key={api_key}&q={zip_code}&days=10"
-        res = requests.get(url)
-        data = res.json()
-        for day in data['forecast']['forecastday']:
-            date_obj = datetime.strptime(day['date'], "%Y-%m-%d")
-            if day['day']['mintemp_f'] > 36:  # Conservative buffer against frost
-                return date_obj
-        return datetime(datetime.today().year, 3, 15)  # fallback default
-    except:
-        return datetime(datetime.today().year, 3, 15)  # March 15 typical in TX
+        key = st.secrets.get("weatherapi_key")  # Ensure this key is set in Streamlit secrets
+    except Exception:
+        key = None
+    return key or os.environ.get("WEATHERAPI_KEY")
+
+@st.cache_resource
+def frost_service():
+    client = WeatherClient(_weather_api_key())
+    return FrostDateService(fetch=client.forecast_frost)
+
+def get_estimated_last_frost(zip_code):
+    return frost_service().last_frost(zip_code)
+
+# Planting windows (gardener.planting) are per USDA zone, shared by every ZIP
+# in it; a ZIP with no known zone plants by its own frost estimate
+DEFAULT_ZIP = "77001"
+
+def planting_climate(zip_code):
+    return usda_zone(zip_code) or get_estimated_last_frost(zip_code).date()
+
+# The last frost every planning schedule on the page (calendar, PDFs, rollup)
+# is dated from: the ZIP's, in the season the start date plans for (next
+# year's once this year's tasks are all behind the start date)
+def season(zip_code, start_date):
+    frost_date = season_frost(catalog, get_estimated_last_frost(zip_code).date(), start_date)
+    return datetime.combine(frost_date, datetime.min.time())
 
 # PDF Export
-def export_variety_pdf(df):
-    pdf = FPDF()
-    pdf.set_auto_page_break(auto=True, margin=15)
-    pdf.add_page()
-    pdf.image(logo_url, x=10, y=8, w=15)
-    pdf.set_font("Arial", "B", size=12)
-    pdf.set_xy(30, 10)
-    pdf.cell(150, 10, txt=garden_title, ln=True, align="C")
-    pdf.set_font("Arial", size=10)
-    pdf.set_xy(10, 20)
-    pdf.set_font("Arial", size=12)
-    pdf.cell(200, 10, txt="Seasonal Variety Guide", ln=True, align="C")
-    for index, row in df.iterrows():
-        line = f"{row['Crop']} ({row['Season']}) - {row['Variety']} | Level: {row['Experience Level']} | Organic: {row['Organic']}"
-        pdf.multi_cell(0, 10, txt=line)
-    pdf.set_y(-20)
-    pdf.set_font("Arial", size=8)
-    pdf.cell(0, 10, f"Generated on {datetime.today().strftime('%B %d, %Y')}", align="C")
-    return pdf.output(dest='S').encode('latin1')
-
-# iCal Export with live logic and recurring support
+def export_variety_pdf(df, schedule=None):
+    return reports.export_variety_pdf(df, logo=assets.path(reports.LOGO_URL, 150, flat=True, wait=5), schedule=schedule)
+
+# iCal Export with live logic and recurring support, encoded as it's generated
 def export_task_ical(start_date=None, zip_code=None):
-    cal = Calendar()
-    if not start_date:
-        start_date = datetime.today()
     frost_date = get_estimated_last_frost(zip_code) if zip_code else None
-    task_offset = 0
-    for crop, seasons in variety_guide.items():
-        for season, varieties in seasons.items():
-            for v in varieties:
-                if "tasks" in v:
-                    for task in v["tasks"]:
-                        e = Event()
-                        e.name = f"{v['name']} – {task}"
-                        e.begin = start_date + timedelta(days=task_offset)
-                        e.description = f"Gardening Task: {task} for {v['name']}"
-                        if frost_date and "frost" in task.lower():
-                            e.begin = frost_date + timedelta(days=1)
-                            e.description += "\n⚠️ Scheduled after estimated last frost."
-                        cal.events.add(e)
-                        task_offset += 2
-                if "recurring" in v:
-                    for rule in v["recurring"]:
-                        e = Event()
-                        e.name = f"{v['name']} – {rule}"
-                        e.begin = start_date + timedelta(days=task_offset)
-                        e.description = f"Ongoing Task: {rule} for {v['name']}"
-                        if "every" in rule:
-                            try:
-                                interval = int(rule.split("every ")[1].split(" ")[0])
-                                for i in range(6):
-                                    recur = Event()
-                                    recur.name = e.name
-                                    recur.begin = e.begin + timedelta(days=i * interval)
-                                    recur.description = e.description
-                                    cal.events.add(recur)
-                            except:
-                                cal.events.add(e)
-                        else:
-                            cal.events.add(e)
-    return str(cal)
-
-# Table Builder
-def generate_variety_table():
-    rows = []
-    for crop, seasons in variety_guide.items():
-        for season, varieties in seasons.items():
-            for v in varieties:
-                rows.append({
-                    "Crop": crop,
-                    "Season": season,
-                    "Variety": v["name"],
-                    "Experience Level": v["level"],
-                    "Organic": "Yes" if v.get("organic") else "No",
-                    "Seed Link": v["link"]
-                })
-    return pd.DataFrame(rows)
+    buffer = io.BytesIO()
+    reports.export_task_ical(catalog, start_date, frost_date, out=buffer)
+    return buffer.getvalue()
+
+# Table Builder: one columnar table per catalog, filtered with boolean masks
+# (`_catalog` isn't hashed by st.cache_resource; the version keys the entry)
+@st.cache_resource(max_entries=4)
+def variety_table(_catalog, version):
+    return build_variety_table(_catalog)
+
+# Per-variety arrays for seed and harvest rollups, one per catalog version
+@st.cache_resource(max_entries=4)
+def rollup_index(_catalog, _spacing, version):
+    return RollupIndex(_catalog, _spacing)
 
 # --- Streamlit UI ---
+# Sections with their own widgets rerun on their own (gardener.fragments):
+# picking a container crop or editing the bed doesn't rerun the guide,
+# exports or monthly view. Downloads never rerun anything.
 
 # Optional: Container Gardening Guidance
-st.markdown("### 🪴 Container Gardening Planner")
-st.info("Don’t have space for raised beds? No problem! Select crops ideal for container growing below.")
-
-container_crops = [v for cat in variety_guide.values() for stage in cat.values() for v in stage if v["level"] == "Beginner"]
-selected_container = st.selectbox("Choose a container-friendly crop:", [v["name"] for v in container_crops])
-container_details = next((v for v in container_crops if v["name"] == selected_container), None)
-
-if container_details:
-    st.image(container_details["image"], width=150)
-    st.markdown(f"📦 **Ideal for Containers:** Yes")
-    st.markdown(f"📋 **Tasks:**")
-    for task in container_details.get("tasks", []):
-        st.markdown(f"- {task}")
-    if container_details.get("recurring"):
-        st.markdown("♻️ **Ongoing Care:**")
-        for rule in container_details["recurring"]:
-            st.markdown(f"- {rule}")
-    st.markdown(f"🔗 [Seed Source]({container_details['link']})")
-st.markdown("### 🌾 Raised Bed Layout Planner")
-layout_rows = 4
-layout_cols = 6
-selected_crop = st.selectbox("Select a crop to place in the garden bed:", [v["name"] for cat in variety_guide.values() for stage in cat.values() for v in stage])
-
-# Preview selected crop with image and spacing tip (mock spacing guidance)
-spacing_guide = {
-    "Early Girl": "18–24 inches apart",
-    "Celebrity": "24 inches apart",
-    "Bloomsdale Spinach": "4–6 inches apart",
-    "Winterbor Kale": "12–18 inches apart",
-    "Clemson Spineless Okra": "12–18 inches apart",
-    "Beauregard Sweet Potato": "12 inches apart"
-}
-
-selected_details = next((v for cat in variety_guide.values() for stage in cat.values() for v in stage if v["name"] == selected_crop), None)
-if selected_details:
-    st.image(selected_details["image"], width=150)
-    spacing = spacing_guide.get(selected_crop, "Spacing info not available")
-    st.markdown(f"📏 **Recommended Spacing:** {spacing}") for stage in cat.values() for v in stage])
-
-if "bed_layout" not in st.session_state:
-    st.session_state.bed_layout = [["" for _ in range(layout_cols)] for _ in range(layout_rows)]
-
-for i in range(layout_rows):
-    cols = st.columns(layout_cols)
-    for j in range(layout_cols):
-        label = st.session_state.bed_layout[i][j] if st.session_state.bed_layout[i][j] else "[Empty]"
-        if cols[j].button(label, key=f"bed_{i}_{j}"):
-            st.session_state.bed_layout[i][j] = selected_crop
-
-if st.button("🧹 Clear Layout"):
-    st.session_state.bed_layout = [["" for _ in range(layout_cols)] for _ in range(layout_rows)]
-
-bed_df = pd.DataFrame(st.session_state.bed_layout)
-st.dataframe(bed_df)
-st.download_button("📥 Download Bed Layout (CSV)", data=bed_df.to_csv(index=False), file_name="garden_bed_layout.csv")
+@fragment("agent", "container_planner")
+def container_planner():
+    st.markdown("### 🪴 Container Gardening Planner")
+    st.info("Don’t have space for raised beds? No problem! Select crops ideal for container growing below.")
+
+    # Beginner crops with a sowing or transplanting window in the next four weeks
+    # (the ZIP below sets the zone), else every beginner crop
+    today = datetime.today().date()
+    climate = planting_climate(st.session_state.get("zip_input", DEFAULT_ZIP))
+    container_crops = varieties(planting_index(catalog, today.year).between(today, today + timedelta(days=28), climate, level="Beginner"))
+    if container_crops:
+        st.caption("🌱 Ready to plant in the next four weeks")
+    else:
+        container_crops = catalog.filter(level="Beginner")
+    selected_container = st.selectbox("Choose a container-friendly crop:", [v.name for v in container_crops])
+    container_details = catalog.get(selected_container)
+
+    if container_details:
+        st.image(assets.image(container_details.image, 150), width=150)
+        st.markdown(f"📦 **Ideal for Containers:** Yes")
+        st.markdown(f"📋 **Tasks:**")
+        for task in container_details.tasks:
+            st.markdown(f"- {task}")
+        if container_details.recurring:
+            st.markdown("♻️ **Ongoing Care:**")
+            for rule in container_details.recurring:
+                st.markdown(f"- {rule}")
+        st.markdown(f"🔗 [Seed Source]({container_details.link})")
+
+container_planner()
+
+# Bed exports build from a snapshot keyed by the grid's content hash
+def export_bed_csv(bed):
+    return bed.to_frame().to_csv(index=False)
 
 # PNG Export (Visual Layout)
-import matplotlib.pyplot as plt
-fig, ax = plt.subplots(figsize=(layout_cols, layout_rows))
-ax.set_xlim(0, layout_cols)
-ax.set_ylim(0, layout_rows)
-ax.set_xticks(range(layout_cols+1))
-ax.set_yticks(range(layout_rows+1))
-ax.grid(True)
-ax.invert_yaxis()
-
-for i in range(layout_rows):
-    for j in range(layout_cols):
-        crop = st.session_state.bed_layout[i][j]
-        if crop:
-            ax.text(j+0.5, i+0.5, crop[:10], ha='center', va='center', fontsize=6, wrap=True)
-
-plt.tight_layout()
-buffer = io.BytesIO()
-plt.savefig(buffer, format='png')
-buffer.seek(0)
-st.download_button("🖼️ Download Bed Layout (PNG)", data=buffer, file_name="garden_bed_layout.png", mime="image/png")
+def export_bed_png(bed):
+    return render_layout_png(bed.to_layout())
 
 # PDF Export with QR Code to iCal
-from fpdf import FPDF
-import qrcode
-
-def export_bed_layout_pdf_qr(layout_df, ical_url):
-    garden_title = "Jamie's Backyard Garden"
-    logo_url = "https://upload.wikimedia.org/wikipedia/commons/thumb/3/3f/Leaf_green.svg/2048px-Leaf_green.svg.png"
-    companion_guide = {
-        "Early Girl": ["Basil", "Marigold"],
-        "Celebrity": ["Chives", "Nasturtium"],
-        "Bloomsdale Spinach": ["Radish", "Strawberry"],
-        "Winterbor Kale": ["Beets", "Celery"],
-        "Clemson Spineless Okra": ["Peppers", "Melons"],
-        "Beauregard Sweet Potato": ["Beans", "Thyme"]
-    }
-    pdf = FPDF()
-    pdf.add_page()
-    pdf.set_font("Arial", size=10)
-    pdf.cell(200, 10, txt="Garden Bed Layout", ln=True, align="C")
-    pdf.ln(4)
-
-    for i, row in layout_df.iterrows():
-        row_line = ' | '.join([cell if cell else "[Empty]" for cell in row])
-        pdf.multi_cell(0, 8, txt=row_line, align="L")
-
-        # Add task summaries under the row
-        for cell in row:
-            if cell:
-                pdf.set_font("Arial", size=10)
-                pdf.multi_cell(0, 6, txt=f"🌱 {cell}", align="L")
-                for cat in variety_guide.values():
-                    for stage in cat.values():
-                        for v in stage:
-                            if v['name'] == cell:
-                                if v.get("tasks"):
-                                    for t in v["tasks"][:2]:
-                                        pdf.multi_cell(0, 6, txt=f"  • {t}", align="L")
-                                if v.get("recurring"):
-                                    for r in v["recurring"][:1]:
-                                        pdf.multi_cell(0, 6, txt=f"  ⟳ {r}", align="L")
-                if companion_guide.get(cell):
-                    comp = ", ".join(companion_guide[cell])
-                    pdf.multi_cell(0, 6, txt=f"  🌼 Companion Plants: {comp}", align="L")
-                for cat in variety_guide.values():
-                    for stage in cat.values():
-                        for v in stage:
-                            if v['name'] == cell:
-                                if v.get("tasks"):
-                                    for t in v["tasks"][:2]:
-                                        pdf.multi_cell(0, 6, txt=f"  • {t}", align="L")
-        pdf.multi_cell(0, 8, txt=row_line, align="L")
-
-    pdf.ln(5)
-    pdf.set_font("Arial", style="B", size=10)
-    pdf.cell(200, 8, txt="Scan to import garden calendar:", ln=True)
-
-    qr = qrcode.make(ical_url)
-    buf = io.BytesIO()
-    qr.save(buf)
-    buf.seek(0)
-    pdf.image(buf, x=80, w=50)
-
-    return pdf.output(dest='S').encode('latin1')
+def export_bed_layout_pdf_qr(layout_df, ical_url, schedule=None):
+    return reports.export_bed_layout_pdf_qr(layout_df, ical_url, catalog, companion_guide, schedule=schedule)
+
+def export_bed_pdf(bed, ical_url, schedule=None):
+    return export_bed_layout_pdf_qr(bed.to_frame(), ical_url, schedule)
 
 ical_download_url = "https://example.com/gardening_tasks.ics"  # Placeholder or replace with real hosted link
-pdf_qr = export_bed_layout_pdf_qr(bed_df, ical_download_url)
 
-with st.expander("🔍 Preview Bed Layout PDF"):
-    from pdf2image import convert_from_bytes
-    preview_images = convert_from_bytes(pdf_qr)
-    for img in preview_images:
-        st.image(img, caption="PDF Preview", use_column_width=True)
+# Preview renders only while toggled on: a quick first-page thumbnail, then
+# every page on request, rasterized in the background and shared by PDF hash
+@st.cache_resource
+def preview_service():
+    return PreviewService()
 
-st.download_button("📄 Export Bed Layout (PDF + QR)", data=pdf_qr, file_name="garden_bed_layout_qr.pdf", mime="application/pdf"), file_name="garden_bed_layout.csv")
+def show_preview(future, caption, wait=3.0):
+    try:
+        images = future.result(timeout=wait)
+    except TimeoutError:
+        st.info("⏳ Rendering preview… it will appear on the next refresh.")
+        st.button("🔄 Refresh preview")
+        return False
+    except Exception as e:
+        st.warning(f"⚠️ Preview unavailable: {e}")
+        return False
+    for img in images:
+        st.image(img, caption=caption, width="stretch")
+    return True
+
+# Bed edits rerun this section and the rollup below, which also shows the bed
+@fragment("agent", "bed_planner")
+def bed_planner():
+    st.markdown("### 🌾 Raised Bed Layout Planner")
+    selected_crop = st.selectbox("Select a crop to place in the garden bed:", catalog.names())
+
+    # Preview selected crop with image and spacing tip (mock spacing guidance)
+    selected_details = catalog.get(selected_crop)
+    if selected_details:
+        st.image(assets.image(selected_details.image, 150), width=150)
+        spacing = spacing_guide.get(selected_crop, "Spacing info not available")
+        st.markdown(f"📏 **Recommended Spacing:** {spacing}")
+
+    grid = bed_editor(selected_crop, catalog.names(), bed_store(), spacing=spacing_guide, companions=companion_guide,
+                      rerun=("bed_planner", "rollup"))
+
+    bed = grid.copy()
+    layout_inputs = {"layout": bed.digest()}
+    st.download_button("📥 Download Bed Layout (CSV)", data=artifacts.lazy("bed_csv", layout_inputs, partial(export_bed_csv, bed)), file_name="garden_bed_layout.csv", on_click="ignore")
+    st.download_button("🖼️ Download Bed Layout (PNG)", data=artifacts.lazy("bed_png", layout_inputs, partial(export_bed_png, bed)), file_name="garden_bed_layout.png", mime="image/png", on_click="ignore")
+
+    # Dated like the calendar below; the ZIP and start date are read from their
+    # widgets' state because this section renders first
+    start_date = st.session_state.get("start_date", datetime.today().date())
+    frost_date = season(st.session_state.get("zip_input", DEFAULT_ZIP), start_date)
+    bed_pdf_inputs = {"layout": bed.digest(), "ical_url": ical_download_url, "frost": frost_date, "start": start_date,
+                      "day": datetime.today().date(), **catalog_inputs}
+    build_bed_pdf = partial(export_bed_pdf, bed, ical_download_url, schedule_for(catalog, frost_date, start_date))
+    if st.toggle("🔍 Preview Bed Layout PDF"):
+        pdf_qr = artifacts.get_or_build("bed_pdf", bed_pdf_inputs, build_bed_pdf)
+        previews = preview_service()
+        if st.toggle("Show all pages"):
+            show_preview(previews.pages(pdf_qr), "PDF Preview")
+        else:
+            show_preview(previews.thumbnail(pdf_qr), "PDF Preview (first page)")
+
+    st.download_button("📄 Export Bed Layout (PDF + QR)", data=artifacts.lazy("bed_pdf", bed_pdf_inputs, build_bed_pdf), file_name="garden_bed_layout_qr.pdf", mime="application/pdf", on_click="ignore")
+
+bed_planner()
+
+metrics.section("variety_guide")
 st.markdown("### 🧾 Seasonal Variety Guide (Printable)")
 level_filter = st.selectbox("Filter by experience level:", ["All", "Beginner", "Intermediate", "Advanced"])
 organic_filter = st.checkbox("Show only organic varieties")
-zip_input = st.text_input("Enter ZIP for climate-aware planning:", "77001")
-custom_start = st.date_input("📅 Choose Start Date for Task Calendar Export:", datetime.today())
+level_choice = None if level_filter == "All" else level_filter
+organic_choice = True if organic_filter else None
+zip_input = st.text_input("Enter ZIP for climate-aware planning:", DEFAULT_ZIP, key="zip_input")
+custom_start = st.date_input("📅 Choose Start Date for Task Calendar Export:", datetime.today(), key="start_date")
 
-frost_estimate = get_estimated_last_frost(zip_input)
+frost_estimate = season(zip_input, custom_start)
 st.markdown(f"📍 **Estimated Last Frost Date for ZIP {zip_input}:** `{frost_estimate.strftime('%B %d, %Y')}`")
+zone = usda_zone(zip_input)
+if zone:
+    st.markdown(f"🗺️ **USDA Hardiness Zone:** `{zone}`")
+climate = planting_climate(zip_input)
 if frost_estimate > datetime.combine(custom_start, datetime.min.time()):
-    st.warning("⚠️ Your selected start date is before the estimated last frost. The calendar export will begin the day after the frost date.")
-    custom_start = frost_estimate + timedelta(days=1)
-    st.info("🌱 Consider planting early cold-tolerant crops such as spinach, kale, radish, and arugula. These can often be direct-seeded before the last frost date with proper care.")
+    st.warning("⚠️ Your selected start date is before the estimated last frost. Frost-tender tasks in the calendar are dated after it.")
+    # Only crops the guide sows ahead of the last frost count as cold-tolerant
+    early = [v.name for v in varieties(planting_index(catalog, custom_start.year).plantable(custom_start, climate, kind=SOW, pre_frost=True))]
+    if early:
+        st.info(f"🌱 Consider planting early cold-tolerant crops such as {', '.join(early)}. These can often be direct-seeded before the last frost date with proper care.")
 
-variety_df = generate_variety_table()
-if level_filter != "All":
-    variety_df = variety_df[variety_df["Experience Level"] == level_filter]
-if organic_filter:
-    variety_df = variety_df[variety_df["Organic"] == "Yes"]
+# Every task date below (calendar, monthly view, PDFs) comes from this schedule
+season_plan = schedule_for(catalog, frost_estimate, custom_start)
+schedule_inputs = {"frost": frost_estimate, "start": custom_start}
 
-st.dataframe(variety_df)
-csv_data = variety_df.to_csv(index=False).encode('utf-8')
-pdf_data = export_variety_pdf(variety_df)
-ical_data = export_task_ical(start_date=custom_start, zip_code=zip_input)
+table = variety_table(catalog, catalog_data.version)
+variety_df = display_table(table, variety_mask(table, level=level_choice, organic=organic_choice))
 
-st.download_button("📥 Download CSV Variety Guide", data=csv_data, file_name="variety_guide.csv", mime="text/csv")
-st.download_button("📄 Download PDF Variety Guide", data=pdf_data, file_name="variety_guide.pdf", mime="application/pdf")
-st.download_button("📅 Export iCal Task Calendar", data=ical_data, file_name="gardening_tasks.ics", mime="text/calendar")
+st.dataframe(variety_df)
+today = datetime.today().date()
+filter_inputs = {"level": level_filter, "organic": organic_filter, **catalog_inputs}
+csv_data = artifacts.lazy("variety_csv", filter_inputs, partial(variety_df.to_csv, index=False))
+pdf_data = artifacts.lazy("variety_pdf", {**filter_inputs, **schedule_inputs, "day": today},
+                          partial(export_variety_pdf, variety_df, season_plan))
+ical_data = artifacts.lazy("task_ical", {"start": custom_start, "zip": zip_input, "frost": frost_estimate, **catalog_inputs},
+                           partial(export_task_ical, start_date=custom_start, zip_code=zip_input))
+
+st.download_button("📥 Download CSV Variety Guide", data=csv_data, file_name="variety_guide.csv", mime="text/csv", on_click="ignore")
+st.download_button("📄 Download PDF Variety Guide", data=pdf_data, file_name="variety_guide.pdf", mime="application/pdf", on_click="ignore")
+st.download_button("📅 Export iCal Task Calendar", data=ical_data, file_name="gardening_tasks.ics", mime="text/calendar", on_click="ignore")
 
 # Mini Export Buttons
+metrics.section("mini_exports")
 st.markdown("### 🌿 Mini Schedule Exports")
-mini_df_cold = generate_variety_table().query("Crop == 'Cold-Tolerant'")
-mini_df_warm = generate_variety_table().query("Crop == 'Warm-Season'")
-mini_csv_cold = mini_df_cold.to_csv(index=False).encode('utf-8')
-mini_csv_warm = mini_df_warm.to_csv(index=False).encode('utf-8')
-mini_pdf_cold = export_variety_pdf(mini_df_cold)
-mini_pdf_warm = export_variety_pdf(mini_df_warm)
+mini_df_cold = display_table(table, variety_mask(table, crop="Cold-Tolerant"))
+mini_df_warm = display_table(table, variety_mask(table, crop="Warm-Season"))
+mini_csv_cold = artifacts.lazy("variety_csv", {"crop": "Cold-Tolerant", **catalog_inputs}, partial(mini_df_cold.to_csv, index=False))
+mini_csv_warm = artifacts.lazy("variety_csv", {"crop": "Warm-Season", **catalog_inputs}, partial(mini_df_warm.to_csv, index=False))
+mini_pdf_cold = artifacts.lazy("variety_pdf", {"crop": "Cold-Tolerant", **schedule_inputs, **catalog_inputs, "day": today}, partial(export_variety_pdf, mini_df_cold, season_plan))
+mini_pdf_warm = artifacts.lazy("variety_pdf", {"crop": "Warm-Season", **schedule_inputs, **catalog_inputs, "day": today}, partial(export_variety_pdf, mini_df_warm, season_plan))
 
 col1, col2 = st.columns(2)
 with col1:
-    st.download_button("❄️ Cold-Tolerant Schedule (CSV)", data=mini_csv_cold, file_name="cold_tolerant_schedule.csv", mime="text/csv")
-    st.download_button("❄️ Cold-Tolerant Schedule (PDF)", data=mini_pdf_cold, file_name="cold_tolerant_schedule.pdf", mime="application/pdf")
+    st.download_button("❄️ Cold-Tolerant Schedule (CSV)", data=mini_csv_cold, file_name="cold_tolerant_schedule.csv", mime="text/csv", on_click="ignore")
+    st.download_button("❄️ Cold-Tolerant Schedule (PDF)", data=mini_pdf_cold, file_name="cold_tolerant_schedule.pdf", mime="application/pdf", on_click="ignore")
 with col2:
-    st.download_button("🔥 Warm-Season Schedule (CSV)", data=mini_csv_warm, file_name="warm_season_schedule.csv", mime="text/csv")
-    st.download_button("🔥 Warm-Season Schedule (PDF)", data=mini_pdf_warm, file_name="warm_season_schedule.pdf", mime="application/pdf")
-
-# Monthly Crop Tasks View
-st.markdown(f"### 🌿 {datetime.now().strftime('%B')} Crop Varieties")
-season = "Spring" if datetime.now().month in [12,1,2,3] else "Summer" if datetime.now().month in [4,5,6,7] else "Fall"
-for crop, seasons in variety_guide.items():
-    if crop == "Cold-Tolerant" and frost_estimate > datetime.combine(datetime.today(), datetime.min.time()):
-        st.markdown("**❄️ Cold-Tolerant Options (Pre-Frost):**")
-        for v in seasons.get("Early", []):
-            if organic_filter and not v.get("organic"):
-                continue
-            if level_filter != "All" and v["level"] != level_filter:
-                continue
-            cols = st.columns([1, 4])
-            with cols[0]:
-                st.image(v["image"], width=80)
-            with cols[1]:
-                st.markdown(f"[{v['name']}]({v['link']})", help="Click to view supplier page for this variety")
-                st.markdown(f"Experience: *{v['level']}*  ")
-                if v.get("organic"):
-                    st.markdown("🌱 **Organic Certified**")
-                if v.get("tasks"):
-                    st.markdown("🗓️ **Cold Season Tasks:**")
-                    for task in v["tasks"]:
-                        st.markdown(f"- {task}")
-                if v.get("recurring"):
-                    st.markdown("♻️ **Ongoing Care:**")
-                    for rule in v["recurring"]:
-                        st.markdown(f"- {rule}")
-    elif season in seasons:
+    st.download_button("🔥 Warm-Season Schedule (CSV)", data=mini_csv_warm, file_name="warm_season_schedule.csv", mime="text/csv", on_click="ignore")
+    st.download_button("🔥 Warm-Season Schedule (PDF)", data=mini_pdf_warm, file_name="warm_season_schedule.pdf", mime="application/pdf", on_click="ignore")
+
+# Seed Order & Harvest Rollup: the bed above plus any saved plans, summed into
+# one seed order and harvest timeline; reruns with the bed planner
+@fragment("agent", "rollup")
+def seed_rollup(season_plan, schedule_inputs, today):
+    with st.expander("🧮 Seed Order & Harvest Rollup"):
+        plan_files = st.file_uploader("Add saved garden plans (.txt)", type=["txt"], accept_multiple_files=True,
+                                      help="Plans saved with 💾 in the bed planner; the current bed is always included")
+        rollup_beds = [current_grid(bed_store()).copy()]
+        for plan_file in plan_files or []:
+            try:
+                rollup_beds.append(BedGrid.from_token(plan_file.getvalue().decode("ascii").strip()))
+            except (UnicodeDecodeError, ValueError):
+                st.warning(f"⚠️ {plan_file.name} is not a saved garden plan; skipped.")
+        totals = rollup(rollup_beds, rollup_index(catalog, spacing_guide, catalog_data.version))
+        seed_order = totals.seed_order()
+        harvest = totals.harvest_timeline(season_plan)
+        st.markdown(f"**{totals.bed_count} bed{'s' if totals.bed_count > 1 else ''}:** "
+                    f"{int(seed_order['Plants'].sum()):,} plants, {int(seed_order['Seeds'].sum()):,} seeds to order")
+        st.dataframe(seed_order, hide_index=True, column_config={"Seed Link": st.column_config.LinkColumn()})
+        st.markdown("**🧺 Harvest Timeline**")
+        st.dataframe(harvest, hide_index=True)
+        rollup_inputs = {"beds": [b.digest() for b in rollup_beds], **catalog_inputs}
+        col1, col2 = st.columns(2)
+        with col1:
+            st.download_button("📥 Seed Order (CSV)", data=artifacts.lazy("rollup_csv", rollup_inputs, partial(seed_order.to_csv, index=False)),
+                               file_name="seed_order.csv", mime="text/csv", on_click="ignore")
+            st.download_button("📄 Seed Order (PDF)", data=artifacts.lazy("rollup_pdf", {**rollup_inputs, "day": today},
+                               partial(reports.export_table_pdf, seed_order[PRINTED], "Seed Order", f"{totals.bed_count} beds")),
+                               file_name="seed_order.pdf", mime="application/pdf", on_click="ignore")
+        with col2:
+            harvest_inputs = {**rollup_inputs, **schedule_inputs}
+            st.download_button("📥 Harvest Timeline (CSV)", data=artifacts.lazy("harvest_csv", harvest_inputs, partial(harvest.to_csv, index=False)),
+                               file_name="harvest_timeline.csv", mime="text/csv", on_click="ignore")
+            st.download_button("📄 Harvest Timeline (PDF)", data=artifacts.lazy("harvest_pdf", {**harvest_inputs, "day": today},
+                               partial(reports.export_table_pdf, harvest, "Harvest Timeline", f"{totals.bed_count} beds")),
+                               file_name="harvest_timeline.pdf", mime="application/pdf", on_click="ignore")
+
+seed_rollup(season_plan, schedule_inputs, today)
+
+# Monthly Crop Tasks View: varieties with a planting window, task, care or
+# harvest window in this month, from the season running now (this year's
+# frost) whichever season the start date plans; it has no widgets, so it only
+# reruns with the page
+def variety_card(v, entries, windows, harvest):
+    cols = st.columns([1, 4])
+    with cols[0]:
+        st.image(assets.image(v.image, 80), width=80)
+    with cols[1]:
+        st.markdown(f"[{v.name}]({v.link})", help="Click to view supplier page for this variety")
+        st.markdown(f"Experience: *{v.level}*  ")
+        if v.organic:
+            st.markdown("🌱 **Organic Certified**")
+        if windows:
+            st.markdown("🌱 **Planting Windows:** " + ", ".join(label(w) for w in windows))
+        if harvest:
+            st.markdown(f"🧺 **Harvest:** {harvest[0]:%b %d} – {harvest[1]:%b %d}")
+        tasks = [e for e in entries if not e.recurrence]
+        care = [e for e in entries if e.recurrence]
+        if tasks:
+            st.markdown("🗓️ **Monthly Tasks:**")
+            for e in tasks:
+                st.markdown(f"- {when(e)}: {e.task}")
+        if care:
+            st.markdown("♻️ **Ongoing Care:**")
+            for e in care:
+                st.markdown(f"- {e.task} ({when(e)})")
+
+metrics.section("monthly_view")
+now = datetime.now()
+st.markdown(f"### 🌿 {now.strftime('%B')} Crop Varieties")
+month_frost = get_estimated_last_frost(zip_input)
+month_plan = season_schedule(catalog, month_frost.date(), custom_start)
+month_first, month_last = now.date().replace(day=1), now.date().replace(day=calendar.monthrange(now.year, now.month)[1])
+month_tasks = month_plan.between(month_first, month_last)
+month_harvest = {name: window for name, window in harvest_windows(rollup_index(catalog, spacing_guide, catalog_data.version), month_plan).items()
+                 if window[0] <= month_last and window[1] >= month_first}
+month_windows = {}
+for w in planting_index(catalog, now.year).between(month_first, month_last, climate, level=level_choice, organic=organic_choice):
+    month_windows.setdefault(w.variety.name, []).append(w)
+# Crops with a window opening before the last frost get the pre-frost heading
+pre_frost = {name for name, ws in month_windows.items() if ws[0].start < month_frost.date()} if month_frost > now else set()
+shown = False
+for crop in catalog.crops():
+    crop_varieties = [v for v in catalog.filter(crop=crop, level=level_choice, organic=organic_choice)
+                      if v.name in month_tasks or v.name in month_windows or v.name in month_harvest]
+    if not crop_varieties:
+        continue
+    shown = True
+    if pre_frost.intersection(v.name for v in crop_varieties):
+        st.markdown(f"**❄️ {crop} Options (Pre-Frost):**")
+    else:
         st.markdown(f"**{crop}**")
-        for v in seasons[season]:
-            if organic_filter and not v.get("organic"):
-                continue
-            if level_filter != "All" and v["level"] != level_filter:
-                continue
-            cols = st.columns([1, 4])
-            with cols[0]:
-                st.image(v["image"], width=80)
-            with cols[1]:
-                st.markdown(f"[{v['name']}]({v['link']})", help="Click to view supplier page for this variety")
-                st.markdown(f"Experience: *{v['level']}*  ")
-                if v.get("organic"):
-                    st.markdown("🌱 **Organic Certified**")
-                if v.get("tasks"):
-                    st.markdown("🗓️ **Monthly Tasks:**")
-                    for task in v["tasks"]:
-                        st.markdown(f"- {task}")
-                if v.get("recurring"):
-                    st.markdown("♻️ **Ongoing Care:**")
-                    for rule in v["recurring"]:
-                        st.markdown(f"- {rule}")
-    elif crop == "Warm-Season" and datetime.now().month >= 7:
-        st.markdown("**🔥 Warm-Season Options (Late Summer):**")
-        for v in seasons.get("Late Summer", []):
-            if organic_filter and not v.get("organic"):
-                continue
-            if level_filter != "All" and v["level"] != level_filter:
-                continue
-            cols = st.columns([1, 4])
-            with cols[0]:
-                st.image(v["image"], width=80)
-            with cols[1]:
-                st.markdown(f"[{v['name']}]({v['link']})", help="Click to view supplier page for this variety")
-                st.markdown(f"Experience: *{v['level']}*  ")
-                if v.get("organic"):
-                    st.markdown("🌱 **Organic Certified**")
-                if v.get("tasks"):
-                    st.markdown("🗓️ **Hot Season Tasks:**")
-                    for task in v["tasks"]:
-                        st.markdown(f"- {task}")
-                if v.get("recurring"):
-                    st.markdown("♻️ **Ongoing Care:**")
-                    for rule in v["recurring"]:
-                        st.markdown(f"- {rule}")
-        st.markdown(f"**{crop}**")
-        for v in seasons[season]:
-            if organic_filter and not v.get("organic"):
-                continue
-            if level_filter != "All" and v["level"] != level_filter:
-                continue
-            cols = st.columns([1, 4])
-            with cols[0]:
-                st.image(v["image"], width=80)
-            with cols[1]:
-                st.markdown(f"[{v['name']}]({v['link']})", help="Click to view supplier page for this variety")
-                st.markdown(f"Experience: *{v['level']}*  ")
-                if v.get("organic"):
-                    st.markdown("🌱 **Organic Certified**")
-                if v.get("tasks"):
-                    st.markdown("🗓️ **Monthly Tasks:**")
-                    for task in v["tasks"]:
-                        st.markdown(f"- {task}")
-                if v.get("recurring"):
-                    st.markdown("♻️ **Ongoing Care:**")
-                    for rule in v["recurring"]:
-                        st.markdown(f"- {rule}")
+    for v in crop_varieties:
+        variety_card(v, month_tasks.get(v.name, []), month_windows.get(v.name, []), month_harvest.get(v.name))
+if not shown:
+    st.info(f"🗓️ Nothing on the schedule for {now.strftime('%B')} with these filters.")
+
+debug_panel(metrics.end_run(), {"artifacts": artifacts, "beds": bed_store(), "assets": assets, "previews": preview_service(), "catalog": catalog_store()})
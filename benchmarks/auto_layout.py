@@ -0,0 +1,104 @@
+# Auto-layout solver: solution quality against runtime on growing beds, and
+# the batched delta evaluation against rescoring the whole grid per swap.
+#
+#   python -m benchmarks.auto_layout
+#   python -m benchmarks.auto_layout --sizes 100x100 --budgets 0.1,0.5,1 --json
+
+import argparse
+import json
+import time
+
+import numpy as np
+
+from gardener.autolayout import _pack, _swap_deltas, companion_matrix, footprint, layout_score, solve
+from gardener.catalog_store import load
+
+_catalog = load()
+spacing_guide, companion_guide = _catalog.spacing, _catalog.companions
+
+MIX = {
+    "Early Girl": 2, "Celebrity": 1, "Bloomsdale Spinach": 1, "Winterbor Kale": 1, "Clemson Spineless Okra": 1,
+    "Basil": 1, "Marigold": 1, "Radish": 1, "Beets": 1, "Chives": 0.5, "Peppers": 0.5,
+}
+
+
+def quality_curve(rows, cols, budgets, seeds):
+    results = []
+    for budget in budgets:
+        runs = [solve(rows, cols, MIX, spacing_guide, companion_guide, seed=s, time_limit=budget)[1] for s in seeds]
+        results.append({
+            "budget_s": budget,
+            "seconds": float(np.median([r["seconds"] for r in runs])),
+            "initial": float(np.median([r["initial_score"] for r in runs])),
+            "score": float(np.median([r["score"] for r in runs])),
+            "accepted": int(np.median([r["accepted"] for r in runs])),
+        })
+    return results
+
+
+# Swaps scored per second: batched local deltas vs. a full rescore per swap
+def delta_throughput(rows, cols, swaps=2000):
+    rng = np.random.default_rng(0)
+    mix = {k: w for k, w in MIX.items() if footprint(spacing_guide.get(k)) == 1}
+    uid, unit_names, _, _ = _pack(rows, cols, mix, {k: 1 for k in mix}, rng)
+    names = [""] + list(mix)
+    crop_of_unit = np.array([names.index(n) for n in unit_names])
+    weights = companion_matrix(names, companion_guide)
+    grid_crop = crop_of_unit[uid.ravel()]
+    n = rows * cols
+    cells = np.arange(n)
+    steps = np.array([-cols, cols, -1, 1])
+    around = cells[:, None] + steps[None, :]
+    r, c = np.divmod(cells, cols)
+    inside = np.stack([r > 0, r < rows - 1, c > 0, c < cols - 1], axis=1)
+    around = np.where(inside, around, -1)[:, None, :]
+    u, v = rng.integers(0, n, size=(2, swaps))
+
+    t0 = time.perf_counter()
+    deltas = _swap_deltas(uid.ravel()[u], uid.ravel()[v], around[u], around[v], uid.ravel(),
+                          crop_of_unit, grid_crop, weights)
+    batched = time.perf_counter() - t0
+
+    base = layout_score(grid_crop.reshape(rows, cols), weights)
+    sample = min(swaps, 200)
+    t0 = time.perf_counter()
+    for k in range(sample):
+        trial = grid_crop.copy()
+        trial[u[k]], trial[v[k]] = trial[v[k]], trial[u[k]]
+        full = layout_score(trial.reshape(rows, cols), weights) - base
+        assert abs(full - deltas[k]) < 1e-9, (k, full, deltas[k])
+    naive = (time.perf_counter() - t0) / sample * swaps
+    return {"swaps": swaps, "batched_per_s": swaps / batched, "full_rescore_per_s": swaps / naive}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Auto-layout solver benchmark")
+    parser.add_argument("--sizes", default="20x20,50x50,100x100")
+    parser.add_argument("--budgets", default="0.05,0.1,0.25,0.5,1.0", help="solver time limits in seconds")
+    parser.add_argument("--seeds", type=int, default=3)
+    parser.add_argument("--json", action="store_true")
+    args = parser.parse_args()
+
+    sizes = [tuple(int(x) for x in s.split("x")) for s in args.sizes.split(",")]
+    budgets = [float(b) for b in args.budgets.split(",")]
+    results = {}
+    for rows, cols in sizes:
+        results[f"{rows}x{cols}"] = {
+            "curve": quality_curve(rows, cols, budgets, range(args.seeds)),
+            "deltas": delta_throughput(rows, cols),
+        }
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    for size, r in results.items():
+        d = r["deltas"]
+        print(f"{size}: {d['batched_per_s']:,.0f} swaps/s batched vs {d['full_rescore_per_s']:,.0f} swaps/s full rescore")
+        print(f"  {'budget s':>8} {'took s':>7} {'initial':>8} {'score':>8} {'gain':>6} {'swaps':>7}")
+        for p in r["curve"]:
+            gain = p["score"] / p["initial"] if p["initial"] else float("nan")
+            print(f"  {p['budget_s']:>8.2f} {p['seconds']:>7.3f} {p['initial']:>8.0f} {p['score']:>8.0f} "
+                  f"{gain:>5.1f}x {p['accepted']:>7}")
+
+
+if __name__ == "__main__":
+    main()
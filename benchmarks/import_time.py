@@ -0,0 +1,80 @@
+# Cold-start figures: import time of the core modules and first-run time of each
+# Streamlit entry point, each measured in a fresh interpreter.
+#
+#   python -m benchmarks.import_time --repeat 5
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HEAVY = ["pandas", "numpy", "requests", "matplotlib", "fpdf", "qrcode", "PIL", "pdf2image", "streamlit"]
+MODULES = ["gardener", "gardener.catalog", "gardener.frost", "gardener.table", "gardener.reports", "gardener.batch"]
+SCRIPTS = ["app.py", "beginner_gardener_ai_agent.py"]
+
+_IMPORT_PROBE = """
+import json, sys, time
+t = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - t
+print(json.dumps({{"seconds": elapsed, "loaded": [m for m in {heavy!r} if m in sys.modules]}}))
+"""
+
+_APP_PROBE = """
+import json, time
+t = time.perf_counter()
+from streamlit.testing.v1 import AppTest
+at = AppTest.from_file({script!r}, default_timeout=120)
+ready = time.perf_counter()
+at.run()
+print(json.dumps({{"seconds": time.perf_counter() - ready, "exceptions": len(at.exception)}}))
+"""
+
+
+def _probe(code):
+    out = subprocess.run([sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True, check=True)
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def measure_imports(repeat):
+    results = {}
+    for module in MODULES:
+        runs = [_probe(_IMPORT_PROBE.format(module=module, heavy=HEAVY)) for _ in range(repeat)]
+        results[module] = {"ms": statistics.median(r["seconds"] for r in runs) * 1000, "loaded": runs[0]["loaded"]}
+    return results
+
+
+def measure_first_run(repeat):
+    results = {}
+    for script in SCRIPTS:
+        runs = [_probe(_APP_PROBE.format(script=os.path.join(ROOT, script))) for _ in range(repeat)]
+        results[script] = {"ms": statistics.median(r["seconds"] for r in runs) * 1000,
+                           "exceptions": max(r["exceptions"] for r in runs)}
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Import and cold-start timings")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--no-apps", action="store_true", help="skip the Streamlit first-run measurements")
+    parser.add_argument("--json", action="store_true", help="print raw JSON instead of a table")
+    args = parser.parse_args()
+
+    results = {"imports": measure_imports(args.repeat)}
+    if not args.no_apps:
+        results["first_run"] = measure_first_run(args.repeat)
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    print(f"{'import':<28} {'ms':>8}  heavy modules loaded")
+    for module, r in results["imports"].items():
+        print(f"{module:<28} {r['ms']:>8.1f}  {', '.join(r['loaded']) or '-'}")
+    for script, r in results.get("first_run", {}).items():
+        print(f"{'first run ' + script:<28} {r['ms']:>8.1f}  exceptions: {r['exceptions']}")
+
+
+if __name__ == "__main__":
+    main()
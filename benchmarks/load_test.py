@@ -0,0 +1,348 @@
+# Multi-session load test: starts the page under `streamlit run` on a local
+# port, with WeatherAPI pointed at the local stub, and drives N concurrent
+# sessions over the same websocket protocol the browser uses. Each session
+# loops over bed-cell edits, filter/ZIP changes and export downloads with a
+# random think time between them.
+#
+# Reports p50/p95/p99 latency per action (send to "script finished", or to
+# the downloaded bytes), plus the server's CPU use and resident memory over
+# time (from /proc, so Linux only). Memory that keeps climbing after warmup
+# shows up as a positive RSS slope; any exception element a page shows or
+# failed download counts as an error and fails the run (exit status 1).
+#
+# Streamlit deletes a generated download once two cleanup passes (one per
+# finished run, any session) have seen it unreferenced, so under load a fetch
+# can 404. Those are counted as expired downloads, not errors: the browser
+# hits the same race, but it isn't the app's to fix.
+#
+#   python -m benchmarks.load_test --sessions 20 --duration 60
+#   python -m benchmarks.load_test --page app --sessions 50 --varieties 1000 --out load.json
+#   python -m benchmarks.load_test --weather-delay 1.5 --weather-fail-rate 0.3
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.error
+import urllib.request
+from datetime import datetime
+
+import numpy as np
+from streamlit.proto.BackMsg_pb2 import BackMsg
+from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+from websockets.asyncio.client import connect
+
+from benchmarks.suite import PAGES, ROOT, _git_revision
+from benchmarks.synthetic import synthetic_store
+from benchmarks.weather_latency import percentiles
+from benchmarks.weather_stub import start_stub
+from gardener.zipindex import zip_index
+
+ACTIONS = {"bed_click": 0.6, "filter": 0.25, "download": 0.15}
+EARLY_FOR_RERUN = ForwardMsg.FINISHED_EARLY_FOR_RERUN
+# ZIPs outside the bundled index go to the weather stub
+OUTSIDE_ZIPS = ["10001", "60601", "98101", "02108", "33101"]
+
+
+class ExpiredDownload(Exception):
+    pass
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_server(script, port, env):
+    cmd = [sys.executable, "-m", "streamlit", "run", os.path.join(ROOT, script),
+           "--server.headless", "true", "--server.port", str(port), "--server.fileWatcherType", "none",
+           "--browser.gatherUsageStats", "false"]
+    server = subprocess.Popen(cmd, cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+    deadline = time.time() + 60
+    while time.time() < deadline:
+        if server.poll() is not None:
+            raise RuntimeError(f"streamlit exited: {server.stderr.read().decode(errors='replace')[-2000:]}")
+        try:
+            with urllib.request.urlopen(f"http://127.0.0.1:{port}/_stcore/health", timeout=1) as r:
+                if r.status == 200:
+                    return server
+        except OSError:
+            time.sleep(0.2)
+    server.kill()
+    raise RuntimeError("streamlit didn't come up within 60 s")
+
+
+# CPU seconds and resident bytes of a process, from /proc
+def _usage(pid):
+    with open(f"/proc/{pid}/stat") as f:
+        fields = f.read().rsplit(")", 1)[1].split()
+    cpu = (int(fields[11]) + int(fields[12])) / os.sysconf("SC_CLK_TCK")
+    with open(f"/proc/{pid}/statm") as f:
+        rss = int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    return cpu, rss
+
+
+class Session:
+    """One simulated browser tab: a websocket plus the widgets it last saw."""
+
+    def __init__(self, url, rng, zips):
+        self.url = url
+        self.rng = rng
+        self.zips = zips
+        self.widgets = {}  # widget id -> (element type, element proto, fragment id)
+        self.session_id = None
+        self.exceptions = []
+        self.edits = {}  # the editor's edited_rows since it was last rebuilt
+        self.editor = None
+
+    async def open(self):
+        self.ws = await connect(f"ws://{self.url}/_stcore/stream", subprotocols=["streamlit"], max_size=None)
+        return await self.rerun()
+
+    async def close(self):
+        await self.ws.close()
+
+    # Read messages until the run this message started (including reruns it
+    # asked for, e.g. the bed editor's keyed fragment reruns) has finished
+    async def _settle(self):
+        finished = False
+        while True:
+            msg = ForwardMsg()
+            msg.ParseFromString(await self.ws.recv())
+            kind = msg.WhichOneof("type")
+            if kind == "delta" and msg.delta.WhichOneof("type") == "new_element":
+                element = msg.delta.new_element
+                name = element.WhichOneof("type")
+                proto = getattr(element, name)
+                if name == "exception":
+                    self.exceptions.append(proto.message)
+                elif getattr(proto, "id", ""):
+                    self.widgets[proto.id] = (name, proto, msg.delta.fragment_id)
+            elif kind == "new_session":
+                self.session_id = msg.new_session.initialize.session_id
+            elif kind == "script_finished" and msg.script_finished != EARLY_FOR_RERUN:
+                finished = True
+            elif kind == "session_status_changed" and finished and not msg.session_status_changed.script_is_running:
+                return
+            elif kind == "backend_operation_response":
+                return msg.backend_operation_response
+
+    async def rerun(self, states=(), fragment_id=""):
+        msg = BackMsg()
+        msg.rerun_script.query_string = ""
+        msg.rerun_script.fragment_id = fragment_id
+        for state in states:
+            msg.rerun_script.widget_states.widgets.append(state)
+        t0 = time.perf_counter()
+        await self.ws.send(msg.SerializeToString())
+        await self._settle()
+        return time.perf_counter() - t0
+
+    def _find(self, kind, match):
+        return [(wid, proto, fragment) for wid, (name, proto, fragment) in self.widgets.items()
+                if name == kind and match(wid, proto)]
+
+    # Edit one random cell, sending every edit since the editor was rebuilt
+    # (as the browser does) from inside the editor's fragment
+    async def bed_click(self):
+        editors = self._find("dataframe", lambda wid, p: "-bed_editor_" in wid)
+        wid, proto, fragment = max(editors, key=lambda w: int(w[0].rsplit("_", 1)[1]))  # latest rebuild
+        if wid != self.editor:
+            self.editor, self.edits = wid, {}
+        rows, cols = self._bed_shape()
+        crops = self._find("selectbox", lambda wid, p: p.label.startswith("Select a crop"))[0][1].options
+        self.edits.setdefault(str(self.rng.randrange(rows)), {})[str(self.rng.randrange(cols) + 1)] = self.rng.choice(crops)
+        state = _state(wid, string_value=json.dumps({"edited_rows": self.edits, "added_rows": [], "deleted_rows": []}))
+        return await self.rerun([state], fragment)
+
+    def _bed_shape(self):
+        values = {}
+        for wid, proto, _ in self._find("number_input", lambda wid, p: wid.endswith(("bed_rows", "bed_cols"))):
+            values[wid[-4:]] = int(proto.default if not proto.HasField("value") else proto.value)
+        return values.get("rows", 4), values.get("cols", 6)
+
+    # Change the experience-level filter, the organic box or (agent page) the ZIP
+    async def filter(self):
+        choices = []
+        for wid, proto, _ in self._find("selectbox", lambda wid, p: "experience level" in p.label):
+            choices.append(_state(wid, string_value=self.rng.choice(proto.options)))
+        for wid, proto, _ in self._find("checkbox", lambda wid, p: "organic" in p.label):
+            choices.append(_state(wid, bool_value=self.rng.random() < 0.5))
+        for wid, proto, _ in self._find("text_input", lambda wid, p: wid.endswith("zip_input")):
+            choices.append(_state(wid, string_value=self.rng.choice(self.zips)))
+        return await self.rerun([self.rng.choice(choices)])
+
+    # Ask the server to build a deferred export and fetch it
+    async def download(self):
+        buttons = self._find("download_button", lambda wid, p: bool(p.deferred_file_id))
+        _, proto, _ = self.rng.choice(buttons)
+        msg = BackMsg()
+        request = msg.backend_operation_request
+        request.request_id = f"{time.perf_counter_ns()}"
+        request.session_id = self.session_id
+        request.deferred_file.file_id = proto.deferred_file_id
+        t0 = time.perf_counter()
+        await self.ws.send(msg.SerializeToString())
+        response = await self._settle()
+        if response.error_msg:
+            raise RuntimeError(f"{proto.label}: {response.error_msg}")
+        body = await asyncio.to_thread(_fetch, f"http://{self.url}{response.deferred_file.url}")
+        if not body:
+            raise RuntimeError(f"{proto.label}: empty download")
+        return time.perf_counter() - t0
+
+
+def _state(wid, **value):
+    msg = BackMsg()
+    state = msg.rerun_script.widget_states.widgets.add()
+    state.id = wid
+    for name, v in value.items():
+        setattr(state, name, v)
+    return state
+
+
+def _fetch(url):
+    try:
+        with urllib.request.urlopen(url, timeout=120) as r:
+            return r.read()
+    except urllib.error.HTTPError as e:
+        if e.code == 404:
+            raise ExpiredDownload(url) from e
+        raise
+
+
+async def run_session(url, seed, deadline, think, zips, samples, errors, expired):
+    session = Session(url, random.Random(seed), zips)
+    samples["first_run"].append(await session.open())
+    names, weights = list(ACTIONS), list(ACTIONS.values())
+    try:
+        while time.time() < deadline:
+            await asyncio.sleep(session.rng.uniform(0, 2 * think))
+            action = session.rng.choices(names, weights)[0]
+            try:
+                samples[action].append(await getattr(session, action)())
+            except ExpiredDownload as e:
+                expired.append(str(e))
+            except (RuntimeError, IndexError, ValueError, OSError) as e:
+                errors.append(f"{action}: {e}")
+    finally:
+        errors.extend(f"exception: {message}" for message in session.exceptions)
+        await session.close()
+
+
+# Server CPU % and RSS every `interval` seconds until `stop` is set
+async def sample_usage(pid, interval, stop, timeline):
+    t_start = time.perf_counter()
+    last_cpu, last_t = _usage(pid)[0], t_start
+    while not stop.is_set():
+        try:
+            await asyncio.wait_for(stop.wait(), interval)
+        except asyncio.TimeoutError:
+            pass
+        cpu, rss = _usage(pid)
+        now = time.perf_counter()
+        timeline.append({"t": now - t_start, "cpu_pct": 100 * (cpu - last_cpu) / (now - last_t), "rss_mb": rss / 2 ** 20})
+        last_cpu, last_t = cpu, now
+
+
+async def load(url, pid, args, zips):
+    samples = {name: [] for name in ["first_run", *ACTIONS]}
+    errors, expired, timeline, stop = [], [], [], asyncio.Event()
+    sampler = asyncio.create_task(sample_usage(pid, args.sample, stop, timeline))
+    deadline = time.time() + args.duration
+    sessions = []
+    for i in range(args.sessions):  # staggered arrivals, like users opening the page
+        sessions.append(asyncio.create_task(run_session(url, i, deadline, args.think, zips, samples, errors, expired)))
+        await asyncio.sleep(args.ramp / max(args.sessions, 1))
+    results = await asyncio.gather(*sessions, return_exceptions=True)
+    errors.extend(f"session: {r!r}" for r in results if isinstance(r, BaseException))
+    stop.set()
+    await sampler
+    return samples, errors, expired, timeline
+
+
+# RSS growth in MB/min after the first `warmup` fraction of the run
+def rss_slope(timeline, warmup=0.25):
+    points = timeline[int(len(timeline) * warmup):]
+    if len(points) < 2:
+        return 0.0
+    return float(np.polyfit([p["t"] for p in points], [p["rss_mb"] for p in points], 1)[0] * 60)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Multi-session load test against a local streamlit server")
+    parser.add_argument("--page", choices=[page for page, _, _ in PAGES], default="agent")
+    parser.add_argument("--sessions", type=int, default=10)
+    parser.add_argument("--duration", type=float, default=30, help="seconds of load after the first session opens")
+    parser.add_argument("--ramp", type=float, default=5, help="seconds over which sessions open")
+    parser.add_argument("--think", type=float, default=0.5, help="mean seconds between a session's actions")
+    parser.add_argument("--varieties", type=int, help="serve a synthetic catalog of this size")
+    parser.add_argument("--sample", type=float, default=1.0, help="seconds between CPU/RSS samples")
+    parser.add_argument("--weather-delay", type=float, default=0.05)
+    parser.add_argument("--weather-fail-rate", type=float, default=0.0)
+    parser.add_argument("--port", type=int, help="default: a free port")
+    parser.add_argument("--out", help="write results JSON here")
+    args = parser.parse_args()
+
+    script, catalog = next((s, c) for page, s, c in PAGES if page == args.page)
+    stub, weather_url = start_stub(delay=args.weather_delay, fail_rate=args.weather_fail_rate)
+    tmp = tempfile.TemporaryDirectory()
+    env = {**os.environ, "WEATHERAPI_URL": weather_url, "WEATHERAPI_KEY": "stub"}
+    if args.varieties:
+        env["GARDENER_CATALOG"] = synthetic_store(os.path.join(tmp.name, "catalog.sqlite"), catalog, args.varieties)
+    port = args.port or _free_port()
+    zips = [f"{z:05d}" for z in zip_index().zips[:10].tolist()] + OUTSIDE_ZIPS
+    server = start_server(script, port, env)
+    try:
+        samples, errors, expired, timeline = asyncio.run(load(f"127.0.0.1:{port}", server.pid, args, zips))
+    finally:
+        server.terminate()
+        server.wait(10)
+        stub.shutdown()
+        tmp.cleanup()
+
+    print(f"{args.sessions} sessions on {args.page} for {args.duration:.0f} s, "
+          f"{stub.RequestHandlerClass.calls} weather stub calls")
+    print(f"{'action':<12} {'count':>6} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'max ms':>8}")
+    report = {}
+    for action, times in samples.items():
+        if times:
+            report[action] = {"count": len(times), **percentiles(times)}
+            p = report[action]
+            print(f"{action:<12} {len(times):>6} {p['p50']:>8.1f} {p['p95']:>8.1f} {p['p99']:>8.1f} {p['max']:>8.1f}")
+
+    print(f"\n{'t s':>6} {'cpu %':>7} {'rss MB':>8}")
+    step = max(1, len(timeline) // 10)
+    for point in timeline[::step]:
+        print(f"{point['t']:>6.1f} {point['cpu_pct']:>7.1f} {point['rss_mb']:>8.1f}")
+    slope = rss_slope(timeline)
+    if timeline:
+        cpu = [p["cpu_pct"] for p in timeline]
+        print(f"cpu mean {np.mean(cpu):.0f}% peak {max(cpu):.0f}%, rss {timeline[0]['rss_mb']:.0f} -> "
+              f"{timeline[-1]['rss_mb']:.0f} MB (peak {max(p['rss_mb'] for p in timeline):.0f}), "
+              f"growth after warmup {slope:+.1f} MB/min")
+    if expired:
+        print(f"{len(expired)} download(s) expired before they were fetched")
+    if errors:
+        print(f"\n{len(errors)} error(s):")
+        for error in sorted(set(errors))[:10]:
+            print(f"  {error}")
+
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump({"meta": {"created": datetime.now().isoformat(timespec="seconds"), "revision": _git_revision(),
+                                "cpus": os.cpu_count(), **vars(args)},
+                       "latency": report, "rss_mb_per_min": slope, "timeline": timeline,
+                       "expired_downloads": len(expired), "errors": errors}, f, indent=2)
+    sys.exit(1 if errors else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+# Planting-window queries: "what can I plant on day D in zone Z" through the
+# interval tree against a linear scan of every window, for point queries
+# (one per day of the year), month-range queries and a batch daily() over the
+# year. Also times the per-zone build and checks the tree against the scan.
+#
+#   python -m benchmarks.planting --varieties 1000 10000 100000 --zone 8b
+
+import argparse
+import os
+import tempfile
+import time
+from datetime import date, timedelta
+
+import numpy as np
+
+from benchmarks.synthetic import synthetic_store
+from gardener.catalog_store import load
+from gardener.planting import PlantingIndex
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Planting-window index benchmark")
+    parser.add_argument("--varieties", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--zone", default="8b")
+    parser.add_argument("--year", type=int, default=date.today().year)
+    args = parser.parse_args()
+
+    first = date(args.year, 1, 1)
+    days = list(range(365))
+    months = [(date(args.year, m, 1), date(args.year + m // 12, m % 12 + 1, 1) - timedelta(days=1)) for m in range(1, 13)]
+
+    print(f"{'varieties':>10} {'windows':>8} {'build ms':>9} {'zone ms':>8} {'scan us':>8} {'tree us':>8} "
+          f"{'month scan us':>14} {'month tree us':>14} {'daily ms':>9}")
+    for n in args.varieties:
+        with tempfile.TemporaryDirectory() as tmp:
+            data = load(synthetic_store(os.path.join(tmp, "catalog.sqlite"), "bench", n), "bench")
+        t0 = time.perf_counter()
+        index = PlantingIndex(data.catalog, args.year)
+        build = time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        start, end, tree = index._climate(args.zone)
+        zone = time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        scanned = [np.flatnonzero((start <= d) & (end >= d)) for d in days]
+        scan = (time.perf_counter() - t0) / len(days)
+        t0 = time.perf_counter()
+        stabbed = [tree.stab(d) for d in days]
+        stab = (time.perf_counter() - t0) / len(days)
+        assert all(np.array_equal(a, np.sort(b)) for a, b in zip(scanned, stabbed))
+
+        ranges = [((a - first).days, (b - first).days) for a, b in months]
+        t0 = time.perf_counter()
+        for a, b in ranges:
+            np.flatnonzero((start <= b) & (end >= a))
+        month_scan = (time.perf_counter() - t0) / len(ranges)
+        t0 = time.perf_counter()
+        for a, b in ranges:
+            tree.overlapping(a, b)
+        month_tree = (time.perf_counter() - t0) / len(ranges)
+
+        t0 = time.perf_counter()
+        index.daily(first, date(args.year, 12, 31), args.zone, level="Beginner")
+        daily = time.perf_counter() - t0
+
+        print(f"{n:>10} {len(index):>8} {build * 1000:>9.1f} {zone * 1000:>8.1f} {scan * 1e6:>8.1f} {stab * 1e6:>8.1f} "
+              f"{month_scan * 1e6:>14.1f} {month_tree * 1e6:>14.1f} {daily * 1000:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+# Bed-layout PNG rendering: the previous matplotlib path against the PIL renderer
+# in gardener.render, across bed sizes. Reports latency, Python-heap peak and
+# PNG size; matplotlib is skipped above --max-mpl-cells because it takes seconds,
+# and entirely when it isn't installed (it's in benchmarks/requirements.txt, not
+# the app's requirements).
+#
+#   python -m benchmarks.render_layout
+
+import argparse
+import gc
+import importlib.util
+import io
+import random
+import statistics
+import time
+import tracemalloc
+
+from gardener.catalog_store import load
+from gardener.render import render_layout_png
+
+SIZES = [(4, 6), (20, 40), (60, 120), (100, 100)]
+
+
+# The renderer both pages used before gardener.render existed
+def matplotlib_layout_png(layout):
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib.figure import Figure
+
+    rows, cols = len(layout), len(layout[0])
+    fig = Figure(figsize=(cols, rows))
+    FigureCanvasAgg(fig)
+    ax = fig.subplots()
+    ax.set_xlim(0, cols)
+    ax.set_ylim(0, rows)
+    ax.set_xticks(range(cols + 1))
+    ax.set_yticks(range(rows + 1))
+    ax.grid(True)
+    ax.invert_yaxis()
+    for i in range(rows):
+        for j in range(cols):
+            crop = layout[i][j]
+            if crop:
+                ax.text(j + 0.5, i + 0.5, crop[:10], ha="center", va="center", fontsize=6, wrap=True)
+    fig.tight_layout()
+    buffer = io.BytesIO()
+    fig.savefig(buffer, format="png")
+    return buffer.getvalue()
+
+
+def random_layout(rows, cols, seed=0):
+    rng = random.Random(seed)
+    names = load().catalog.names() + [""]
+    return [[rng.choice(names) for _ in range(cols)] for _ in range(rows)]
+
+
+def measure(render, layout, repeat):
+    times = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        data = render(layout)
+        times.append(time.perf_counter() - t0)
+    gc.collect()
+    tracemalloc.start()
+    render(layout)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return statistics.median(times) * 1000, peak / 1024, len(data)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bed layout renderer benchmark")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--max-mpl-cells", type=int, default=2500)
+    args = parser.parse_args()
+    mpl = importlib.util.find_spec("matplotlib") is not None
+    if not mpl:
+        print("matplotlib not installed; timing the PIL renderer only")
+
+    print(f"{'bed':>9} {'renderer':<11} {'median ms':>10} {'peak KiB':>10} {'PNG KiB':>9}")
+    for rows, cols in SIZES:
+        layout = random_layout(rows, cols)
+        renderers = [("pil", render_layout_png)]
+        if mpl and rows * cols <= args.max_mpl_cells:
+            renderers.insert(0, ("matplotlib", matplotlib_layout_png))
+        for name, render in renderers:
+            ms, peak, size = measure(render, layout, args.repeat)
+            print(f"{rows:>4}x{cols:<4} {name:<11} {ms:>10.1f} {peak:>10.0f} {size / 1024:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
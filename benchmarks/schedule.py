@@ -0,0 +1,53 @@
+# Season schedule: dates for every task of the catalog across many plantings
+# (bundled-climatology ZIPs x start dates), computed per planting in a Python
+# loop against one vectorized TaskPlan.dates() call. Also checks that both
+# agree.
+#
+#   python -m benchmarks.schedule --plantings 1000 10000 100000
+
+import argparse
+import time
+from datetime import date, datetime
+
+import numpy as np
+
+from gardener.catalog_store import load
+from gardener.frost import load_climatology
+from gardener.schedule import task_plan
+
+
+def plantings(n, year):
+    frosts = [np.datetime64(date(year, m, d)) for m, d in load_climatology().values()]
+    rng = np.random.default_rng(0)
+    frost = np.array(frosts, dtype="datetime64[D]")[rng.integers(0, len(frosts), n)]
+    start = np.datetime64(f"{year}-01-01") + rng.integers(0, 120, n)
+    return frost, start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Season schedule benchmark")
+    parser.add_argument("--plantings", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--max-loop", type=int, default=10000)
+    args = parser.parse_args()
+
+    plan = task_plan(load().catalog)
+    print(f"{len(plan)} tasks and care rules per planting")
+    print(f"{'plantings':>10} {'loop ms':>9} {'vector ms':>10} {'speedup':>8}")
+    for n in args.plantings:
+        frost, start = plantings(n, datetime.today().year)
+        t0 = time.perf_counter()
+        dates = plan.dates(frost, start)
+        vector = time.perf_counter() - t0
+        loop = None
+        if n <= args.max_loop:
+            t0 = time.perf_counter()
+            rows = [plan.dates(f, s)[0] for f, s in zip(frost, start)]
+            loop = time.perf_counter() - t0
+            assert (np.array(rows) == dates).all()
+        loop_ms = f"{loop * 1000:.1f}" if loop else "-"
+        speedup = f"{loop / vector:.0f}x" if loop else "-"
+        print(f"{n:>10} {loop_ms:>9} {vector * 1000:>10.1f} {speedup:>8}")
+
+
+if __name__ == "__main__":
+    main()
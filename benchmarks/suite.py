@@ -0,0 +1,278 @@
+# Benchmark suite: per-rerun latency of both Streamlit pages (driven through
+# AppTest) and export cost against synthetic catalogs of 10 to 10,000
+# varieties and beds up to 100x100.
+#
+#   rerun/<page>/<n>           warm full rerun with an n-variety catalog
+#   first_run/<page>/<n>       the first run after the catalog changed
+#   bed_click/<page>/<RxC>     one bed-cell edit (and the rerun it causes)
+#   grid_click/<page>/<n>      one bed-cell edit on a 4x6 bed with an n-variety
+#                              catalog; should stay flat as n grows
+#   table/<n>                  generate_variety_table (build_variety_table)
+#   variety_pdf/<n>            export_variety_pdf over the whole catalog
+#   task_ical/<n>              export_task_ical, schedule built from cold
+#   bed_pdf/<RxC>, bed_png/<RxC>   bed exports
+#
+# Results are JSON keyed by benchmark name (median and best ms per entry), so
+# runs on the same machine can be compared. With --baseline, any entry slower
+# than the baseline by more than its threshold fails the run (exit status 1).
+# Bed edits should rerun only the page sections that show the bed: a click
+# entry whose edits caused full page reruns ("full_reruns") fails the run too.
+#
+#   python -m benchmarks.suite --out before.json
+#   python -m benchmarks.suite --baseline before.json --out after.json
+#   python -m benchmarks.suite --quick --only 'bed_'
+
+import argparse
+import json
+import os
+import platform
+import re
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import date, datetime
+
+import pandas as pd
+
+from benchmarks.synthetic import synthetic_guide, synthetic_layout, synthetic_store
+from gardener import catalog_store, metrics, reports, schedule
+from gardener.catalog import VarietyCatalog
+from gardener.render import render_layout_png
+from gardener.table import build_variety_table, display_table, variety_mask
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FORMAT_VERSION = 1
+
+# (name, script, catalog the script reads from the catalog store)
+PAGES = [("agent", "beginner_gardener_ai_agent.py", "texas"), ("app", "app.py", "demo")]
+SIZES = [10, 100, 1000, 10000]
+BEDS = [(4, 6), (20, 40), (100, 100)]
+QUICK_SIZES = [10, 1000]
+QUICK_BEDS = [(4, 6), (20, 40)]
+
+FROST = datetime(date.today().year, 3, 15)
+START = date(date.today().year, 1, 15)
+ICAL_URL = "https://example.com/gardening_tasks.ics"
+
+# Allowed slowdown before an entry counts as a regression, by name prefix;
+# whole-page runs are noisier than the exports. Differences under FLOOR_MS
+# never count.
+THRESHOLDS = {"first_run/": 2.0, "rerun/": 1.5, "bed_click/": 1.5, "grid_click/": 1.5}
+DEFAULT_THRESHOLD = 1.3
+FLOOR_MS = 5.0
+
+
+def timed(fn, repeat, setup=None):
+    times, out = [], None
+    for _ in range(repeat):
+        if setup:
+            setup()
+        t0 = time.perf_counter()
+        out = fn()
+        times.append(time.perf_counter() - t0)
+    entry = {"ms": statistics.median(times) * 1000, "min_ms": min(times) * 1000, "runs": repeat}
+    if isinstance(out, (bytes, str)):
+        entry["bytes"] = len(out)
+    return entry
+
+
+def _cold_schedules():
+    schedule.season_schedule.cache_clear()
+    schedule.task_plan.cache_clear()
+
+
+def bench_exports(sizes, beds, repeat, results):
+    for n in sizes:
+        catalog = VarietyCatalog.from_guide(synthetic_guide(n))
+        results[f"table/{n}"] = timed(lambda: build_variety_table(catalog), repeat)
+        table = build_variety_table(catalog)
+        df = display_table(table, variety_mask(table))
+        plan = schedule.schedule_for(catalog, FROST, START)
+        results[f"variety_pdf/{n}"] = timed(lambda: reports.export_variety_pdf(df, logo=None, schedule=plan), repeat)
+        results[f"task_ical/{n}"] = timed(lambda: reports.export_task_ical(catalog, START, FROST), repeat,
+                                          setup=_cold_schedules)
+
+    catalog = VarietyCatalog.from_guide(synthetic_guide(100))
+    plan = schedule.schedule_for(catalog, FROST, START)
+    companions = catalog_store.load().companions
+    for rows, cols in beds:
+        layout = synthetic_layout(rows, cols, catalog.names()[:30])
+        layout_df = pd.DataFrame(layout)
+        results[f"bed_pdf/{rows}x{cols}"] = timed(
+            lambda: reports.export_bed_layout_pdf_qr(layout_df, ICAL_URL, catalog, companions, plan), repeat)
+        results[f"bed_png/{rows}x{cols}"] = timed(lambda: render_layout_png(layout), repeat)
+
+
+def _editor(at):
+    return next(node for node in at._tree
+                if getattr(node, "type", None) == "dataframe" and "bed_editor" in (node.proto.id or ""))
+
+
+# AppTest can't type into st.data_editor, so send the widget state the browser
+# would: every cell edited since the editor was last rebuilt
+def _edit_cells(at, edits):
+    states = at._tree.get_widget_states()
+    state = states.widgets.add()
+    state.id = _editor(at).proto.id
+    state.string_value = json.dumps({
+        "edited_rows": {str(r): {str(c + 1): name for (rr, c), name in edits.items() if rr == r}
+                        for r in {r for r, _ in edits}},
+        "added_rows": [], "deleted_rows": [],
+    })
+    at._run(states)
+
+
+def _failures(at):
+    return [e.value for e in at.exception]
+
+
+def _full_runs(page):
+    return sum(s["count"] for s in metrics.snapshot()["spans"] if s["span"] == "run" and s.get("page") == page)
+
+
+# Time `repeat` bed-cell edits on the page's current bed (resized to rows x
+# cols first), counting the full page reruns they caused
+def _bed_clicks(at, page, rows, cols, repeat):
+    at.number_input(key="bed_rows").set_value(rows).run()
+    at.number_input(key="bed_cols").set_value(cols).run()
+    names = at.selectbox[0].options
+    edits, clicks = {}, iter(range(10 ** 6))
+
+    def click():
+        k = next(clicks)
+        edits[(k * 7919 % rows, k * 104729 % cols)] = names[k % len(names)]
+        _edit_cells(at, edits)
+
+    was_enabled = metrics.enabled()
+    metrics.configure(True)
+    try:
+        before = _full_runs(page)
+        entry = timed(click, repeat)
+        entry["full_reruns"] = _full_runs(page) - before
+    finally:
+        metrics.configure(was_enabled)
+    entry["exceptions"] = _failures(at)
+    return entry
+
+
+def bench_pages(sizes, beds, repeat, results):
+    import streamlit as st
+    from streamlit.testing.v1 import AppTest
+
+    # The pages open the store named by GARDENER_CATALOG when their cached
+    # CatalogStore is created, so each size gets its own store file
+    original = os.environ.get("GARDENER_CATALOG")
+    tmp = tempfile.TemporaryDirectory()
+    try:
+        for page, script, name in PAGES:
+            for n in sizes:
+                os.environ["GARDENER_CATALOG"] = synthetic_store(os.path.join(tmp.name, f"{page}_{n}.sqlite"), name, n)
+                st.cache_resource.clear()
+                at = AppTest.from_file(os.path.join(ROOT, script), default_timeout=600)
+                results[f"first_run/{page}/{n}"] = timed(at.run, 1)
+                results[f"rerun/{page}/{n}"] = timed(at.run, repeat)
+                results[f"rerun/{page}/{n}"]["exceptions"] = _failures(at)
+                results[f"grid_click/{page}/{n}"] = _bed_clicks(at, page, 4, 6, repeat)
+
+            os.environ.pop("GARDENER_CATALOG", None)
+            st.cache_resource.clear()
+            for rows, cols in beds:
+                at = AppTest.from_file(os.path.join(ROOT, script), default_timeout=600)
+                at.run()
+                results[f"bed_click/{page}/{rows}x{cols}"] = _bed_clicks(at, page, rows, cols, repeat)
+    finally:
+        if original is None:
+            os.environ.pop("GARDENER_CATALOG", None)
+        else:
+            os.environ["GARDENER_CATALOG"] = original
+        st.cache_resource.clear()
+        tmp.cleanup()
+
+
+def threshold(name):
+    return next((t for prefix, t in THRESHOLDS.items() if name.startswith(prefix)), DEFAULT_THRESHOLD)
+
+
+# [(name, baseline ms, ms, ratio, regressed)] for entries present in both runs
+def compare(results, baseline):
+    rows = []
+    for name, entry in results.items():
+        base = baseline.get("results", {}).get(name)
+        if not base:
+            continue
+        limit = baseline.get("thresholds", {}).get(name, threshold(name))
+        ratio = entry["ms"] / base["ms"] if base["ms"] else float("inf")
+        regressed = ratio > limit and entry["ms"] - base["ms"] > FLOOR_MS
+        rows.append((name, base["ms"], entry["ms"], ratio, regressed))
+    return rows
+
+
+def _git_revision():
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True)
+        return out.stdout.strip() or None
+    except OSError:
+        return None
+
+
+def _meta(args):
+    import numpy
+    import streamlit
+
+    return {
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "revision": _git_revision(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "versions": {"numpy": numpy.__version__, "pandas": pd.__version__, "streamlit": streamlit.__version__},
+        "quick": args.quick,
+        "repeat": args.repeat,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rerun latency and export throughput benchmarks")
+    parser.add_argument("--quick", action="store_true", help=f"catalogs {QUICK_SIZES}, beds up to 20x40")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--only", help="regex; run only benchmarks whose group matches (e.g. 'rerun|bed_click')")
+    parser.add_argument("--no-pages", action="store_true", help="skip the AppTest page benchmarks")
+    parser.add_argument("--out", help="write results JSON here")
+    parser.add_argument("--baseline", help="results JSON to compare against; regressions exit with status 1")
+    args = parser.parse_args()
+
+    sizes, beds = (QUICK_SIZES, QUICK_BEDS) if args.quick else (SIZES, BEDS)
+    results = {}
+    if not args.only or re.search(args.only, "table variety_pdf task_ical bed_pdf bed_png"):
+        bench_exports(sizes, beds, args.repeat, results)
+    if not args.no_pages and (not args.only or re.search(args.only, "first_run rerun grid_click bed_click")):
+        bench_pages(sizes, beds, args.repeat, results)
+    if args.only:
+        results = {k: v for k, v in results.items() if re.search(args.only, k)}
+
+    print(f"{'benchmark':<32} {'median ms':>10} {'best ms':>9}")
+    for name, entry in results.items():
+        note = f"  {len(entry['exceptions'])} exception(s)" if entry.get("exceptions") else ""
+        note += f"  {entry['full_reruns']} full page rerun(s)" if entry.get("full_reruns") else ""
+        print(f"{name:<32} {entry['ms']:>10.1f} {entry['min_ms']:>9.1f}{note}")
+
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump({"version": FORMAT_VERSION, "meta": _meta(args),
+                       "thresholds": {name: threshold(name) for name in results}, "results": results}, f, indent=2)
+
+    failed = any(entry.get("exceptions") or entry.get("full_reruns") for entry in results.values())
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        print(f"\n{'vs baseline':<32} {'before':>10} {'after':>9} {'ratio':>7}")
+        for name, before, after, ratio, regressed in compare(results, baseline):
+            print(f"{name:<32} {before:>10.1f} {after:>9.1f} {ratio:>6.2f}x{'  REGRESSION' if regressed else ''}")
+            failed |= regressed
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+# Synthetic inputs for the benchmarks: variety guides of any size in the nested
+# {crop: {season: [variety]}} shape (task and care lists copied from the real
+# catalogs, so every schedule anchor kind shows up), catalog stores holding
+# them, and filled bed layouts. Varieties reuse the real image URLs, so the
+# asset cache sees only a handful.
+
+import random
+
+from gardener import catalog_store
+
+CROPS = ["Warm-Season", "Cold-Tolerant", "Tomatoes", "Greens", "Roots", "Herbs", "Legumes", "Squash"]
+SEASONS = ["Early", "Spring", "Summer", "Late Summer", "Fall"]
+LEVELS = ["Beginner", "Intermediate", "Advanced"]
+
+
+def _real_varieties():
+    return [r for name in catalog_store.catalogs() for r in catalog_store.read_records(catalog_store.CATALOG_DB, name)]
+
+
+def synthetic_guide(n, seed=0):
+    rng = random.Random(seed)
+    real = _real_varieties()
+    guide = {}
+    for i in range(n):
+        model = real[i % len(real)]
+        crop = CROPS[i % len(CROPS)]
+        season = SEASONS[rng.randrange(len(SEASONS))]
+        guide.setdefault(crop, {}).setdefault(season, []).append({
+            "name": f"{model['name']} {i:05d}",
+            "link": f"https://example.com/varieties/{i}",
+            "image": model.get("image", ""),
+            "level": rng.choice(LEVELS),
+            "organic": rng.random() < 0.4,
+            "tasks": list(model["tasks"]),
+            "recurring": list(model["recurring"]),
+            "days_to_harvest": model.get("days_to_harvest", 0),
+            "harvest_weeks": model.get("harvest_weeks", 0),
+        })
+    return guide
+
+
+# Store file at `path` whose `catalog` holds an n-variety synthetic guide
+def synthetic_store(path, catalog, n, seed=0):
+    catalog_store.write(path, catalog, catalog_store.records_from_guide(synthetic_guide(n, seed)))
+    return path
+
+
+def synthetic_layout(rows, cols, names, seed=0, empty=0.2):
+    rng = random.Random(seed)
+    names = list(names)
+    return [["" if rng.random() < empty else rng.choice(names) for _ in range(cols)] for _ in range(rows)]
@@ -0,0 +1,83 @@
+# Tail latency of frost lookups as seen by a page run, against the local stub.
+# Compares the old blocking fetch with the background FrostDateService.
+#
+#   python -m benchmarks.weather_latency --lookups 400 --zips 40
+
+import argparse
+import os
+import random
+import tempfile
+import time
+
+from benchmarks.weather_stub import start_stub
+from gardener.frost import FrostDateService, default_last_frost
+from gardener.weather import CircuitBreaker, WeatherClient
+
+SCENARIOS = {
+    "healthy": dict(delay=0.02, fail_rate=0.0),
+    "slow": dict(delay=1.5, fail_rate=0.0),
+    "flaky": dict(delay=0.2, fail_rate=0.5),
+    "down": dict(delay=0.0, fail_rate=1.0),
+}
+
+
+def percentiles(samples):
+    ordered = sorted(samples)
+    pick = lambda q: ordered[min(len(ordered) - 1, int(q * len(ordered)))] * 1000
+    return {"p50": pick(0.50), "p95": pick(0.95), "p99": pick(0.99), "max": ordered[-1] * 1000}
+
+
+# One lookup per simulated rerun, spaced out like real widget clicks
+def run(lookup, zips, n, interval=0.0):
+    rng = random.Random(0)
+    samples = []
+    for _ in range(n):
+        zip_code = rng.choice(zips)
+        t0 = time.perf_counter()
+        lookup(zip_code)
+        samples.append(time.perf_counter() - t0)
+        time.sleep(interval)
+    return percentiles(samples)
+
+
+def blocking_lookup(client):
+    def lookup(zip_code):
+        try:
+            return client.forecast_frost(zip_code) or default_last_frost()
+        except Exception:
+            return default_last_frost()
+    return lookup
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Frost lookup latency under API degradation")
+    parser.add_argument("--lookups", type=int, default=200)
+    parser.add_argument("--zips", type=int, default=20)
+    parser.add_argument("--interval", type=float, default=0.01, help="seconds between simulated reruns")
+    parser.add_argument("--blocking-lookups", type=int, default=20, help="the old path is slow; sample fewer")
+    args = parser.parse_args()
+    zips = [f"{10000 + i * 37:05d}" for i in range(args.zips)]
+
+    print(f"{'scenario':<9} {'path':<10} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'max ms':>9} {'API calls':>10}")
+    for name, knobs in SCENARIOS.items():
+        server, url = start_stub(**knobs)
+        timeout = (1, 1)
+        for path in ("blocking", "service"):
+            server.RequestHandlerClass.calls = 0
+            # No breaker on the blocking path: that is how the script used to behave
+            breaker = CircuitBreaker(failure_threshold=10**9) if path == "blocking" else CircuitBreaker(3, 5)
+            client = WeatherClient("stub", base_url=url, timeout=timeout, breaker=breaker)
+            if path == "blocking":
+                stats = run(blocking_lookup(client), zips, args.blocking_lookups)
+            else:
+                with tempfile.TemporaryDirectory() as tmp:
+                    service = FrostDateService(client.forecast_frost, db_path=os.path.join(tmp, "frost.sqlite"),
+                                               climatology={}, ttl=2, failure_ttl=1)
+                    stats = run(service.last_frost, zips, args.lookups, args.interval)
+            print(f"{name:<9} {path:<10} {stats['p50']:>9.2f} {stats['p95']:>9.2f} {stats['p99']:>9.2f} "
+                  f"{stats['max']:>9.2f} {server.RequestHandlerClass.calls:>10}")
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+# Local stand-in for WeatherAPI's forecast endpoint, with knobs for latency and
+# failure rate so frost lookups can be exercised under API degradation.
+#
+#   python -m benchmarks.weather_stub --port 8765 --delay 2.0 --fail-rate 0.3
+#   WEATHERAPI_URL=http://127.0.0.1:8765/v1/forecast.json WEATHERAPI_KEY=stub streamlit run beginner_gardener_ai_agent.py
+
+import argparse
+import json
+import random
+import threading
+import time
+from datetime import date, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+
+def forecast_payload(zip_code, days=10):
+    # Deterministic per ZIP: lows climb from below freezing to safely above it
+    start = date.today()
+    base = 28 + int(zip_code[-2:]) % 6 if zip_code[-2:].isdigit() else 30
+    return {
+        "location": {"name": zip_code},
+        "forecast": {"forecastday": [
+            {"date": (start + timedelta(days=i)).isoformat(), "day": {"mintemp_f": base + 2 * i}}
+            for i in range(days)
+        ]},
+    }
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    delay = 0.0
+    fail_rate = 0.0
+    calls = 0
+
+    def do_GET(self):
+        try:
+            self._answer()
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # client gave up (timed out); that's the point of the slow scenarios
+
+    def _answer(self):
+        url = urlparse(self.path)
+        type(self).calls += 1
+        if url.path != "/v1/forecast.json":
+            self.send_error(404)
+            return
+        time.sleep(self.delay)
+        if random.random() < self.fail_rate:
+            self.send_error(503)
+            return
+        query = parse_qs(url.query)
+        body = json.dumps(forecast_payload(query.get("q", ["00000"])[0], int(query.get("days", ["10"])[0])))
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body.encode())
+
+    def log_message(self, *args):
+        pass
+
+
+# Start a stub in a daemon thread; returns (server, forecast URL)
+def start_stub(port=0, delay=0.0, fail_rate=0.0):
+    handler = type("Handler", (StubHandler,), {"delay": delay, "fail_rate": fail_rate})
+    server = ThreadingHTTPServer(("127.0.0.1", port), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}/v1/forecast.json"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local WeatherAPI stub")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--delay", type=float, default=0.0, help="seconds to sleep per request")
+    parser.add_argument("--fail-rate", type=float, default=0.0, help="fraction of requests answered with 503")
+    args = parser.parse_args()
+    server, url = start_stub(args.port, args.delay, args.fail_rate)
+    print(f"WeatherAPI stub serving {url}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
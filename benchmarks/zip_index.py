@@ -0,0 +1,70 @@
+# ZIP climate index at national scale: builds a synthetic index the size of
+# the US ZIP list in a temp directory, then compares opening it (mmap) with
+# parsing the same data from CSV into a dict, and times single and batch
+# lookups, including ZIPs that only resolve through the prefix fallbacks.
+#
+#   python -m benchmarks.zip_index --zips 42000
+
+import argparse
+import os
+import tempfile
+import time
+
+import numpy as np
+
+from gardener.frost import load_climatology
+from gardener.zipindex import ZipIndex, build, read_sources
+
+
+def synthetic_csv(path, n, seed=0):
+    rng = np.random.default_rng(seed)
+    zips = np.sort(rng.choice(np.arange(501, 99951), size=n, replace=False))
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("zip,zone,last_frost\n")
+        for z in zips.tolist():
+            number = 3 + (99999 - z) * 8 // 100000  # colder up north, roughly
+            frost = 60 + (99999 - z) * 90 // 100000
+            month, day = 1 + min(frost // 31, 11), 1 + frost % 28
+            f.write(f"{z:05d},{number}{'ab'[z % 2]},{month:02d}-{day:02d}\n")
+    return zips
+
+
+def timed(fn, repeat):
+    t0 = time.perf_counter()
+    for _ in range(repeat):
+        result = fn()
+    return (time.perf_counter() - t0) / repeat, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="ZIP climate index benchmark")
+    parser.add_argument("--zips", type=int, default=42000)
+    parser.add_argument("--batch", type=int, default=100000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        source, index = os.path.join(tmp, "zips.csv"), os.path.join(tmp, "zip_index.bin")
+        zips = synthetic_csv(source, args.zips)
+        seconds, _ = timed(lambda: build(read_sources([source]), index), 1)
+        print(f"build: {seconds * 1000:.0f} ms, {os.path.getsize(index):,} bytes "
+              f"(CSV {os.path.getsize(source):,} bytes)")
+
+        open_s, zi = timed(lambda: ZipIndex(index), 200)
+        csv_s, _ = timed(lambda: load_climatology(source), 3)
+        print(f"startup: mmap index {open_s * 1e6:.0f} us, CSV dict {csv_s * 1000:.1f} ms")
+
+        known = f"{zips[len(zips) // 2]:05d}"
+        get_s, _ = timed(lambda: zi.get(known), 10000)
+        lookup_s, _ = timed(lambda: zi.lookup("99999"), 10000)
+        print(f"single: exact get {get_s * 1e6:.1f} us, lookup with fallback {lookup_s * 1e6:.1f} us")
+
+        rng = np.random.default_rng(1)
+        batch = [f"{z:05d}" for z in rng.integers(0, 100000, args.batch).tolist()]
+        batch_s, (_, _, source_codes) = timed(lambda: zi.lookup_codes(batch), 3)
+        counts = np.bincount(source_codes, minlength=4)
+        print(f"batch of {args.batch:,}: {batch_s * 1000:.1f} ms "
+              f"(exact {counts[1]:,}, zip3 {counts[2]:,}, nearest {counts[3]:,}, none {counts[0]:,})")
+
+
+if __name__ == "__main__":
+    main()
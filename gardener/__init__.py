@@ -0,0 +1 @@
+# Beginner Gardener AI – shared planning core
@@ -0,0 +1,241 @@
+# Local image cache for variety photos and the PDF logo: each URL is fetched
+# once, stored on disk under the SHA-256 of its bytes and pre-resized to the
+# widths the UI shows (80/100/150 px). Cards and PDF exports then read local
+# files, so exports keep working offline once an image has been seen.
+#
+# An SQLite index maps URLs to digests and tracks file sizes and last use (width
+# 0 is the original download); the least recently used files are deleted once
+# the cache outgrows max_bytes.
+
+import hashlib
+import io
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError
+
+from gardener import metrics
+from gardener.config import cache_path
+
+SIZES = (80, 100, 150)
+FORMATS = {"JPEG": ".jpg", "PNG": ".png", "GIF": ".gif", "WEBP": ".webp"}
+
+
+def _http_fetch(session, timeout):
+    def fetch(url):
+        res = session.get(url, timeout=timeout, headers={"User-Agent": "beginner-gardener/1.0"})
+        res.raise_for_status()
+        return res.content
+    return fetch
+
+
+class AssetCache:
+    """Process-wide image cache; meant to be shared via st.cache_resource."""
+
+    def __init__(self, directory=None, max_bytes=128 * 1024 * 1024, sizes=SIZES, fetch=None,
+                 timeout=(2, 5), failure_ttl=600, max_workers=8, clock=time.time):
+        self.directory = directory or cache_path("assets")
+        os.makedirs(self.directory, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.sizes = sizes
+        self.failure_ttl = failure_ttl
+        self.clock = clock
+        if fetch is None:
+            import requests
+
+            fetch = _http_fetch(requests.Session(), timeout)
+        self.fetch = fetch
+        self._inflight = {}
+        self._downloads = {}  # url -> lock, so one thread fetches a URL at a time
+        self._touched = {}
+        self._lock = threading.RLock()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="assets")
+        self._db = sqlite3.connect(os.path.join(self.directory, "index.sqlite"), check_same_thread=False,
+                                   timeout=30)
+        self._db.executescript("""
+            CREATE TABLE IF NOT EXISTS urls (url TEXT PRIMARY KEY, digest TEXT, failed_until REAL);
+            CREATE TABLE IF NOT EXISTS files (name TEXT PRIMARY KEY, digest TEXT, width INTEGER,
+                                              flat INTEGER, bytes INTEGER, last_used REAL);
+        """)
+        self._db.commit()
+
+    # Local path of `url` at `width` (None for the original), fetching it if
+    # needed. `wait` bounds how long to block; None waits for the download.
+    # Returns None if the image can't be had in time or at all.
+    def path(self, url, width=None, flat=False, wait=None):
+        if not url:
+            return None
+        hit = self._lookup(url, width, flat)
+        metrics.count("cache.assets", result="hit" if hit else "miss")
+        if hit:
+            return hit
+        future = self.ensure(url, width, flat)
+        try:
+            future.result(timeout=wait)
+        except TimeoutError:
+            return None
+        except Exception:
+            return None
+        return self._lookup(url, width, flat)
+
+    # For st.image: the local file when ready, otherwise the URL itself (the
+    # browser fetches it) while the download happens in the background
+    def image(self, url, width=None):
+        hit = self._lookup(url, width, False)
+        if url:
+            metrics.count("cache.assets", result="hit" if hit else "miss")
+        if hit is None and url:
+            self.ensure(url, width)
+        return hit or url
+
+    def prefetch(self, urls):
+        return [self.ensure(url) for url in dict.fromkeys(u for u in urls if u)]
+
+    # Background download + store + resize, one per URL and size however many
+    # callers ask. A size evicted while the original stays cached is rebuilt
+    # from the original.
+    def ensure(self, url, width=None, flat=False):
+        key = (url, width or 0, bool(flat))
+        with self._lock:
+            future = self._inflight.get(key)
+            if future is None:
+                future = self._executor.submit(self._ensure, url, width, flat)
+                self._inflight[key] = future
+                future.add_done_callback(lambda _: self._forget(key))
+            return future
+
+    def _forget(self, key):
+        with self._lock:
+            self._inflight.pop(key, None)
+
+    def _ensure(self, url, width=None, flat=False):
+        with self._lock:
+            download = self._downloads.setdefault(url, threading.Lock())
+        with download:
+            digest = self._download(url)
+        if digest and (width or flat) and self._lookup(url, width, flat) is None:
+            self._variant(digest, width, flat)
+        return digest
+
+    def _download(self, url):
+        with self._lock:
+            row = self._db.execute("SELECT digest, failed_until FROM urls WHERE url = ?", (url,)).fetchone()
+        if row and row[0] and os.path.exists(self._original(row[0]) or ""):
+            return row[0]
+        if row and row[1] and row[1] > self.clock():
+            return None  # failed recently; don't hammer a dead host on every rerun
+        metrics.count("http.requests", service="assets")
+        try:
+            with metrics.span("fetch.asset"):
+                digest = self.add(self.fetch(url))
+        except Exception:  # network error, HTTP error or not an image
+            metrics.count("http.errors", service="assets")
+            with self._lock:
+                self._db.execute("INSERT OR REPLACE INTO urls (url, digest, failed_until) VALUES (?, NULL, ?)",
+                                 (url, self.clock() + self.failure_ttl))
+                self._db.commit()
+            return None
+        with self._lock:
+            self._db.execute("INSERT OR REPLACE INTO urls (url, digest, failed_until) VALUES (?, ?, NULL)",
+                             (url, digest))
+            self._db.commit()
+        return digest
+
+    # Store image bytes under their content hash, plus the pre-sized copies.
+    # Raises PIL.UnidentifiedImageError for anything that isn't an image.
+    def add(self, data):
+        from PIL import Image
+
+        digest = hashlib.sha256(data).hexdigest()
+        image = Image.open(io.BytesIO(data))
+        self._write(f"{digest}{FORMATS.get(image.format, '.img')}", data, digest, 0, False)
+        for width in self.sizes:
+            self._resize(image, digest, width, False)
+        self._evict()
+        return digest
+
+    def _variant(self, digest, width, flat):
+        from PIL import Image
+
+        original = self._original(digest)
+        if original:
+            with Image.open(original) as image:
+                self._resize(image, digest, width, flat)
+            self._evict()
+
+    # Width-limited copy; `flat` drops transparency onto white as a JPEG, which
+    # the PDF writer embeds as is
+    def _resize(self, image, digest, width, flat):
+        from PIL import Image
+
+        image = image.convert("RGBA")
+        if width and image.width > width:
+            image = image.resize((width, max(1, round(image.height * width / image.width))), Image.LANCZOS)
+        alpha = image.getchannel("A").getextrema()[0] < 255
+        if flat or not alpha:
+            background = Image.new("RGB", image.size, (255, 255, 255))
+            background.paste(image, mask=image.getchannel("A"))
+            image, fmt, ext = background, "JPEG", ".jpg"
+        else:
+            fmt, ext = "PNG", ".png"
+        buffer = io.BytesIO()
+        image.save(buffer, format=fmt, quality=88, optimize=True)
+        name = f"{digest}_w{width or 0}{'_flat' if flat else ''}{ext}"
+        self._write(name, buffer.getvalue(), digest, width or 0, flat)
+
+    def _write(self, name, data, digest, width, flat):
+        path = os.path.join(self.directory, name)
+        with open(path + ".part", "wb") as f:
+            f.write(data)
+        os.replace(path + ".part", path)
+        with self._lock:
+            self._db.execute("INSERT OR REPLACE INTO files (name, digest, width, flat, bytes, last_used) "
+                             "VALUES (?, ?, ?, ?, ?, ?)", (name, digest, width, int(flat), len(data), self.clock()))
+            self._db.commit()
+
+    def _original(self, digest):
+        with self._lock:
+            row = self._db.execute("SELECT name FROM files WHERE digest = ? AND width = 0 AND flat = 0",
+                                   (digest,)).fetchone()
+        return os.path.join(self.directory, row[0]) if row else None
+
+    def _lookup(self, url, width, flat):
+        with self._lock:
+            row = self._db.execute(
+                "SELECT f.name FROM urls u JOIN files f ON f.digest = u.digest "
+                "WHERE u.url = ? AND f.width = ? AND f.flat = ?",
+                (url, width or 0, int(flat)),
+            ).fetchone()
+            if not row:
+                return None
+            path = os.path.join(self.directory, row[0])
+            if not os.path.exists(path):
+                return None
+            self._touched[row[0]] = self.clock()
+            return path
+
+    # Drop least recently used files until the cache fits max_bytes
+    def _evict(self):
+        with self._lock:
+            self._db.executemany("UPDATE files SET last_used = ? WHERE name = ?",
+                                 [(t, name) for name, t in self._touched.items()])
+            self._touched.clear()
+            total = self._db.execute("SELECT COALESCE(SUM(bytes), 0) FROM files").fetchone()[0]
+            if total > self.max_bytes:
+                for name, size in self._db.execute("SELECT name, bytes FROM files ORDER BY last_used").fetchall():
+                    if total <= self.max_bytes:
+                        break
+                    try:
+                        os.remove(os.path.join(self.directory, name))
+                    except FileNotFoundError:
+                        pass
+                    self._db.execute("DELETE FROM files WHERE name = ?", (name,))
+                    total -= size
+            self._db.commit()
+
+    def stats(self):
+        with self._lock:
+            files, size = self._db.execute("SELECT COUNT(*), COALESCE(SUM(bytes), 0) FROM files").fetchone()
+            urls = self._db.execute("SELECT COUNT(*) FROM urls WHERE digest IS NOT NULL").fetchone()[0]
+        return {"urls": urls, "files": files, "bytes": size}
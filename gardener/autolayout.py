@@ -0,0 +1,196 @@
+# Auto-fill for beds: pack a target crop mix onto the grid with each plant
+# taking a square footprint derived from its spacing, then rearrange plants
+# to maximize companion adjacency.
+#
+# The score is the number of 4-neighbour cell edges joining companion crops,
+# i.e. a neighbour convolution of the crop-id grid against a companion matrix.
+# The optimizer is a batched local search: it draws many swaps of equal-sized
+# plants at once, scores each one's delta vectorized over only the edges
+# around the two plants, and applies the best non-overlapping improvements.
+
+import math
+import re
+import time
+
+import numpy as np
+
+from gardener.bed import BedGrid
+
+CELL_INCHES = 12
+
+
+# "18–24 inches apart" -> 2: the closest recommended spacing, in whole cells
+def footprint(spacing_text, cell_inches=CELL_INCHES):
+    match = re.search(r"\d+", spacing_text or "")
+    return max(1, math.ceil(int(match.group()) / cell_inches)) if match else 1
+
+
+# Symmetric 0/1 matrix over `names` (index 0 is the empty square)
+def companion_matrix(names, companions):
+    index = {name: i for i, name in enumerate(names)}
+    weights = np.zeros((len(names), len(names)), dtype=np.int32)
+    for crop, friends in companions.items():
+        for friend in friends:
+            if crop in index and friend in index and crop != friend:
+                weights[index[crop], index[friend]] = weights[index[friend], index[crop]] = 1
+    return weights
+
+
+def layout_score(cells, weights):
+    return int(weights[cells[:, :-1], cells[:, 1:]].sum() + weights[cells[:-1], cells[1:]].sum())
+
+
+# Plants of footprint f go on random free slots of the f-aligned lattice,
+# biggest first, so they end up spread among the small crops that fill the
+# rest in proportion to their weights. Swaps only exchange equal footprints,
+# so this spread is what lets big crops find companions at all.
+def _pack(rows, cols, mix, sizes, rng):
+    uid = np.full((rows, cols), -1, dtype=np.int64)
+    unit_crop, unit_size, unit_origin = [], [], []
+    total = sum(mix.values())
+    for f in sorted({s for s in sizes.values() if s > 1}, reverse=True):
+        crops = [k for k in mix if sizes[k] == f]
+        wanted = [int(mix[k] / total * rows * cols / (f * f)) for k in crops]
+        lr, lc = rows // f, cols // f
+        if not lr or not lc:
+            continue
+        busy = (uid[:lr * f, :lc * f] >= 0).reshape(lr, f, lc, f).any(axis=(1, 3))
+        slots = rng.permutation(np.argwhere(~busy))
+        plants = rng.permutation(np.repeat(np.arange(len(crops)), wanted)[:len(slots)])
+        for (i, j), k in zip(slots[:len(plants)], plants):
+            uid[i * f:(i + 1) * f, j * f:(j + 1) * f] = len(unit_crop)
+            unit_crop.append(crops[k])
+            unit_size.append(f)
+            unit_origin.append((i * f, j * f))
+
+    free = np.argwhere(uid < 0)
+    small = [k for k in mix if sizes[k] == 1]
+    if small:
+        weights = np.array([mix[k] for k in small], dtype=float)
+        counts = np.floor(weights / weights.sum() * len(free)).astype(int)
+        counts[:len(free) - counts.sum()] += 1
+        fill = [small[k] for k in rng.permutation(np.repeat(np.arange(len(small)), counts))]
+    else:
+        fill = []
+    fill += [""] * (len(free) - len(fill))
+    for (i, j), crop in zip(free, fill):
+        uid[i, j] = len(unit_crop)
+        unit_crop.append(crop)
+        unit_size.append(1)
+        unit_origin.append((i, j))
+    return uid, unit_crop, np.array(unit_size), np.array(unit_origin).reshape(-1, 2)
+
+
+# Flat cell indices of each unit and their 4 neighbours (-1 off the bed)
+def _unit_geometry(units, size, origin, rows, cols):
+    offsets = np.array([(a, b) for a in range(size) for b in range(size)])
+    cells = origin[units][:, None, :] + offsets[None, :, :]
+    steps = np.array([(-1, 0), (1, 0), (0, -1), (0, 1)])
+    around = cells[:, :, None, :] + steps[None, None, :, :]
+    inside = (around[..., 0] >= 0) & (around[..., 0] < rows) & (around[..., 1] >= 0) & (around[..., 1] < cols)
+    flat_cells = cells[..., 0] * cols + cells[..., 1]
+    flat_around = np.where(inside, around[..., 0] * cols + around[..., 1], -1)
+    return flat_cells, flat_around
+
+
+# Score change for swapping the crops of units u and v, for a batch of pairs.
+# `around_*` hold the neighbour cells of each unit's cells. Edges between two
+# changed cells are seen from both ends, so they count half from each.
+def _swap_deltas(u, v, around_u, around_v, uid, crop_of_unit, grid_crop, weights):
+    a, b = crop_of_unit[u], crop_of_unit[v]
+    delta = np.zeros(len(u))
+    for around, old, new in ((around_u, a, b), (around_v, b, a)):
+        valid = around >= 0
+        q = np.where(valid, around, 0)
+        q_unit = uid[q]
+        q_old = grid_crop[q]
+        in_u = q_unit == u[:, None, None]
+        in_v = q_unit == v[:, None, None]
+        q_new = np.where(in_u, b[:, None, None], np.where(in_v, a[:, None, None], q_old))
+        share = np.where(in_u | in_v, 0.5, 1.0) * valid
+        change = weights[new[:, None, None], q_new] - weights[old[:, None, None], q_old]
+        delta += (change * share).sum(axis=(1, 2))
+    return delta
+
+
+def solve(rows, cols, mix, spacing=None, companions=None, seed=0, time_limit=0.75, batch=512, patience=40):
+    """Auto-fill a rows x cols bed; returns (BedGrid, stats).
+
+    `mix` maps crop names to relative weights (share of bed area).
+    """
+    spacing = spacing or {}
+    companions = companions or {}
+    rng = np.random.default_rng(seed)
+    started = time.perf_counter()
+
+    mix = {k: float(w) for k, w in mix.items() if k and w > 0}
+    sizes = {k: min(footprint(spacing.get(k)), rows, cols) for k in mix}
+    uid, unit_names, unit_size, origin = _pack(rows, cols, mix, sizes, rng)
+    names = [""] + list(mix)
+    index = {name: i for i, name in enumerate(names)}
+    crop_of_unit = np.array([index[n] for n in unit_names], dtype=np.int64)
+    weights = companion_matrix(names, companions)
+    uid_flat = uid.ravel()
+    grid_crop = crop_of_unit[uid_flat]
+
+    score = initial = layout_score(grid_crop.reshape(rows, cols), weights)
+    classes = []
+    for f in np.unique(unit_size):
+        units = np.flatnonzero(unit_size == f)
+        if len(units) > 1 and len(np.unique(crop_of_unit[units])) > 1:
+            classes.append((units, _unit_geometry(units, int(f), origin, rows, cols)))
+
+    # Map a unit id to its row in its class's geometry arrays
+    position = np.zeros(len(unit_size), dtype=np.int64)
+    for units, _ in classes:
+        position[units] = np.arange(len(units))
+
+    history = [(0.0, score)]
+    batches = accepted = stale = 0
+    while classes and weights.any() and stale < patience and time.perf_counter() - started < time_limit:
+        batches += 1
+        improved = 0
+        for units, geometry in classes:
+            pick = rng.integers(0, len(units), size=(2, min(batch, len(units))))
+            u, v = units[pick[0]], units[pick[1]]
+            keep = crop_of_unit[u] != crop_of_unit[v]
+            u, v = u[keep], v[keep]
+            if not len(u):
+                continue
+            cells_u, around_u = geometry[0][position[u]], geometry[1][position[u]]
+            cells_v, around_v = geometry[0][position[v]], geometry[1][position[v]]
+            delta = _swap_deltas(u, v, around_u, around_v, uid_flat, crop_of_unit, grid_crop, weights)
+
+            # Best first, skipping swaps that touch a plant another accepted swap
+            # touched, so every applied delta is still exact
+            touched = set()
+            for k in np.argsort(-delta):
+                if delta[k] <= 0:
+                    break
+                near = {int(u[k]), int(v[k])}
+                near.update(uid_flat[around_u[k][around_u[k] >= 0]].tolist())
+                near.update(uid_flat[around_v[k][around_v[k] >= 0]].tolist())
+                if near & touched:
+                    continue
+                touched |= near
+                cu, cv = crop_of_unit[u[k]], crop_of_unit[v[k]]
+                crop_of_unit[u[k]], crop_of_unit[v[k]] = cv, cu
+                grid_crop[cells_u[k]] = cv
+                grid_crop[cells_v[k]] = cu
+                score += int(round(delta[k]))
+                improved += 1
+        accepted += improved
+        stale = 0 if improved else stale + 1
+        history.append((time.perf_counter() - started, score))
+
+    cells = grid_crop.reshape(rows, cols)
+    stats = {
+        "score": layout_score(cells, weights),
+        "initial_score": initial,
+        "batches": batches,
+        "accepted": accepted,
+        "seconds": time.perf_counter() - started,
+        "history": history,
+        "footprints": sizes,
+    }
+    return BedGrid.from_ids(cells, names), stats
@@ -0,0 +1,262 @@
+# Headless batch exporter: variety PDFs, bed-layout PDFs and task calendars for
+# every row of a manifest, fanned out over a process pool.
+#
+#   python -m gardener.batch customers.jsonl --out exports/ --workers 8
+#
+# Manifest rows (CSV columns or JSONL keys): id, zip, start_date (YYYY-MM-DD),
+# level, organic, crop, layout (JSON list of rows of variety names), ical_url.
+# Only zip is required. A row that doesn't parse is journaled as an error and
+# the run goes on. Each row's files land in <out>/<id>/ as soon as they are
+# built, and finished ids are journaled so an interrupted run picks up where it
+# stopped; pass --force to rebuild everything.
+
+import argparse
+import csv
+import json
+import os
+import re
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from datetime import date, datetime
+from functools import partial
+
+import pandas as pd
+
+from gardener import reports
+from gardener.assets import AssetCache
+from gardener.catalog_store import DEFAULT_CATALOG, load
+from gardener.frost import FrostDateService
+from gardener.schedule import schedule_for
+from gardener.table import build_variety_table, display_table, variety_mask
+from gardener.weather import WeatherClient
+
+KINDS = ("variety_pdf", "ical", "bed_pdf")
+OUTPUT_NAMES = {
+    "variety_pdf": "variety_guide.pdf",
+    "ical": "gardening_tasks.ics",
+    "bed_pdf": "garden_bed_layout_qr.pdf",
+}
+JOURNAL = "_journal.jsonl"
+DEFAULT_ICAL_URL = "https://example.com/gardening_tasks.ics"
+
+
+def _parse_bool(value):
+    if isinstance(value, bool) or value is None:
+        return value
+    value = str(value).strip().lower()
+    if value in ("", "all", "any"):
+        return None
+    return value in ("1", "true", "yes", "y")
+
+
+def _job_id(row, line_no):
+    return re.sub(r"[^\w.-]", "_", str(row.get("id") or line_no))
+
+
+def _parse_job(row, line_no):
+    layout = row.get("layout") or None
+    if isinstance(layout, str):
+        layout = json.loads(layout)
+    start = row.get("start_date") or None
+    level = row.get("level") or None
+    return {
+        "id": _job_id(row, line_no),
+        "zip": str(row.get("zip", "")).strip(),
+        "start_date": date.fromisoformat(start) if start else None,
+        "level": None if level == "All" else level,
+        "organic": _parse_bool(row.get("organic")),
+        "crop": row.get("crop") or None,
+        "layout": layout,
+        "ical_url": row.get("ical_url") or DEFAULT_ICAL_URL,
+    }
+
+
+# Jobs, or for rows that don't parse an error result like run_job's
+def read_manifest(path):
+    with open(path, newline="", encoding="utf-8") as f:
+        if path.endswith(".csv"):
+            rows = csv.DictReader(f)
+        else:
+            rows = (line for line in f if line.strip())
+        for line_no, row in enumerate(rows, start=1):
+            try:
+                if isinstance(row, str):
+                    row = json.loads(row)
+                yield _parse_job(row, line_no)
+            except (ValueError, TypeError, AttributeError) as exc:
+                job_id = _job_id(row, line_no) if isinstance(row, dict) else str(line_no)
+                yield {"id": job_id, "status": "error", "error": f"row {line_no}: {type(exc).__name__}: {exc}",
+                       "bytes": 0, "seconds": 0.0}
+
+
+def read_journal(out_dir):
+    done = set()
+    path = os.path.join(out_dir, JOURNAL)
+    if os.path.exists(path):
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue  # torn last line from an interrupted run
+                if entry.get("status") == "ok":
+                    done.add(entry["id"])
+    return done
+
+
+# `data` is bytes, or an export taking out= that streams into the open file
+# and returns the byte count; a failed write leaves no .part file behind
+def _write_atomic(path, data):
+    tmp = path + ".part"
+    try:
+        with open(tmp, "wb") as f:
+            size = data(out=f) if callable(data) else f.write(data)
+    except BaseException:
+        os.remove(tmp)
+        raise
+    os.replace(tmp, path)
+    return size
+
+
+# Per-process state, built once by the pool initializer
+_worker = {}
+
+
+def _init_worker(out_dir, kinds, logo, frost_wait, catalog_name):
+    data = load(catalog=catalog_name)
+    catalog = data.catalog
+    client = WeatherClient(os.environ.get("WEATHERAPI_KEY"))
+    _worker.update(
+        out_dir=out_dir,
+        kinds=kinds,
+        logo=logo,
+        frost_wait=frost_wait,
+        catalog=catalog,
+        companions=data.companions,
+        table=build_variety_table(catalog),
+        frost=FrostDateService(fetch=client.forecast_frost, max_workers=1),
+    )
+
+
+def run_job(job):
+    t0 = time.perf_counter()
+    w = _worker
+    job_dir = os.path.join(w["out_dir"], job["id"])
+    os.makedirs(job_dir, exist_ok=True)
+    written = 0
+    try:
+        # All of a job's files share one schedule for its ZIP and start date
+        frost = w["frost"].last_frost(job["zip"], wait=w["frost_wait"]) if job["zip"] else None
+        start = job["start_date"] or datetime.today().date()
+        schedule = schedule_for(w["catalog"], frost, start)
+        for kind in w["kinds"]:
+            if kind == "variety_pdf":
+                mask = variety_mask(w["table"], crop=job["crop"], level=job["level"], organic=job["organic"])
+                data = partial(reports.export_variety_pdf, display_table(w["table"], mask), logo=w["logo"],
+                               schedule=schedule)
+            elif kind == "ical":
+                data = partial(reports.export_task_ical, w["catalog"], start, frost)
+            elif job["layout"]:
+                layout_df = pd.DataFrame(job["layout"])
+                data = partial(reports.export_bed_layout_pdf_qr, layout_df, job["ical_url"], w["catalog"],
+                               w["companions"], schedule)
+            else:
+                continue
+            written += _write_atomic(os.path.join(job_dir, OUTPUT_NAMES[kind]), data)
+    except Exception as exc:
+        return {"id": job["id"], "status": "error", "error": f"{type(exc).__name__}: {exc}",
+                "bytes": written, "seconds": time.perf_counter() - t0}
+    return {"id": job["id"], "status": "ok", "bytes": written, "seconds": time.perf_counter() - t0}
+
+
+def _report(done, failed, skipped, total_bytes, started, final=False):
+    elapsed = max(time.perf_counter() - started, 1e-9)
+    line = (f"{done} done, {failed} failed, {skipped} skipped | "
+            f"{done / elapsed:.1f} jobs/s, {total_bytes / elapsed / 1e6:.2f} MB/s, {elapsed:.1f}s elapsed")
+    print(("finished: " if final else "") + line, file=sys.stderr, flush=True)
+
+
+def run(manifest, out_dir, workers=None, kinds=KINDS, logo=reports.LOGO_URL, force=False,
+        frost_wait=5.0, progress_every=5.0, catalog=DEFAULT_CATALOG):
+    os.makedirs(out_dir, exist_ok=True)
+    load(catalog=catalog)  # fail before starting workers if the catalog is missing or invalid
+    finished = set() if force else read_journal(out_dir)
+    # Fetch a remote logo once (or reuse the cached copy) instead of per PDF
+    if logo and logo.startswith(("http://", "https://")):
+        logo = AssetCache().path(logo, 150, flat=True, wait=30)
+        if logo is None:
+            print("logo unavailable, exporting variety PDFs without it", file=sys.stderr)
+    workers = workers or os.cpu_count() or 1
+    done = failed = skipped = total_bytes = 0
+    started = last_report = time.perf_counter()
+
+    with open(os.path.join(out_dir, JOURNAL), "a", encoding="utf-8") as journal, \
+            ProcessPoolExecutor(workers, initializer=_init_worker,
+                                initargs=(out_dir, tuple(kinds), logo, frost_wait, catalog)) as pool:
+        pending = set()
+        jobs = read_manifest(manifest)
+
+        def record(result):
+            nonlocal done, failed, total_bytes
+            journal.write(json.dumps(result) + "\n")
+            total_bytes += result["bytes"]
+            if result["status"] == "ok":
+                done += 1
+            else:
+                failed += 1
+                print(f"{result['id']}: {result['error']}", file=sys.stderr)
+
+        # Keep a bounded window of jobs in flight so huge manifests stream through
+        def drain():
+            nonlocal last_report
+            finished_now, pending_now = wait(pending, return_when=FIRST_COMPLETED)
+            pending.intersection_update(pending_now)
+            for future in finished_now:
+                record(future.result())
+            journal.flush()
+            if time.perf_counter() - last_report >= progress_every:
+                _report(done, failed, skipped, total_bytes, started)
+                last_report = time.perf_counter()
+
+        for job in jobs:
+            if job["id"] in finished:
+                skipped += 1
+                continue
+            if job.get("status") == "error":  # didn't parse
+                record(job)
+                continue
+            pending.add(pool.submit(run_job, job))
+            if len(pending) >= workers * 4:
+                drain()
+        while pending:
+            drain()
+
+    _report(done, failed, skipped, total_bytes, started, final=True)
+    return {"done": done, "failed": failed, "skipped": skipped, "bytes": total_bytes,
+            "seconds": time.perf_counter() - started}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m gardener.batch", description="Batch-export garden plans from a manifest")
+    parser.add_argument("manifest", help="CSV or JSONL manifest")
+    parser.add_argument("--out", required=True, help="output directory (also holds the resume journal)")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: CPU count)")
+    parser.add_argument("--kinds", default=",".join(KINDS), help=f"comma-separated subset of {', '.join(KINDS)}")
+    parser.add_argument("--logo", default=reports.LOGO_URL, help="logo path or URL for variety PDFs; empty for none")
+    parser.add_argument("--frost-wait", type=float, default=5.0, help="seconds to wait for a forecast per ZIP")
+    parser.add_argument("--catalog", default=DEFAULT_CATALOG, help="catalog name in the variety catalog store")
+    parser.add_argument("--force", action="store_true", help="rebuild rows already marked done in the journal")
+    args = parser.parse_args(argv)
+
+    kinds = [k.strip() for k in args.kinds.split(",") if k.strip()]
+    unknown = set(kinds) - set(KINDS)
+    if unknown:
+        parser.error(f"unknown kinds: {', '.join(sorted(unknown))}")
+    summary = run(args.manifest, args.out, args.workers, kinds, args.logo, args.force, args.frost_wait,
+                  catalog=args.catalog)
+    return 1 if summary["failed"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
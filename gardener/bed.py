@@ -0,0 +1,232 @@
+# Garden bed grid backed by a numpy array of crop ids, so big plots (60x120
+# one-foot squares) stay cheap to edit and cheap to keep per session. Every edit
+# returns only the cells it changed as (row, col, crop) triples. Names are only
+# materialized for display and export.
+#
+# to_token()/from_token() give a compact, URL-safe form of a plan: the crop ids
+# run-length encoded (or raw bytes when a bed is too busy for runs to pay off),
+# then zlib and base64url.
+
+import base64
+import binascii
+import hashlib
+import struct
+import zlib
+from collections import deque
+
+import numpy as np
+
+MAX_SIDE = 200
+TOKEN_VERSION = 1
+_HEADER = struct.Struct("<BBHHHI")  # version, encoding, rows, cols, crop names, runs
+_RAW, _RLE = 0, 1
+
+
+class BedGrid:
+    def __init__(self, rows, cols):
+        if not (0 < rows <= MAX_SIDE and 0 < cols <= MAX_SIDE):
+            raise ValueError(f"bed must be between 1x1 and {MAX_SIDE}x{MAX_SIDE}, got {rows}x{cols}")
+        self.cells = np.zeros((rows, cols), dtype=np.uint16)
+        self.names = [""]  # id 0 is an empty square
+        self._ids = {"": 0}
+        self.version = 0
+        self._digest = None
+
+    @classmethod
+    def from_layout(cls, layout):
+        grid = cls(len(layout), len(layout[0]))
+        grid.cells[:] = [[grid.crop_id(c) for c in row] for row in layout]
+        return grid
+
+    @property
+    def shape(self):
+        return self.cells.shape
+
+    def crop_id(self, name):
+        name = name or ""
+        if name not in self._ids:
+            self._ids[name] = len(self.names)
+            self.names.append(name)
+        return self._ids[name]
+
+    def __getitem__(self, pos):
+        return self.names[self.cells[pos]]
+
+    def to_layout(self):
+        return self._name_array().tolist()
+
+    def to_frame(self):
+        import pandas as pd
+
+        return pd.DataFrame(self._name_array())
+
+    def _name_array(self):
+        return np.array(self.names, dtype=object)[self.cells]
+
+    def copy(self):
+        other = BedGrid(*self.shape)
+        other.cells = self.cells.copy()
+        other.names = list(self.names)
+        other._ids = dict(self._ids)
+        other.version = self.version
+        other._digest = self._digest
+        return other
+
+    # Crop names actually planted (empty first) and the cells renumbered to match,
+    # so two grids with the same plan agree whatever order crops were added in
+    def _compact(self):
+        used = np.union1d([0], self.cells)
+        remap = np.zeros(len(self.names), dtype=np.uint16)
+        remap[used] = np.arange(len(used))
+        return [self.names[i] for i in used], remap[self.cells]
+
+    # Content hash for artifact keys; independent of crop-id numbering
+    def digest(self):
+        if self._digest is None:
+            names, cells = self._compact()
+            h = hashlib.sha256()
+            h.update(repr((self.shape, names)).encode("utf-8"))
+            h.update(cells.tobytes())
+            self._digest = h.hexdigest()
+        return self._digest
+
+    def nbytes(self):
+        return self.cells.nbytes + sum(len(n) for n in self.names)
+
+    @classmethod
+    def from_runs(cls, rows, cols, names, values, lengths):
+        grid = cls(rows, cols)
+        grid.cells[:] = np.repeat(np.asarray(values, dtype=np.uint16), lengths).reshape(rows, cols)
+        grid.names = list(names)
+        grid._ids = {n: i for i, n in enumerate(grid.names)}
+        return grid
+
+    @classmethod
+    def from_ids(cls, cells, names):
+        grid = cls(*cells.shape)
+        grid.cells[:] = cells
+        grid.names = list(names)
+        grid._ids = {n: i for i, n in enumerate(grid.names)}
+        return grid
+
+    def to_token(self):
+        names, cells = self._compact()
+        values, lengths = _runs(cells.ravel())
+        name_bytes = "\n".join(names[1:]).encode("utf-8")
+        id_type = "<u1" if len(names) <= 256 else "<u2"
+        if 6 * len(values) < cells.size * np.dtype(id_type).itemsize:
+            encoding, body = _RLE, [values.astype("<u2").tobytes(), lengths.astype("<u4").tobytes()]
+        else:
+            encoding, body = _RAW, [cells.astype(id_type).tobytes()]
+        payload = b"".join([
+            _HEADER.pack(TOKEN_VERSION, encoding, *self.shape, len(names), len(values)),
+            struct.pack("<I", len(name_bytes)), name_bytes, *body,
+        ])
+        return base64.urlsafe_b64encode(zlib.compress(payload, 9)).rstrip(b"=").decode("ascii")
+
+    @classmethod
+    def from_token(cls, token):
+        try:
+            payload = zlib.decompress(base64.urlsafe_b64decode(token + "=" * (-len(token) % 4)))
+            version, encoding, rows, cols, n_names, n_runs = _HEADER.unpack_from(payload)
+            if version != TOKEN_VERSION:
+                raise ValueError(f"not a garden plan: unsupported version {version}")
+            offset = _HEADER.size
+            (name_len,) = struct.unpack_from("<I", payload, offset)
+            offset += 4
+            names = [""] + payload[offset:offset + name_len].decode("utf-8").split("\n")
+            offset += name_len
+            if encoding == _RLE:
+                values = np.frombuffer(payload, dtype="<u2", count=n_runs, offset=offset)
+                lengths = np.frombuffer(payload, dtype="<u4", count=n_runs, offset=offset + 2 * n_runs)
+            else:
+                id_type = "<u1" if n_names <= 256 else "<u2"
+                values = np.frombuffer(payload, dtype=id_type, count=rows * cols, offset=offset)
+                lengths = np.ones(rows * cols, dtype=np.int64)
+                n_runs = values.size
+        except (binascii.Error, zlib.error, struct.error, UnicodeDecodeError) as exc:
+            raise ValueError(f"not a garden plan: {exc}") from None
+        if n_names == 1:
+            names = [""]
+        if len(names) != n_names or int(lengths.sum()) != rows * cols or (n_runs and values.max() >= n_names):
+            raise ValueError("not a garden plan: inconsistent contents")
+        return cls.from_runs(rows, cols, names, values, lengths)
+
+    def resize(self, rows, cols):
+        if (rows, cols) == self.shape:
+            return
+        if not (0 < rows <= MAX_SIDE and 0 < cols <= MAX_SIDE):
+            raise ValueError(f"bed must be between 1x1 and {MAX_SIDE}x{MAX_SIDE}, got {rows}x{cols}")
+        cells = np.zeros((rows, cols), dtype=np.uint16)
+        keep_r, keep_c = min(rows, self.shape[0]), min(cols, self.shape[1])
+        cells[:keep_r, :keep_c] = self.cells[:keep_r, :keep_c]
+        self.cells = cells
+        self._touch()
+
+    def _touch(self):
+        self.version += 1
+        self._digest = None
+
+    # Write `crop_id` where `mask` is set inside the region and report what changed
+    def _assign(self, rows, cols, crop_id, mask=None):
+        region = self.cells[rows, cols]
+        changed = region != crop_id
+        if mask is not None:
+            changed &= mask
+        if not changed.any():
+            return []
+        region[changed] = crop_id
+        self._touch()
+        r, c = np.nonzero(changed)
+        name = self.names[crop_id]
+        return [(int(i) + rows.start, int(j) + cols.start, name) for i, j in zip(r, c)]
+
+    def _rect(self, r0, c0, r1, c1):
+        rows, cols = self.shape
+        r0, r1 = sorted((max(0, r0), min(rows - 1, r1)))
+        c0, c1 = sorted((max(0, c0), min(cols - 1, c1)))
+        return slice(r0, r1 + 1), slice(c0, c1 + 1)
+
+    def set_cell(self, row, col, name):
+        return self._assign(slice(row, row + 1), slice(col, col + 1), self.crop_id(name))
+
+    def fill_row(self, row, name):
+        return self._assign(slice(row, row + 1), slice(0, self.shape[1]), self.crop_id(name))
+
+    # Inclusive corners, clipped to the bed
+    def fill_rect(self, r0, c0, r1, c1, name):
+        return self._assign(*self._rect(r0, c0, r1, c1), self.crop_id(name))
+
+    def clear_region(self, r0, c0, r1, c1):
+        return self.fill_rect(r0, c0, r1, c1, "")
+
+    # Repaint the 4-connected patch of the same crop around (row, col)
+    def flood_fill(self, row, col, name):
+        target = self.cells[row, col]
+        crop_id = self.crop_id(name)
+        if target == crop_id:
+            return []
+        rows, cols = self.shape
+        mask = np.zeros(self.shape, dtype=bool)
+        mask[row, col] = True
+        queue = deque([(row, col)])
+        while queue:
+            i, j = queue.popleft()
+            for a, b in ((i - 1, j), (i + 1, j), (i, j - 1), (i, j + 1)):
+                if 0 <= a < rows and 0 <= b < cols and not mask[a, b] and self.cells[a, b] == target:
+                    mask[a, b] = True
+                    queue.append((a, b))
+        return self._assign(slice(0, rows), slice(0, cols), crop_id, mask)
+
+    # Apply (row, col, crop) edits such as a grid editor's changed cells
+    def apply(self, changes):
+        diff = []
+        for row, col, name in changes:
+            diff += self.set_cell(row, col, name)
+        return diff
+
+
+def _runs(flat):
+    starts = np.concatenate(([0], np.flatnonzero(flat[1:] != flat[:-1]) + 1))
+    lengths = np.diff(np.concatenate((starts, [flat.size])))
+    return flat[starts], lengths
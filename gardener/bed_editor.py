@@ -0,0 +1,216 @@
+# Streamlit bed editor shared by both pages: one st.data_editor over a BedGrid
+# instead of one st.button per square, plus bulk tools (fill row, fill
+# rectangle, flood fill, clear region).
+#
+# The browser reports only the cells it changed (the editor's "edited_rows"),
+# and those are applied to the grid in place. The editor is rebuilt from the
+# grid only after a bulk edit or a resize, so typing in a cell costs the same
+# on a 4x6 bed as on a 60x120 one.
+#
+# Grids live in a shared BedStore (idle ones are parked on disk); session
+# state only holds the session's grid id. Plans can be shared through the
+# page URL (?plan=<token>), saved to a file and pasted back in. Given spacing
+# and companion guides, the editor also offers an auto-fill from a crop mix.
+#
+# On pages split into fragments (gardener.fragments), `rerun` names the
+# fragments to rerun after the bed changes: the editor's own and those that
+# show the bed. The rest of the page is left alone.
+
+import re
+import uuid
+
+import streamlit as st
+
+from gardener.autolayout import solve
+from gardener.bed import MAX_SIDE, BedGrid
+
+BULK_ACTIONS = ["Fill row", "Fill rectangle", "Flood fill", "Clear region"]
+
+
+def _grid(store, key):
+    return store.get(st.session_state[f"{key}_id"])
+
+
+# The session's bed, for sections outside the editor (None before it first runs)
+def current_grid(store, key="bed"):
+    bed_id = st.session_state.get(f"{key}_id")
+    return store.get(bed_id) if bed_id else None
+
+
+# Ends a callback: rerun only the named fragments instead of the default
+def _rerun(fragments):
+    if fragments:
+        st.rerun(list(fragments))
+
+
+# Load `grid` as the session's plan and rebuild the editor from it
+def _replace(store, key, grid):
+    store.put(st.session_state[f"{key}_id"], grid)
+    _rebase(store, key)
+
+
+# Snapshot the grid as the editor's base and clamp the size/range inputs to it
+def _rebase(store, key):
+    state = st.session_state
+    grid = _grid(store, key)
+    rows, cols = grid.shape
+    store.put(state[f"{key}_id"] + ".base", grid.copy())
+    state[f"{key}_epoch"] = state.get(f"{key}_epoch", -1) + 1
+    state[f"{key}_rows"], state[f"{key}_cols"] = rows, cols
+    # the range starts out as the whole bed: from 1, 1 to rows, cols
+    for name, default, limit in (("r0", 1, rows), ("r1", rows, rows), ("c0", 1, cols), ("c1", cols, cols)):
+        state[f"{key}_{name}"] = min(state.get(f"{key}_{name}", default), limit)
+
+
+def _on_edit(store, key, editor_key, rerun=()):
+    edits = st.session_state[editor_key]["edited_rows"]
+    _grid(store, key).apply(
+        (int(row), int(col) - 1, value or "") for row, cols in edits.items() for col, value in cols.items()
+    )
+    _rerun(rerun)
+
+
+def _on_resize(store, key, rerun=()):
+    state = st.session_state
+    _grid(store, key).resize(state[f"{key}_rows"], state[f"{key}_cols"])
+    _rebase(store, key)
+    _rerun(rerun)
+
+
+def _on_bulk(store, key, crop, rerun=()):
+    state = st.session_state
+    grid = _grid(store, key)
+    action = state[f"{key}_action"]
+    r0, c0 = state[f"{key}_r0"] - 1, state[f"{key}_c0"] - 1
+    r1, c1 = state[f"{key}_r1"] - 1, state[f"{key}_c1"] - 1
+    if action == "Fill row":
+        grid.fill_row(min(r0, grid.shape[0] - 1), crop)
+    elif action == "Fill rectangle":
+        grid.fill_rect(r0, c0, r1, c1, crop)
+    elif action == "Flood fill":
+        grid.flood_fill(min(r0, grid.shape[0] - 1), min(c0, grid.shape[1] - 1), crop)
+    else:
+        grid.clear_region(r0, c0, r1, c1)
+    _rebase(store, key)
+    _rerun(rerun)
+
+
+def _on_clear(store, key, rerun=()):
+    grid = _grid(store, key)
+    grid.clear_region(0, 0, grid.shape[0] - 1, grid.shape[1] - 1)
+    _rebase(store, key)
+    _rerun(rerun)
+
+
+def _on_share(store, key):
+    token = _grid(store, key).to_token()
+    st.session_state[f"{key}_plan"] = token
+    st.query_params["plan"] = token
+
+
+# Accepts a bare token or a shared link containing ?plan=
+def _on_paste(store, key, rerun=()):
+    state = st.session_state
+    text = state[f"{key}_paste"].strip()
+    match = re.search(r"[?&]plan=([\w-]+)", text)
+    try:
+        _replace(store, key, BedGrid.from_token(match.group(1) if match else text))
+        state[f"{key}_error"] = None
+    except ValueError as e:
+        state[f"{key}_error"] = str(e)
+    state[f"{key}_paste"] = ""
+    _rerun(rerun)
+
+
+# Chosen crops share the bed equally; their companion plants get half a share
+def _on_autofill(store, key, spacing, companions, rerun=()):
+    state = st.session_state
+    crops = state[f"{key}_mix"]
+    if not crops:
+        state[f"{key}_auto"] = "Pick at least one crop to auto-fill."
+        return
+    mix = {crop: 1.0 for crop in crops}
+    if state[f"{key}_with_companions"]:
+        for crop in crops:
+            for friend in companions.get(crop, []):
+                mix.setdefault(friend, 0.5)
+    grid, stats = solve(*_grid(store, key).shape, mix, spacing, companions)
+    _replace(store, key, grid)
+    state[f"{key}_auto"] = (f"Companion neighbours: {stats['initial_score']} in a random layout, "
+                            f"{stats['score']} after {stats['seconds']:.2f}s of optimizing.")
+    _rerun(rerun)
+
+
+def bed_editor(selected_crop, crop_names, store, key="bed", default_shape=(4, 6), spacing=None, companions=None,
+               rerun=()):
+    rerun = tuple(rerun)
+    state = st.session_state
+    if f"{key}_id" not in state:
+        state[f"{key}_id"] = uuid.uuid4().hex
+    if _grid(store, key) is None:
+        _replace(store, key, BedGrid(*default_shape))
+
+    # A shared link opens that plan once per session
+    shared = st.query_params.get("plan")
+    if shared and state.get(f"{key}_plan") != shared:
+        state[f"{key}_plan"] = shared
+        try:
+            _replace(store, key, BedGrid.from_token(shared))
+        except ValueError as e:
+            state[f"{key}_error"] = str(e)
+
+    grid = _grid(store, key)
+    base = store.get(state[f"{key}_id"] + ".base")
+    if base is None:  # evicted and cleaned up while the session slept
+        _rebase(store, key)
+        base = store.get(state[f"{key}_id"] + ".base")
+    rows, cols = grid.shape
+
+    size_rows, size_cols = st.columns(2)
+    size_rows.number_input("Bed rows (1 ft squares)", 1, MAX_SIDE, key=f"{key}_rows",
+                           on_change=_on_resize, args=(store, key, rerun))
+    size_cols.number_input("Bed columns (1 ft squares)", 1, MAX_SIDE, key=f"{key}_cols",
+                           on_change=_on_resize, args=(store, key, rerun))
+
+    with st.expander("🧰 Bulk edit"):
+        st.radio("Action", BULK_ACTIONS, horizontal=True, key=f"{key}_action")
+        a, b, c, d = st.columns(4)
+        a.number_input("From row", 1, rows, key=f"{key}_r0")
+        b.number_input("From column", 1, cols, key=f"{key}_c0")
+        c.number_input("To row", 1, rows, key=f"{key}_r1")
+        d.number_input("To column", 1, cols, key=f"{key}_c1")
+        st.caption(f"Fills use the selected crop ({selected_crop}); flood fill starts at the 'From' square.")
+        st.button("Apply", key=f"{key}_apply", on_click=_on_bulk, args=(store, key, selected_crop, rerun))
+
+    if spacing is not None and companions is not None:
+        with st.expander("🪄 Auto-fill bed"):
+            st.multiselect("Crops to grow", crop_names, key=f"{key}_mix")
+            st.checkbox("Also plant their companions", value=True, key=f"{key}_with_companions")
+            st.caption("Plants get square footprints from their spacing and are arranged so companions end up side by side. "
+                       "This replaces the current layout.")
+            st.button("Auto-fill", key=f"{key}_autofill", on_click=_on_autofill, args=(store, key, spacing, companions, rerun))
+            if state.get(f"{key}_auto"):
+                st.caption(state[f"{key}_auto"])
+
+    # The editor shows the base snapshot plus its own edits, which already match
+    # the grid; its data (and so its identity) only changes on a rebase
+    frame = base.to_frame().replace("", None)
+    frame.columns = [str(j + 1) for j in range(base.shape[1])]
+    frame.index = range(1, base.shape[0] + 1)
+    editor_key = f"{key}_editor_{state[f'{key}_epoch']}"
+    options = list(crop_names) + sorted(set(base.names[1:]) - set(crop_names))  # e.g. auto-filled companions
+    column = st.column_config.SelectboxColumn(options=options, required=False, width="small")
+    st.data_editor(frame, key=editor_key, column_config={name: column for name in frame.columns},
+                   on_change=_on_edit, args=(store, key, editor_key, rerun))
+
+    clear, share, save = st.columns(3)
+    clear.button("🧹 Clear Layout", key=f"{key}_clear", on_click=_on_clear, args=(store, key, rerun))
+    share.button("🔗 Share plan", key=f"{key}_share", on_click=_on_share, args=(store, key),
+                 help="Puts the plan in the page address; copy the link from your browser")
+    save.download_button("💾 Save plan", data=grid.copy().to_token, file_name="garden_plan.txt",
+                         mime="text/plain", key=f"{key}_save", on_click="ignore")
+    st.text_input("Open a saved plan or shared link", key=f"{key}_paste", on_change=_on_paste, args=(store, key, rerun))
+    if state.get(f"{key}_error"):
+        st.warning(f"⚠️ {state[f'{key}_error']}")
+    st.caption(f"📦 This plan takes {grid.nbytes() + base.nbytes():,} bytes on the server.")
+    return grid
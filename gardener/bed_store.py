@@ -0,0 +1,95 @@
+# Process-wide home for every session's bed grids, so session state only holds
+# an id. Grids untouched for `idle_seconds` are written to disk as plan tokens
+# and dropped from memory; the next access loads them back transparently.
+# Parked grids nobody came back for are deleted after `disk_ttl`.
+
+import os
+import re
+import threading
+import time
+
+from gardener import metrics
+from gardener.bed import BedGrid
+from gardener.config import cache_path
+
+
+class BedStore:
+    """Meant to be shared via st.cache_resource."""
+
+    def __init__(self, directory=None, idle_seconds=15 * 60, sweep_every=60, disk_ttl=7 * 24 * 3600,
+                 clock=time.time):
+        self.directory = directory or cache_path("beds")
+        os.makedirs(self.directory, exist_ok=True)
+        self.idle_seconds = idle_seconds
+        self.sweep_every = sweep_every
+        self.disk_ttl = disk_ttl
+        self.clock = clock
+        self.evictions = 0
+        self.reloads = 0
+        self._grids = {}  # id -> (grid, last access)
+        self._lock = threading.RLock()
+        self._last_sweep = clock()
+
+    def _path(self, grid_id):
+        return os.path.join(self.directory, re.sub(r"[^\w.-]", "_", grid_id) + ".plan")
+
+    def get(self, grid_id):
+        self.maybe_sweep()
+        with self._lock:
+            entry = self._grids.get(grid_id)
+            if entry is None:
+                path = self._path(grid_id)
+                if not os.path.exists(path):
+                    metrics.count("cache.beds", result="missing")
+                    return None
+                with open(path, encoding="ascii") as f:
+                    entry = (BedGrid.from_token(f.read()), 0)
+                os.remove(path)
+                self.reloads += 1
+                metrics.count("cache.beds", result="disk")
+            else:
+                metrics.count("cache.beds", result="memory")
+            self._grids[grid_id] = (entry[0], self.clock())
+            return entry[0]
+
+    def put(self, grid_id, grid):
+        with self._lock:
+            self._grids[grid_id] = (grid, self.clock())
+
+    def discard(self, grid_id):
+        with self._lock:
+            self._grids.pop(grid_id, None)
+            if os.path.exists(self._path(grid_id)):
+                os.remove(self._path(grid_id))
+
+    def maybe_sweep(self):
+        if self.clock() - self._last_sweep >= self.sweep_every:
+            self.sweep()
+
+    # Write idle grids out and forget them; drop long-abandoned ones from disk
+    def sweep(self):
+        with self._lock:
+            now = self._last_sweep = self.clock()
+            idle = [k for k, (_, seen) in self._grids.items() if now - seen >= self.idle_seconds]
+            for grid_id in idle:
+                grid, _ = self._grids.pop(grid_id)
+                path = self._path(grid_id)
+                with open(path + ".part", "w", encoding="ascii") as f:
+                    f.write(grid.to_token())
+                os.replace(path + ".part", path)
+                self.evictions += 1
+            for name in os.listdir(self.directory):
+                path = os.path.join(self.directory, name)
+                if name.endswith(".plan") and now - os.path.getmtime(path) >= self.disk_ttl:
+                    os.remove(path)
+            return len(idle)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "in_memory": len(self._grids),
+                "bytes": sum(g.nbytes() for g, _ in self._grids.values()),
+                "on_disk": sum(1 for name in os.listdir(self.directory) if name.endswith(".plan")),
+                "evictions": self.evictions,
+                "reloads": self.reloads,
+            }
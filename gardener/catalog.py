@@ -0,0 +1,103 @@
+# Variety catalog: the nested {crop group: {season: [variety, ...]}} guides are
+# flattened once into slotted records with hash indexes, so name lookups and
+# level/organic/crop/season filters don't rescan the nesting on every rerun.
+
+
+class Variety:
+    __slots__ = ("id", "name", "crop", "season", "level", "organic", "link", "image", "tasks", "recurring",
+                 "days_to_harvest", "harvest_weeks")
+
+    # days_to_harvest: from sowing or setting out to first harvest (0 if unknown);
+    # harvest_weeks: how long picking lasts
+    def __init__(self, id, name, crop, season, level, organic, link="", image="", tasks=(), recurring=(),
+                 days_to_harvest=0, harvest_weeks=0):
+        self.id = id
+        self.name = name
+        self.crop = crop
+        self.season = season
+        self.level = level
+        self.organic = organic
+        self.link = link
+        self.image = image
+        self.tasks = tasks
+        self.recurring = recurring
+        self.days_to_harvest = days_to_harvest
+        self.harvest_weeks = harvest_weeks
+
+    def __repr__(self):
+        return f"Variety({self.name!r}, crop={self.crop!r}, season={self.season!r})"
+
+
+class VarietyCatalog:
+    def __init__(self, varieties):
+        self.varieties = tuple(varieties)
+        self.by_name = {}
+        self._index = {"crop": {}, "season": {}, "level": {}, "organic": {}}
+        self._seasons = {}
+        for v in self.varieties:
+            self.by_name.setdefault(v.name, v)
+            for field, index in self._index.items():
+                index.setdefault(getattr(v, field), set()).add(v.id)
+            seasons = self._seasons.setdefault(v.crop, [])
+            if v.season not in seasons:
+                seasons.append(v.season)
+        self._index = {field: {key: frozenset(ids) for key, ids in index.items()}
+                       for field, index in self._index.items()}
+        self._all = frozenset(v.id for v in self.varieties)
+        self._filtered = {}
+
+    @classmethod
+    def from_guide(cls, guide):
+        varieties = []
+        for crop, seasons in guide.items():
+            for season, entries in seasons.items():
+                for v in entries:
+                    varieties.append(Variety(
+                        id=len(varieties),
+                        name=v["name"],
+                        crop=crop,
+                        season=season,
+                        level=v.get("level", ""),
+                        organic=bool(v.get("organic")),
+                        link=v.get("link", ""),
+                        image=v.get("image", ""),
+                        tasks=tuple(v.get("tasks", ())),
+                        recurring=tuple(v.get("recurring", ())),
+                        days_to_harvest=int(v.get("days_to_harvest") or 0),
+                        harvest_weeks=int(v.get("harvest_weeks") or 0),
+                    ))
+        return cls(varieties)
+
+    def __iter__(self):
+        return iter(self.varieties)
+
+    def __len__(self):
+        return len(self.varieties)
+
+    def __contains__(self, name):
+        return name in self.by_name
+
+    def get(self, name):
+        return self.by_name.get(name)
+
+    def names(self):
+        return [v.name for v in self.varieties]
+
+    def crops(self):
+        return list(self._seasons)
+
+    def seasons(self, crop):
+        return list(self._seasons.get(crop, ()))
+
+    # None means "don't filter on this field"; results keep catalog order and are memoized
+    def filter(self, crop=None, season=None, level=None, organic=None):
+        key = (crop, season, level, organic)
+        hit = self._filtered.get(key)
+        if hit is None:
+            ids = self._all
+            for field, value in zip(("crop", "season", "level", "organic"), key):
+                if value is not None:
+                    ids = ids & self._index[field].get(value, frozenset())
+            hit = tuple(self.varieties[i] for i in sorted(ids))
+            self._filtered[key] = hit
+        return list(hit)
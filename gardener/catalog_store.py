@@ -0,0 +1,342 @@
+# Variety catalogs on disk: one SQLite file holds every named catalog (the
+# Texas guide behind the agent page, the small demo behind app.py) with the
+# same fields for each variety, including its spacing, container size,
+# companions and days to harvest, so the pages no longer carry their own
+# diverging literals. Stores from before the harvest columns (schema 1) read
+# them as 0 and gain them on the next write.
+#
+# Catalogs are loaded and validated once per server process by a shared
+# CatalogStore. It re-checks the file's mtime every `check_every` seconds and
+# reloads a catalog whose contents changed, so edits go live without a
+# restart. A reload that fails validation keeps serving the last good
+# catalog. Each load carries a content version for use in cache keys.
+#
+#   python -m gardener.catalog_store check
+#   python -m gardener.catalog_store export --catalog texas --out texas.csv
+#   python -m gardener.catalog_store import supplier.csv --catalog texas
+
+import argparse
+import csv
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import sys
+import threading
+import time
+from collections import namedtuple
+from urllib.parse import quote
+
+from gardener import metrics
+from gardener.catalog import Variety, VarietyCatalog
+from gardener.config import DATA_DIR
+from gardener.ical import parse_recurrence
+
+logger = logging.getLogger(__name__)
+
+CATALOG_DB = os.path.join(DATA_DIR, "catalog.sqlite")
+SCHEMA_VERSION = 2
+DEFAULT_CATALOG = "texas"
+LEVELS = ("Beginner", "Intermediate", "Advanced")
+
+# One column per Variety field plus the per-variety guides; list fields are JSON arrays
+FIELDS = ("name", "crop", "season", "level", "organic", "link", "image", "tasks", "recurring",
+          "spacing", "container", "companions", "days_to_harvest", "harvest_weeks")
+_LIST_FIELDS = ("tasks", "recurring", "companions")
+_INT_FIELDS = ("days_to_harvest", "harvest_weeks")
+# Columns added after version 1, with their definitions for the upgrade
+_ADDED = {"days_to_harvest": "INTEGER NOT NULL DEFAULT 0", "harvest_weeks": "INTEGER NOT NULL DEFAULT 0"}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS varieties (
+    catalog TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    name TEXT NOT NULL,
+    crop TEXT NOT NULL,
+    season TEXT NOT NULL,
+    level TEXT NOT NULL,
+    organic INTEGER NOT NULL DEFAULT 0,
+    link TEXT NOT NULL DEFAULT '',
+    image TEXT NOT NULL DEFAULT '',
+    tasks TEXT NOT NULL DEFAULT '[]',
+    recurring TEXT NOT NULL DEFAULT '[]',
+    spacing TEXT NOT NULL DEFAULT '',
+    container TEXT NOT NULL DEFAULT '',
+    companions TEXT NOT NULL DEFAULT '[]',
+    days_to_harvest INTEGER NOT NULL DEFAULT 0,
+    harvest_weeks INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (catalog, name)
+)
+"""
+
+# spacing/containers: {name: text} for varieties that have one; companions: {name: [names]}
+CatalogData = namedtuple("CatalogData", "name catalog spacing companions containers version")
+
+
+class CatalogError(ValueError):
+    pass
+
+
+# Problems with one variety record (a dict of FIELDS, lists already decoded)
+def _problems(record):
+    problems = []
+    for field in ("name", "crop", "season"):
+        if not str(record.get(field) or "").strip():
+            problems.append(f"missing {field}")
+    if record.get("level") not in LEVELS:
+        problems.append(f"level {record.get('level')!r} is not one of {', '.join(LEVELS)}")
+    for field in _LIST_FIELDS:
+        value = record.get(field)
+        if not isinstance(value, list) or not all(isinstance(x, str) and x.strip() for x in value):
+            problems.append(f"{field} must be a list of non-empty strings")
+    for rule in record.get("recurring") or ():
+        if isinstance(rule, str) and parse_recurrence(rule) is None:
+            problems.append(f"recurring rule {rule!r} has no 'every N days/weeks/months'")
+    for field in _INT_FIELDS:
+        if not isinstance(record.get(field), int) or record[field] < 0:
+            problems.append(f"{field} must be a whole number of days/weeks, got {record.get(field)!r}")
+    for field in ("link", "image"):
+        url = record.get(field) or ""
+        if url and not url.startswith(("http://", "https://")):
+            problems.append(f"{field} {url!r} is not an http(s) URL")
+    return problems
+
+
+def validate(records, catalog=""):
+    errors, seen = [], set()
+    for i, record in enumerate(records):
+        label = f"{catalog}[{i}] {record.get('name')!r}"
+        errors += [f"{label}: {p}" for p in _problems(record)]
+        if record.get("name") in seen:
+            errors.append(f"{label}: duplicate name")
+        seen.add(record.get("name"))
+    if errors:
+        more = f" (and {len(errors) - 10} more)" if len(errors) > 10 else ""
+        raise CatalogError(f"invalid catalog: {'; '.join(errors[:10])}{more}")
+
+
+def _connect(path, readonly=True):
+    if readonly:
+        if not os.path.exists(path):
+            raise CatalogError(f"{path}: no catalog store")
+        return sqlite3.connect(f"file:{quote(os.path.abspath(path))}?mode=ro", uri=True, timeout=5)
+    db = sqlite3.connect(path, timeout=5)
+    db.execute(_SCHEMA)
+    present = {row[1] for row in db.execute("PRAGMA table_info(varieties)")}
+    for column, definition in _ADDED.items():
+        if column not in present:
+            db.execute(f"ALTER TABLE varieties ADD COLUMN {column} {definition}")
+    db.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+    return db
+
+
+def _records(db, catalog):
+    (version,) = db.execute("PRAGMA user_version").fetchone()
+    if not 1 <= version <= SCHEMA_VERSION:
+        raise CatalogError(f"catalog store schema {version}, expected {SCHEMA_VERSION} or older")
+    # Older stores lack the later columns; read them as their defaults
+    present = {row[1] for row in db.execute("PRAGMA table_info(varieties)")}
+    columns = [f if f in present else "0" for f in FIELDS]
+    rows = db.execute(f"SELECT {', '.join(columns)} FROM varieties WHERE catalog = ? ORDER BY position",
+                      (catalog,)).fetchall()
+    records = []
+    for row in rows:
+        record = dict(zip(FIELDS, row))
+        record["organic"] = bool(record["organic"])
+        for field in _LIST_FIELDS:
+            try:
+                record[field] = json.loads(record[field])
+            except ValueError:
+                record[field] = None  # reported by validate()
+        records.append(record)
+    return records
+
+
+def catalogs(path=CATALOG_DB):
+    db = _connect(path)
+    try:
+        return [name for (name,) in db.execute("SELECT DISTINCT catalog FROM varieties ORDER BY catalog")]
+    finally:
+        db.close()
+
+
+def read_records(path, catalog):
+    db = _connect(path)
+    try:
+        return _records(db, catalog)
+    finally:
+        db.close()
+
+
+# Validated, indexed catalog plus its guides; raises CatalogError
+def load(path=CATALOG_DB, catalog=DEFAULT_CATALOG):
+    with metrics.span("catalog.load", catalog=catalog):
+        try:
+            records = read_records(path, catalog)
+        except sqlite3.Error as exc:
+            raise CatalogError(f"{path}: {exc}") from None
+        if not records:
+            raise CatalogError(f"{path}: no varieties in catalog {catalog!r}")
+        validate(records, catalog)
+        digest = hashlib.sha256(json.dumps(records, sort_keys=True).encode("utf-8")).hexdigest()
+        varieties = [Variety(id=i, name=r["name"], crop=r["crop"], season=r["season"], level=r["level"],
+                             organic=r["organic"], link=r["link"], image=r["image"],
+                             tasks=tuple(r["tasks"]), recurring=tuple(r["recurring"]),
+                             days_to_harvest=r["days_to_harvest"], harvest_weeks=r["harvest_weeks"])
+                     for i, r in enumerate(records)]
+        return CatalogData(
+            name=catalog,
+            catalog=VarietyCatalog(varieties),
+            spacing={r["name"]: r["spacing"] for r in records if r["spacing"]},
+            companions={r["name"]: r["companions"] for r in records if r["companions"]},
+            containers={r["name"]: r["container"] for r in records if r["container"]},
+            version=digest[:16],
+        )
+
+
+# Replace (or with replace=False, upsert into) one catalog in a single transaction
+def write(path, catalog, records, replace=True):
+    records = [{**{f: "" for f in FIELDS}, **{f: [] for f in _LIST_FIELDS}, **{f: 0 for f in _INT_FIELDS}, **r}
+               for r in records]
+    db = _connect(path, readonly=False)
+    try:
+        with db:
+            existing = [] if replace else _records(db, catalog)
+            merged = {r["name"]: r for r in existing}
+            merged.update((r["name"], r) for r in records)
+            merged = list(merged.values())
+            validate(merged, catalog)
+            db.execute("DELETE FROM varieties WHERE catalog = ?", (catalog,))
+            db.executemany(
+                f"INSERT INTO varieties (catalog, position, {', '.join(FIELDS)}) VALUES ({', '.join('?' * (len(FIELDS) + 2))})",
+                [(catalog, i, *(json.dumps(r[f], ensure_ascii=False) if f in _LIST_FIELDS else
+                                int(bool(r[f])) if f == "organic" else r[f] for f in FIELDS))
+                 for i, r in enumerate(merged)])
+        return len(merged)
+    finally:
+        db.close()
+
+
+# Records from the nested {crop: {season: [variety dict]}} guide shape
+def records_from_guide(guide, spacing=None, companions=None, containers=None):
+    spacing, companions, containers = spacing or {}, companions or {}, containers or {}
+    return [{**{f: v.get(f, "") for f in FIELDS if f in v}, "crop": crop, "season": season,
+             "organic": bool(v.get("organic")), "tasks": list(v.get("tasks", ())),
+             "recurring": list(v.get("recurring", ())), "spacing": spacing.get(v["name"], ""),
+             "container": containers.get(v["name"], ""), "companions": list(companions.get(v["name"], ())),
+             "days_to_harvest": int(v.get("days_to_harvest") or 0), "harvest_weeks": int(v.get("harvest_weeks") or 0)}
+            for crop, seasons in guide.items() for season, entries in seasons.items() for v in entries]
+
+
+def _stamp(path):
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return st.st_mtime_ns, st.st_size
+
+
+class CatalogStore:
+    """Loaded catalogs for the whole process; meant to be shared via st.cache_resource."""
+
+    def __init__(self, path=None, check_every=2.0, clock=time.monotonic):
+        self.path = path or os.environ.get("GARDENER_CATALOG") or CATALOG_DB
+        self.check_every = check_every
+        self.clock = clock
+        self.reloads = 0
+        self.error = None
+        self._loaded = {}  # name -> CatalogData
+        self._stale = set()
+        self._stamp = _stamp(self.path)
+        self._checked = clock()
+        self._lock = threading.Lock()
+
+    # Current CatalogData for `catalog`; the first load raises CatalogError if
+    # the catalog is missing or invalid, later failed reloads keep the old one
+    def get(self, catalog=DEFAULT_CATALOG):
+        with self._lock:
+            if self.clock() - self._checked >= self.check_every:
+                self._checked = self.clock()
+                stamp = _stamp(self.path)
+                if stamp != self._stamp:
+                    self._stamp = stamp
+                    self._stale = set(self._loaded)
+            data = self._loaded.get(catalog)
+            if data is not None and catalog not in self._stale:
+                return data
+            self._stale.discard(catalog)
+            try:
+                fresh = load(self.path, catalog)
+            except CatalogError as exc:
+                if data is None:
+                    raise
+                self.error = str(exc)
+                logger.warning("catalog %s not reloaded, keeping version %s: %s", catalog, data.version, exc)
+                return data
+            self.error = None
+            if data is None or fresh.version != data.version:
+                if data is not None:
+                    self.reloads += 1
+                    metrics.count("catalog.reloads", catalog=catalog)
+                    logger.info("catalog %s reloaded: version %s -> %s", catalog, data.version, fresh.version)
+                self._loaded[catalog] = data = fresh
+            return data
+
+    def stats(self):
+        with self._lock:
+            return {"path": self.path, "reloads": self.reloads, "error": self.error,
+                    "catalogs": {name: {"varieties": len(d.catalog), "version": d.version}
+                                 for name, d in self._loaded.items()}}
+
+
+def _csv_record(row):
+    record = {f: (row.get(f) or "").strip() for f in FIELDS}
+    record["organic"] = record["organic"].lower() in ("1", "true", "yes", "y")
+    for field in _LIST_FIELDS:
+        record[field] = [x.strip() for x in record[field].split("|") if x.strip()]
+    for field in _INT_FIELDS:
+        record[field] = int(record[field]) if record[field].isdigit() else record[field] or 0
+    return record
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m gardener.catalog_store", description="Variety catalog store")
+    parser.add_argument("--db", default=CATALOG_DB)
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("check", help="validate every catalog in the store")
+    export_cmd = commands.add_parser("export", help="write a catalog as CSV (list fields joined with '|')")
+    export_cmd.add_argument("--catalog", default=DEFAULT_CATALOG)
+    export_cmd.add_argument("--out")
+    import_cmd = commands.add_parser("import", help="add or update varieties from a CSV with the export's columns")
+    import_cmd.add_argument("source")
+    import_cmd.add_argument("--catalog", default=DEFAULT_CATALOG)
+    import_cmd.add_argument("--replace", action="store_true", help="drop varieties missing from the CSV")
+    args = parser.parse_args(argv)
+
+    try:
+        if args.command == "check":
+            for name in catalogs(args.db):
+                data = load(args.db, name)
+                print(f"{name}: {len(data.catalog)} varieties, version {data.version}")
+        elif args.command == "export":
+            out = open(args.out, "w", newline="", encoding="utf-8") if args.out else sys.stdout
+            try:
+                writer = csv.writer(out)
+                writer.writerow(FIELDS)
+                for r in read_records(args.db, args.catalog):
+                    writer.writerow(["|".join(r[f]) if f in _LIST_FIELDS else r[f] for f in FIELDS])
+            finally:
+                if args.out:
+                    out.close()
+        else:
+            with open(args.source, newline="", encoding="utf-8") as f:
+                records = [_csv_record(row) for row in csv.DictReader(f)]
+            n = write(args.db, args.catalog, records, replace=args.replace)
+            print(f"{args.catalog}: {n} varieties")
+    except CatalogError as exc:
+        sys.exit(f"error: {exc}")
+
+
+if __name__ == "__main__":
+    main()
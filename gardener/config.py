@@ -0,0 +1,12 @@
+# Shared settings for the planning core
+
+import os
+
+# On-disk caches (frost dates, rendered assets, ...) live here unless overridden
+CACHE_DIR = os.environ.get("GARDENER_CACHE_DIR", os.path.join(os.path.expanduser("~"), ".cache", "gardener"))
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
+
+
+def cache_path(name):
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    return os.path.join(CACHE_DIR, name)
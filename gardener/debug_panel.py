@@ -0,0 +1,65 @@
+# Sidebar debug panel shared by both pages, shown only with ?debug=1 in the
+# page URL: switches metrics collection on or off for the server process and
+# shows the last run's section and span timings, the latest rerun of each
+# section that reruns on its own, the run's counters (HTTP calls, cache hits
+# and misses, artifact sizes) and the shared services' stats.
+#
+# Since it changes server-wide settings, the server has to allow it first:
+# GARDENER_DEBUG=1 in the environment or `debug_panel = true` in st.secrets.
+
+import json
+import os
+
+import streamlit as st
+
+from gardener import metrics
+
+
+def _counter_rows(run):
+    return [{"counter": name, **dict(labels), "value": value} for (name, labels), value in sorted(run.counters.items())]
+
+
+def _value_rows(run):
+    return [{"value": name, **labels, "amount": value} for name, labels, value in run.values]
+
+
+def debug_allowed():
+    try:
+        allowed = st.secrets.get("debug_panel")
+    except Exception:
+        allowed = None
+    return bool(allowed) or os.environ.get("GARDENER_DEBUG", "").strip().lower() in ("1", "true", "on")
+
+
+def debug_panel(run, services=None):
+    if st.query_params.get("debug") != "1" or not debug_allowed():
+        return
+    with st.sidebar.expander("🛠️ Debug: rerun timings", expanded=True):
+        on = st.toggle("Collect metrics", value=metrics.enabled(), key="metrics_enabled",
+                       help="Server-wide; takes effect from the next rerun")
+        if on != metrics.enabled():
+            metrics.configure(on)
+        if run is None:
+            st.caption("Metrics are off. Turn them on and rerun to see a breakdown.")
+        else:
+            st.markdown(f"**Last rerun:** {run.seconds * 1000:.0f} ms")
+            st.dataframe(run.breakdown(), hide_index=True)
+            sections = metrics.fragment_runs(run.page)
+            if sections:
+                st.markdown("**Last section-only reruns**")
+                st.dataframe([{"section": name, "ms": round(r.seconds * 1000, 2), "spans": len(r.spans)}
+                              for name, r in sorted(sections.items())], hide_index=True)
+            if run.counters:
+                st.markdown("**Counters**")
+                st.dataframe(_counter_rows(run), hide_index=True)
+            if run.values:
+                st.markdown("**Artifacts built**")
+                st.dataframe(_value_rows(run), hide_index=True)
+        if services:
+            st.markdown("**Shared services**")
+            st.json({name: service.stats() for name, service in services.items()}, expanded=False)
+        st.button("🧹 Reset metrics", on_click=metrics.reset, help="Clears the server-wide spans, counters and last runs")
+        st.download_button("📥 Metrics (JSON)", data=lambda: json.dumps(metrics.snapshot(), indent=2),
+                           file_name="gardener_metrics.json", mime="application/json", on_click="ignore")
+        st.download_button("📥 Metrics (Prometheus)", data=metrics.prometheus_text,
+                           file_name="gardener_metrics.prom", mime="text/plain", on_click="ignore")
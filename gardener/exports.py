@@ -0,0 +1,82 @@
+# Export artifacts (PDF, iCal, CSV, PNG) are built only when a download is
+# actually requested and memoized by a hash of their inputs, in a bounded LRU
+# shared by every session of the server process.
+
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+
+from gardener import metrics
+
+
+# Stable content hash of an artifact kind plus the inputs that determine its bytes
+def artifact_key(kind, inputs):
+    payload = json.dumps([kind, inputs], sort_keys=True, default=str, separators=(",", ":"))
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class ArtifactCache:
+    def __init__(self, max_bytes=64 * 1024 * 1024, max_items=512):
+        self.max_bytes = max_bytes
+        self.max_items = max_items
+        self.hits = 0
+        self.misses = 0
+        self._items = OrderedDict()
+        self._size = 0
+        self._building = {}
+        self._lock = threading.Lock()
+
+    def get_or_build(self, kind, inputs, build):
+        return self._get_or_build(artifact_key(kind, inputs), build, kind)
+
+    # Zero-argument callable for st.download_button(data=...): runs only on click.
+    # The key is taken now, so later changes to `inputs` can't alias another artifact.
+    def lazy(self, kind, inputs, build):
+        key = artifact_key(kind, inputs)
+        return lambda: self._get_or_build(key, build, kind)
+
+    def _get_or_build(self, key, build, kind=None):
+        with self._lock:
+            if key in self._items:
+                self._items.move_to_end(key)
+                self.hits += 1
+                metrics.count("cache.artifacts", result="hit", kind=kind)
+                return self._items[key]
+            pending = self._building.get(key)
+            if pending is None:
+                self._building[key] = threading.Event()
+                self.misses += 1
+        # Someone else is building the same artifact: wait for theirs
+        if pending is not None:
+            metrics.count("cache.artifacts", result="wait", kind=kind)
+            pending.wait()
+            return self._get_or_build(key, build, kind)
+
+        metrics.count("cache.artifacts", result="miss", kind=kind)
+        try:
+            with metrics.span("artifact.build", kind=kind):
+                data = build()
+            if isinstance(data, str):
+                data = data.encode("utf-8")
+            data = bytes(data)
+            metrics.observe("artifact.bytes", len(data), kind=kind)
+            self._put(key, data)
+            return data
+        finally:
+            with self._lock:
+                self._building.pop(key).set()
+
+    def _put(self, key, data):
+        with self._lock:
+            if len(data) > self.max_bytes:
+                return
+            self._items[key] = data
+            self._size += len(data)
+            while self._size > self.max_bytes or len(self._items) > self.max_items:
+                _, evicted = self._items.popitem(last=False)
+                self._size -= len(evicted)
+
+    def stats(self):
+        with self._lock:
+            return {"items": len(self._items), "bytes": self._size, "hits": self.hits, "misses": self.misses}
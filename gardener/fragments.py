@@ -0,0 +1,34 @@
+# Page sections that rerun on their own (st.fragment): a widget inside one
+# reruns just that section, and the bed editor's callbacks rerun only the
+# sections that show the bed (st.rerun with their keys). Everything else keeps
+# what it drew last, so a bed click costs the bed section, not the page.
+#
+# A fragment rerun gets the arguments of the last full run, so inputs that
+# feed several sections (filters, ZIP, start date) stay outside fragments
+# and rerun the page.
+#
+# During a full run a fragment is just the next page section for metrics;
+# when it reruns alone it is timed as its own run, "<page>/<section>".
+
+import functools
+
+import streamlit as st
+
+from gardener import metrics
+
+
+def fragment(page, name):
+    def wrap(fn):
+        @st.fragment(key=name)
+        @functools.wraps(fn)
+        def inner(*args, **kwargs):
+            if metrics.current_run() is not None:
+                metrics.section(name)
+                return fn(*args, **kwargs)
+            metrics.begin_run(f"{page}/{name}")
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                metrics.end_run()
+        return inner
+    return wrap
@@ -0,0 +1,138 @@
+# Frost-date service: offline climatology first, then a TTL cache persisted to
+# SQLite, then a single background WeatherAPI request per ZIP no matter how many
+# sessions ask. Expired entries are served stale while they revalidate. While a
+# ZIP has no answer of its own, the climatology index's ZIP3/nearest-prefix
+# estimate stands in for the Texas default.
+
+import csv
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError
+from datetime import datetime
+
+from gardener import metrics
+from gardener.config import DATA_DIR, cache_path
+
+CLIMATOLOGY_CSV = os.path.join(DATA_DIR, "frost_climatology.csv")
+
+
+# March 15 typical in TX
+def default_last_frost():
+    return datetime(datetime.today().year, 3, 15)
+
+
+# Median last spring frost (MM-DD) by ZIP, bundled with the package
+def load_climatology(path=CLIMATOLOGY_CSV):
+    table = {}
+    with open(path, newline="") as f:
+        for row in csv.DictReader(f):
+            month, day = row["last_frost"].split("-")
+            table[row["zip"].strip()] = (int(month), int(day))
+    return table
+
+
+class FrostDateService:
+    """Process-wide frost-date lookups; meant to be shared via st.cache_resource."""
+
+    def __init__(self, fetch, db_path=None, ttl=12 * 3600, failure_ttl=300, climatology=None,
+                 clock=time.time, max_workers=4):
+        self.fetch = fetch
+        self.ttl = ttl
+        self.failure_ttl = failure_ttl
+        if climatology is None:
+            from gardener.zipindex import zip_index
+
+            climatology = zip_index()
+        self.climatology = climatology
+        self.clock = clock
+        self._memory = {}
+        self._inflight = {}
+        self._lock = threading.RLock()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="frost")
+        self._db = sqlite3.connect(db_path or cache_path("frost.sqlite"), check_same_thread=False)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS frost_cache (zip TEXT PRIMARY KEY, frost TEXT, expires REAL)"
+        )
+        self._db.commit()
+
+    # Never blocks longer than `wait` seconds: a fresh value is returned as is, a
+    # stale one is returned while a refresh runs, and an unknown ZIP falls back to
+    # a nearby climatology estimate (or the default date) until its first fetch lands.
+    def last_frost(self, zip_code, wait=0.0):
+        zip_code = (zip_code or "").strip()
+        hit = self.climatology.get(zip_code)
+        if hit:
+            metrics.count("cache.frost", result="climatology")
+            month, day = hit
+            return datetime(datetime.today().year, month, day)
+
+        hit = self._cached(zip_code)
+        if hit and hit[1] > self.clock():
+            metrics.count("cache.frost", result="fresh")
+            return hit[0]
+
+        metrics.count("cache.frost", result="stale" if hit else "miss")
+        future = self.refresh(zip_code)
+        if hit:
+            return hit[0]
+        try:
+            return future.result(timeout=wait)
+        except TimeoutError:
+            return self.estimate(zip_code)
+
+    # Nearby climatology (same ZIP3 or nearest prefix) or the default date
+    def estimate(self, zip_code):
+        nearby = getattr(self.climatology, "frost_estimate", None)
+        hit = nearby(zip_code) if nearby else None
+        return datetime(datetime.today().year, *hit) if hit else default_last_frost()
+
+    # Schedule a background fetch, reusing the one already running for this ZIP
+    def refresh(self, zip_code):
+        with self._lock:
+            future = self._inflight.get(zip_code)
+            if future is None:
+                future = self._executor.submit(self._refresh, zip_code)
+                self._inflight[zip_code] = future
+                future.add_done_callback(lambda _: self._forget(zip_code))
+            return future
+
+    def _forget(self, zip_code):
+        with self._lock:
+            self._inflight.pop(zip_code, None)
+
+    def _cached(self, zip_code):
+        with self._lock:
+            hit = self._memory.get(zip_code)
+            if hit is None:
+                row = self._db.execute(
+                    "SELECT frost, expires FROM frost_cache WHERE zip = ?", (zip_code,)
+                ).fetchone()
+                if row:
+                    hit = (datetime.fromisoformat(row[0]), row[1])
+                    self._memory[zip_code] = hit
+        return hit
+
+    def _refresh(self, zip_code):
+        try:
+            frost = self.fetch(zip_code)
+        except Exception:
+            frost = None
+        # Failures are cached briefly too, so a dead API isn't hit on every rerun
+        if frost is None:
+            stale = self._cached(zip_code)
+            frost, ttl = (stale[0] if stale else self.estimate(zip_code)), self.failure_ttl
+        else:
+            ttl = self.ttl
+        self._store(zip_code, frost, self.clock() + ttl)
+        return frost
+
+    def _store(self, zip_code, frost, expires):
+        with self._lock:
+            self._memory[zip_code] = (frost, expires)
+            self._db.execute(
+                "INSERT OR REPLACE INTO frost_cache (zip, frost, expires) VALUES (?, ?, ?)",
+                (zip_code, frost.isoformat(), expires),
+            )
+            self._db.commit()
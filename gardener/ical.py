@@ -0,0 +1,91 @@
+# iCal engine: recurring care rules ("Water every 3 days", "Harvest every 2–3
+# days", "Fertilize every 2 weeks") are parsed once into structured intervals and
+# emitted as a single VEVENT with a native RRULE, and the calendar is produced as
+# a stream of text chunks instead of one big in-memory object.
+
+import hashlib
+import re
+from collections import namedtuple
+from datetime import datetime, timezone
+from functools import lru_cache
+
+PRODID = "-//Beginner Gardener AI//Task Calendar//EN"
+
+FREQUENCIES = {"day": "DAILY", "week": "WEEKLY", "month": "MONTHLY"}
+
+# "every 3 days", "every 2–3 days", "every 2 weeks", "every day", "every other week"
+_EVERY = re.compile(
+    r"\bevery\s+(?:(other)\s+|(\d+)(?:\s*[–—-]\s*(\d+))?\s*)?(day|week|month)s?\b",
+    re.IGNORECASE,
+)
+
+# interval_max > interval for ranges; the RRULE uses the shorter (safer) interval
+Recurrence = namedtuple("Recurrence", "freq interval interval_max")
+
+CalendarEvent = namedtuple("CalendarEvent", "summary start description recurrence", defaults=(None,))
+
+
+@lru_cache(maxsize=4096)
+def parse_recurrence(rule):
+    match = _EVERY.search(rule)
+    if not match:
+        return None
+    other, low, high, unit = match.groups()
+    interval = 2 if other else int(low or 1)
+    interval_max = int(high) if high else interval
+    if interval < 1:
+        return None
+    return Recurrence(FREQUENCIES[unit.lower()], interval, max(interval, interval_max))
+
+
+def rrule(recurrence, count):
+    return f"FREQ={recurrence.freq};INTERVAL={recurrence.interval};COUNT={count}"
+
+
+def _escape(text):
+    return (text.replace("\\", "\\\\").replace(";", "\\;").replace(",", "\\,")
+            .replace("\r\n", "\\n").replace("\n", "\\n"))
+
+
+# RFC 5545 folding: content lines longer than 75 octets continue on a line
+# starting with a space, never splitting a UTF-8 sequence
+def _fold(line):
+    raw = line.encode("utf-8")
+    if len(raw) <= 75:
+        return line + "\r\n"
+    parts, limit = [], 75
+    while raw:
+        cut = min(limit, len(raw))
+        while cut < len(raw) and (raw[cut] & 0xC0) == 0x80:
+            cut -= 1
+        parts.append(raw[:cut].decode("utf-8"))
+        raw = raw[cut:]
+        limit = 74
+    return "\r\n ".join(parts) + "\r\n"
+
+
+def _vevent(event, stamp, count):
+    start = event.start.strftime("%Y%m%d")
+    uid = hashlib.sha1(f"{event.summary}|{start}".encode("utf-8")).hexdigest()
+    lines = [
+        "BEGIN:VEVENT",
+        f"UID:{uid}@beginner-gardener",
+        f"DTSTAMP:{stamp}",
+        f"DTSTART;VALUE=DATE:{start}",
+        f"SUMMARY:{_escape(event.summary)}",
+    ]
+    if event.description:
+        lines.append(f"DESCRIPTION:{_escape(event.description)}")
+    if event.recurrence:
+        lines.append(f"RRULE:{rrule(event.recurrence, count)}")
+    lines.append("END:VEVENT")
+    return "".join(_fold(line) for line in lines)
+
+
+# Yields the calendar one chunk (header, each event, footer) at a time
+def iter_ical(events, count=6):
+    stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+    yield f"BEGIN:VCALENDAR\r\nVERSION:2.0\r\nPRODID:{PRODID}\r\nCALSCALE:GREGORIAN\r\n"
+    for event in events:
+        yield _vevent(event, stamp, count)
+    yield "END:VCALENDAR\r\n"
@@ -0,0 +1,309 @@
+# Hot-path instrumentation: timing spans around page sections, exports and
+# fetches, counters (external HTTP calls, cache hits and misses) and observed
+# values (artifact byte sizes).
+#
+# Off unless GARDENER_METRICS is set: "1" collects, "log" also writes one JSON
+# line per span to the "gardener.metrics" logger. While off, span() hands back
+# a shared no-op and count()/observe() return immediately, so instrumented
+# code pays one flag check.
+#
+# Spans are grouped per page run (a contextvar, so concurrent sessions don't
+# mix) for the sidebar breakdown, and everything also feeds process-wide
+# aggregates: snapshot() as a dict, prometheus_text() for a scrape endpoint
+# (serve(port), started by begin_run() when GARDENER_METRICS_PORT is set).
+# Work on background threads (asset downloads, frost refreshes, previews)
+# lands in the aggregates only.
+
+import contextvars
+import functools
+import json
+import logging
+import os
+import threading
+import time
+
+logger = logging.getLogger("gardener.metrics")
+
+_enabled = False
+_log = False
+_lock = threading.Lock()
+_spans = {}  # (name, labels) -> [count, total seconds, max seconds, errors]
+_counters = {}  # (name, labels) -> total
+_values = {}  # (name, labels) -> [count, sum, max]
+_last_runs = {}  # page -> Run
+_current = contextvars.ContextVar("gardener_metrics_run", default=None)
+_server = None
+
+
+def configure(enabled, log=False):
+    global _enabled, _log
+    _enabled, _log = bool(enabled), bool(log)
+    if _log and not logger.handlers:
+        handler = logging.StreamHandler()
+        handler.setFormatter(logging.Formatter("%(message)s"))
+        logger.addHandler(handler)
+        logger.setLevel(logging.INFO)
+        logger.propagate = False
+
+
+def enabled():
+    return _enabled
+
+
+def reset():
+    with _lock:
+        _spans.clear()
+        _counters.clear()
+        _values.clear()
+        _last_runs.clear()
+
+
+def _key(name, labels):
+    return name, tuple(sorted(labels.items())) if labels else ()
+
+
+class _NoopSpan:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NOOP = _NoopSpan()
+
+
+class _Span:
+    __slots__ = ("name", "labels", "run", "depth", "start")
+
+    def __init__(self, name, labels):
+        self.name = name
+        self.labels = labels
+
+    def __enter__(self):
+        self.run = _current.get()
+        self.depth = len(self.run._stack) if self.run else 0
+        if self.run:
+            self.run._stack.append(self)
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        seconds = time.perf_counter() - self.start
+        if self.run:
+            self.run._stack.remove(self)
+            self.run.spans.append((self.name, self.depth, self.start - self.run.started, seconds,
+                                   self.labels, exc_type is not None))
+        _record_span(self.name, self.labels, seconds, exc_type is not None, self.run)
+        return False
+
+
+def _record_span(name, labels, seconds, error, run):
+    with _lock:
+        agg = _spans.setdefault(_key(name, labels), [0, 0.0, 0.0, 0])
+        agg[0] += 1
+        agg[1] += seconds
+        agg[2] = max(agg[2], seconds)
+        agg[3] += error
+    if _log:
+        logger.info(json.dumps({"span": name, "ms": round(seconds * 1000, 3), "error": error,
+                                "page": run.page if run else None, "run": run.id if run else None, **labels}))
+
+
+def span(name, **labels):
+    if not _enabled:
+        return _NOOP
+    return _Span(name, labels)
+
+
+# Decorator form of span() for whole functions
+def timed(name):
+    def wrap(fn):
+        @functools.wraps(fn)
+        def inner(*args, **kwargs):
+            if not _enabled:
+                return fn(*args, **kwargs)
+            with _Span(name, {}):
+                return fn(*args, **kwargs)
+        return inner
+    return wrap
+
+
+def count(name, n=1, **labels):
+    if not _enabled:
+        return
+    key = _key(name, labels)
+    with _lock:
+        _counters[key] = _counters.get(key, 0) + n
+    run = _current.get()
+    if run:
+        run.counters[key] = run.counters.get(key, 0) + n
+
+
+def observe(name, value, **labels):
+    if not _enabled:
+        return
+    key = _key(name, labels)
+    with _lock:
+        agg = _values.setdefault(key, [0, 0.0, 0.0])
+        agg[0] += 1
+        agg[1] += value
+        agg[2] = max(agg[2], value)
+    run = _current.get()
+    if run:
+        run.values.append((name, labels, value))
+
+
+class Run:
+    """One page run: its sections and spans in order, and its counters."""
+
+    _ids = 0
+
+    def __init__(self, page):
+        Run._ids += 1
+        self.id = Run._ids
+        self.page = page
+        self.started = time.perf_counter()
+        self.seconds = None
+        self.spans = []  # (name, depth, start offset s, seconds, labels, error)
+        self.counters = {}
+        self.values = []
+        self._stack = []
+        self._section = None
+
+    def breakdown(self):
+        return [{"span": name, "depth": depth, "start_ms": round(start * 1000, 1), "ms": round(seconds * 1000, 2),
+                 **labels, **({"error": True} if error else {})}
+                for name, depth, start, seconds, labels, error in sorted(self.spans, key=lambda s: s[2])]
+
+
+# Start timing a page run; returns None while metrics are off
+def begin_run(page):
+    if os.environ.get("GARDENER_METRICS_PORT"):
+        serve(int(os.environ["GARDENER_METRICS_PORT"]))
+    if not _enabled:
+        _current.set(None)
+        return None
+    run = Run(page)
+    _current.set(run)
+    return run
+
+
+def current_run():
+    return _current.get()
+
+
+# Close the running page section and open the next one (pages are linear
+# scripts, so a section lasts until the next section() or end_run())
+def section(name):
+    run = _current.get()
+    if run is None:
+        return
+    if run._section is not None:
+        run._section.__exit__(None, None, None)
+    run._section = _Span(f"section.{name}", {}).__enter__()
+
+
+def end_run():
+    run = _current.get()
+    if run is None:
+        return None
+    if run._section is not None:
+        run._section.__exit__(None, None, None)
+        run._section = None
+    run.seconds = time.perf_counter() - run.started
+    _record_span("run", {"page": run.page}, run.seconds, False, run)
+    with _lock:
+        _last_runs[run.page] = run
+    _current.set(None)  # later fragment reruns on this thread start their own run
+    return run
+
+
+# Last run of each page fragment ("<page>/<section>"), by section
+def fragment_runs(page):
+    prefix = f"{page}/"
+    with _lock:
+        return {name[len(prefix):]: run for name, run in _last_runs.items() if name.startswith(prefix)}
+
+
+def _labels(labels):
+    return {k: v for k, v in labels}
+
+
+def snapshot():
+    with _lock:
+        return {
+            "enabled": _enabled,
+            "spans": [{"span": name, **_labels(labels), "count": c, "total_ms": round(t * 1000, 3),
+                       "max_ms": round(m * 1000, 3), "errors": e}
+                      for (name, labels), (c, t, m, e) in sorted(_spans.items())],
+            "counters": [{"name": name, **_labels(labels), "value": v} for (name, labels), v in sorted(_counters.items())],
+            "values": [{"name": name, **_labels(labels), "count": c, "sum": s, "max": m}
+                       for (name, labels), (c, s, m) in sorted(_values.items())],
+        }
+
+
+def _prom_labels(pairs):
+    if not pairs:
+        return ""
+    escape = lambda v: str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+    return "{" + ",".join(f'{k}="{escape(v)}"' for k, v in pairs) + "}"
+
+
+def _prom_name(name):
+    return "".join(ch if ch.isalnum() else "_" for ch in name)
+
+
+# Prometheus text exposition format
+def prometheus_text():
+    lines = ["# TYPE gardener_span_seconds summary"]
+    with _lock:
+        for (name, labels), (c, t, m, e) in sorted(_spans.items()):
+            pairs = (("span", name),) + labels
+            lines.append(f"gardener_span_seconds_count{_prom_labels(pairs)} {c}")
+            lines.append(f"gardener_span_seconds_sum{_prom_labels(pairs)} {t:.6f}")
+            lines.append(f"gardener_span_seconds_max{_prom_labels(pairs)} {m:.6f}")
+            lines.append(f"gardener_span_errors_total{_prom_labels(pairs)} {e}")
+        for (name, labels), v in sorted(_counters.items()):
+            lines.append(f"gardener_{_prom_name(name)}_total{_prom_labels(labels)} {v}")
+        for (name, labels), (c, s, m) in sorted(_values.items()):
+            metric = f"gardener_{_prom_name(name)}"
+            lines.append(f"{metric}_count{_prom_labels(labels)} {c}")
+            lines.append(f"{metric}_sum{_prom_labels(labels)} {s}")
+            lines.append(f"{metric}_max{_prom_labels(labels)} {m}")
+    return "\n".join(lines) + "\n"
+
+
+# /metrics (Prometheus text) and /metrics.json on a background thread, once per process
+def serve(port, host="127.0.0.1"):
+    global _server
+    with _lock:
+        if _server is not None:
+            return _server
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path == "/metrics":
+                    body, kind = prometheus_text().encode("utf-8"), "text/plain; version=0.0.4"
+                elif self.path == "/metrics.json":
+                    body, kind = json.dumps(snapshot()).encode("utf-8"), "application/json"
+                else:
+                    self.send_error(404)
+                    return
+                self.send_response(200)
+                self.send_header("Content-Type", kind)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        _server = ThreadingHTTPServer((host, port), Handler)
+        threading.Thread(target=_server.serve_forever, name="metrics-http", daemon=True).start()
+        return _server
+
+
+_mode = os.environ.get("GARDENER_METRICS", "").strip().lower()
+configure(_mode not in ("", "0", "off", "false", "no"), log=_mode == "log")
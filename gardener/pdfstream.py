@@ -0,0 +1,353 @@
+# Streaming PDF writer behind the printable exports. Pages are laid out by a
+# TextFlow and written to the output stream as soon as they fill up (content
+# compressed, objects indexed for the xref), so memory stays bounded by one
+# page however long the guide is.
+#
+# Static fragments are built once and reused: a PageTemplate renders its
+# header (logo + title) and footer to content bytes a single time for all of
+# its pages, and image XObjects (the logo by path, QR codes by URL) are
+# encoded once per process, then written once per document.
+#
+# Text uses the PDF core fonts (Helvetica, WinAnsi) with fpdf's metric
+# tables for wrapping; callers pass text through reports.pdf_text first.
+# Units are millimetres on an A4 page, as with FPDF.
+
+import io
+import zlib
+from collections import namedtuple
+from functools import lru_cache
+
+PAGE_W, PAGE_H = 210.0, 297.0
+PT = 72 / 25.4  # points per mm
+MARGIN = 10.0
+FOOTER = 20.0  # the footer's 10 mm cell starts this far from the bottom edge
+BOTTOM = FOOTER + 2.0  # content stops above it
+
+# style -> (resource name, base font, fpdf metrics key)
+FONTS = {"": ("F1", "Helvetica", "helvetica"), "B": ("F2", "Helvetica-Bold", "helveticaB")}
+
+# Encoded image, ready to be written as an XObject
+PdfImage = namedtuple("PdfImage", "key width height colorspace filter data")
+
+
+@lru_cache(maxsize=None)
+def _widths(style):
+    from fpdf.fonts import fpdf_charwidths
+
+    table = fpdf_charwidths[FONTS[style][2]]
+    return [table[chr(i)] for i in range(256)]
+
+
+def text_width(text, size, style=""):
+    return sum(map(_widths(style).__getitem__, text.encode("latin-1", "replace"))) * size / 1000 / PT
+
+
+# Greedy word wrap to `width` mm; words longer than a line are split
+def wrap(text, width, size, style=""):
+    if text_width(text, size, style) <= width:
+        return [text]
+    space = text_width(" ", size, style)
+    lines, line, used = [], [], 0.0
+    for word in text.split(" "):
+        w = text_width(word, size, style)
+        while w > width:
+            cut = len(word)
+            while cut > 1 and text_width(word[:cut], size, style) > width:
+                cut -= 1
+            if line:
+                lines.append(" ".join(line))
+                line, used = [], 0.0
+            lines.append(word[:cut])
+            word = word[cut:]
+            w = text_width(word, size, style)
+        if line and used + space + w > width:
+            lines.append(" ".join(line))
+            line, used = [], 0.0
+        used += (space if line else 0) + w
+        line.append(word)
+    if line:
+        lines.append(" ".join(line))
+    return lines
+
+
+def _literal(text):
+    raw = text.encode("latin-1", "replace")
+    return b"(" + raw.replace(b"\\", b"\\\\").replace(b"(", b"\\(").replace(b")", b"\\)") + b")"
+
+
+def _num(value):
+    return f"{value:.2f}".rstrip("0").rstrip(".").encode("ascii")
+
+
+# Content-stream operators for one line of text whose top edge is at `y`
+def text_ops(text, x, y, size, style="", h=None):
+    baseline = y + ((h or size / PT) + 0.7 * size / PT) / 2
+    return b"BT /%s %s Tf %s %s Td %s Tj ET\n" % (
+        FONTS[style][0].encode("ascii"), _num(size), _num(x * PT), _num((PAGE_H - baseline) * PT), _literal(text))
+
+
+def centered_ops(text, y, size, style="", h=None, left=0.0, right=PAGE_W):
+    x = left + (right - left - text_width(text, size, style)) / 2
+    return text_ops(text, x, y, size, style, h)
+
+
+# Longest prefix of `text` (with an ellipsis if cut) that fits `width` mm
+def clip(text, width, size, style=""):
+    if text_width(text, size, style) <= width:
+        return text
+    while text and text_width(text + "...", size, style) > width:
+        text = text[:-1]
+    return text + "..."
+
+
+# One table row: cells clipped to their column widths; aligns is "L"/"R" per column
+def row_ops(cells, widths, y, size, style="", h=None, aligns=None, x=MARGIN):
+    ops = []
+    for i, (cell, width) in enumerate(zip(cells, widths)):
+        text = clip(cell, width - 1.5, size, style)
+        left = x + width - 1.5 - text_width(text, size, style) if aligns and aligns[i] == "R" else x
+        ops.append(text_ops(text, left, y, size, style, h))
+        x += width
+    return b"".join(ops)
+
+
+def image_ops(name, x, y, w, h):
+    return b"q %s 0 0 %s %s %s cm /%s Do Q\n" % (
+        _num(w * PT), _num(h * PT), _num(x * PT), _num((PAGE_H - y - h) * PT), name.encode("ascii"))
+
+
+def _from_pil(key, image):
+    from PIL import Image
+
+    if image.mode in ("RGBA", "LA", "P"):
+        image = image.convert("RGBA")
+        flat = Image.new("RGB", image.size, (255, 255, 255))
+        flat.paste(image, mask=image.split()[-1])
+        image = flat
+    if image.mode not in ("RGB", "L"):
+        image = image.convert("RGB")
+    colorspace = "DeviceRGB" if image.mode == "RGB" else "DeviceGray"
+    return PdfImage(key, image.width, image.height, colorspace, "FlateDecode", zlib.compress(image.tobytes(), 6))
+
+
+# Image file (path or URL) as an XObject: JPEGs are embedded as they are,
+# anything else is decoded and deflated (transparency flattened onto white)
+@lru_cache(maxsize=32)
+def image_file(source):
+    from PIL import Image
+
+    if source.startswith(("http://", "https://")):
+        from urllib.request import urlopen
+
+        with urlopen(source, timeout=10) as res:
+            data = res.read()
+    else:
+        with open(source, "rb") as f:
+            data = f.read()
+    with Image.open(io.BytesIO(data)) as image:
+        if image.format == "JPEG" and image.mode in ("RGB", "L"):
+            colorspace = "DeviceRGB" if image.mode == "RGB" else "DeviceGray"
+            return PdfImage(f"image:{source}", image.width, image.height, colorspace, "DCTDecode", data)
+        image.load()
+        return _from_pil(f"image:{source}", image)
+
+
+@lru_cache(maxsize=64)
+def qr_image(url):
+    import qrcode
+
+    return _from_pil(f"qr:{url}", qrcode.make(url).get_image().convert("L"))
+
+
+class PdfStream:
+    """Writes a PDF to a binary stream object by object; finish with close()."""
+
+    def __init__(self, out, title=None, compress=True):
+        self.out = out
+        self.title = title
+        self.compress = compress
+        self.pages = 0
+        self._written = 0
+        self._offsets = {}
+        self._next = 5  # 1 catalog, 2 page tree, 3-4 fonts
+        self._page_ids = []
+        self._images = {}  # key -> resource name
+        self._xobjects = {}  # resource name -> object id
+        self._write(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+        for i, (name, base, _) in enumerate(FONTS.values()):
+            self._object(3 + i, b"<< /Type /Font /Subtype /Type1 /BaseFont /%s /Encoding /WinAnsiEncoding >>"
+                         % base.encode("ascii"))
+
+    def _write(self, data):
+        self.out.write(data)
+        self._written += len(data)
+
+    def _id(self):
+        self._next += 1
+        return self._next - 1
+
+    def _object(self, oid, body):
+        self._offsets[oid] = self._written
+        self._write(b"%d 0 obj\n" % oid + body + b"\nendobj\n")
+
+    def _stream(self, oid, data, extra=b"", deflate=None):
+        if deflate if deflate is not None else self.compress:
+            data, extra = zlib.compress(data, 6), extra + b" /Filter /FlateDecode"
+        self._object(oid, b"<< /Length %d%s >>\nstream\n" % (len(data), extra) + data + b"\nendstream")
+
+    # Resource name for `image`, writing its XObject the first time it's used
+    def image(self, image):
+        hit = self._images.get(image.key)
+        if hit is None:
+            oid = self._id()
+            bpc = b" /BitsPerComponent 8 /ColorSpace /%s /Filter /%s" % (
+                image.colorspace.encode("ascii"), image.filter.encode("ascii"))
+            self._stream(oid, image.data, b" /Type /XObject /Subtype /Image /Width %d /Height %d%s"
+                         % (image.width, image.height, bpc), deflate=False)
+            hit = self._images[image.key] = f"I{len(self._images) + 1}"
+            self._xobjects[hit] = oid
+        return hit
+
+    def page(self, content, images=()):
+        content_id, page_id = self._id(), self._id()
+        self._stream(content_id, content)
+        xobjects = b"".join(b"/%s %d 0 R " % (name.encode("ascii"), self._xobjects[name]) for name in dict.fromkeys(images))
+        self._object(page_id, b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 %s %s] /Contents %d 0 R "
+                              b"/Resources << /Font << /F1 3 0 R /F2 4 0 R >>%s >> >>"
+                     % (_num(PAGE_W * PT), _num(PAGE_H * PT), content_id,
+                        b" /XObject << " + xobjects + b">>" if images else b""))
+        self._page_ids.append(page_id)
+        self.pages += 1
+
+    def close(self):
+        kids = b" ".join(b"%d 0 R" % pid for pid in self._page_ids)
+        self._object(2, b"<< /Type /Pages /Kids [%s] /Count %d >>" % (kids, len(self._page_ids)))
+        self._object(1, b"<< /Type /Catalog /Pages 2 0 R >>")
+        info = self._id()
+        self._object(info, b"<< /Producer (gardener) /Title %s >>" % _literal(self.title or ""))
+        xref = self._written
+        size = self._next
+        lines = [b"xref\n0 %d\n" % size, b"0000000000 65535 f \n"]
+        for oid in range(1, size):
+            offset = self._offsets.get(oid)
+            lines.append(b"%010d 00000 n \n" % offset if offset is not None else b"0000000000 65535 f \n")
+        self._write(b"".join(lines))
+        self._write(b"trailer\n<< /Size %d /Root 1 0 R /Info %d 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (size, info, xref))
+        return self._written
+
+
+class PageTemplate:
+    """Static page furniture (header with optional logo and table column
+    labels, footer), rendered once per template."""
+
+    def __init__(self, title=None, subtitle=None, logo=None, footer=None, columns=None):
+        self.title = title
+        self.subtitle = subtitle
+        self.logo = logo
+        self.footer = footer
+        self.top = MARGIN
+        ops = []
+        if logo:
+            ops.append((logo, image_ops))
+        if title:
+            ops.append(centered_ops(title, MARGIN, 12, "B", 10, left=30, right=180))
+            self.top = MARGIN + 10
+        if subtitle:
+            ops.append(centered_ops(subtitle, self.top, 12, "", 10, left=MARGIN, right=PAGE_W - MARGIN))
+            self.top += 10
+        if columns:  # (labels, widths, aligns) repeated at the top of every page
+            labels, widths, aligns = columns
+            ops.append(row_ops(labels, widths, self.top, 9, "B", 7, aligns))
+            self.top += 7
+        self._ops = ops
+        self._footer = centered_ops(footer, PAGE_H - FOOTER, 8, "", 10) if footer else b""
+
+    # Header/footer bytes with the logo bound to this document's resource name
+    def content(self, stream):
+        parts, images = [], []
+        for op in self._ops:
+            if isinstance(op, tuple):
+                name = stream.image(op[0])
+                images.append(name)
+                parts.append(image_ops(name, MARGIN, 8, 15, 15 * op[0].height / op[0].width))
+            else:
+                parts.append(op)
+        return b"".join(parts) + self._footer, images
+
+
+class TextFlow:
+    """Lays lines out top to bottom, emitting each page to the stream once full."""
+
+    def __init__(self, stream, template=None, width=PAGE_W - 2 * MARGIN):
+        self.stream = stream
+        self.template = template or PageTemplate()
+        self.width = width
+        self.y = None
+        self._ops = []
+        self._images = []
+        self._furniture = None
+
+    def _new_page(self):
+        if self.y is not None:
+            self._flush()
+        if self._furniture is None:
+            self._furniture = self.template.content(self.stream)
+        self._ops = [self._furniture[0]]
+        self._images = list(self._furniture[1])
+        self.y = self.template.top
+
+    def _flush(self):
+        self.stream.page(b"".join(self._ops), self._images)
+        self._ops, self._images = [], []
+
+    def _room(self, h):
+        if self.y is None or self.y + h > PAGE_H - BOTTOM:
+            self._new_page()
+
+    def gap(self, h):
+        self._room(0)
+        self.y += h
+
+    # One paragraph, wrapped; a line that doesn't fit goes to the next page
+    def text(self, text, h=6, size=10, style="", indent=0.0, align="L"):
+        for line in wrap(text, self.width - indent, size, style):
+            self._room(h)
+            if align == "C":
+                self._ops.append(centered_ops(line, self.y, size, style, h, MARGIN, MARGIN + self.width))
+            else:
+                self._ops.append(text_ops(line, MARGIN + indent, self.y, size, style, h))
+            self.y += h
+
+    def row(self, cells, widths, h=5, size=9, style="", aligns=None):
+        self._room(h)
+        self._ops.append(row_ops(cells, widths, self.y, size, style, h, aligns))
+        self.y += h
+
+    # A batch of (text, h, size, style, indent) paragraphs
+    def lines(self, batch):
+        for text, h, size, style, indent in batch:
+            self.text(text, h, size, style, indent)
+
+    def image(self, image, x, w):
+        h = w * image.height / image.width
+        self._room(h)
+        name = self.stream.image(image)
+        self._images.append(name)
+        self._ops.append(image_ops(name, x, self.y, w, h))
+        self.y += h
+
+    def close(self):
+        if self.y is None:
+            self._new_page()
+        self._flush()
+        self.y = None
+        return self.stream.close()
+
+
+# Run `write(stream)` into `out`, or into memory when out is None: bytes, or
+# the number of bytes written to `out`
+def render(write, out=None, title=None):
+    target = out if out is not None else io.BytesIO()
+    stream = PdfStream(target, title=title)
+    size = write(stream)
+    return target.getvalue() if out is None else size
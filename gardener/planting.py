@@ -0,0 +1,240 @@
+# Planting windows: when each variety can be sown and when set out, per USDA
+# zone, answering "what can I plant on date D in zone Z" for the monthly
+# cards, the frost warnings and the container pickers.
+#
+# Windows come from the catalog's sowing and transplanting tasks as the
+# season schedule dates them (TaskPlan.dates) for the zone's typical last
+# frost: the median over the zone's ZIPs in the ZIP index, else ZONE_FROST.
+# A climate can also be given as a frost date (a ZIP without a known zone).
+# Tasks the guide doesn't date ("Direct sow in cool soil") have no window.
+#
+# Each climate's windows sit in a static centered interval tree, built on
+# first use: point and range queries cost O(log n + hits), and the crop,
+# level, organic and pre-frost filters are masks over the hits. A window is
+# pre-frost when the guide times its task before the last frost ("Direct sow
+# 6 weeks before last frost"), i.e. the crop is sown cold.
+
+import re
+import threading
+from collections import namedtuple
+from datetime import date, datetime, timedelta
+from functools import lru_cache
+
+import numpy as np
+
+from gardener import metrics
+from gardener.schedule import FROST, START, task_plan
+from gardener.zipindex import frost_month_day, zip_index, zone_code
+
+SOW, TRANSPLANT = "sow", "transplant"
+MIN_WINDOW_DAYS = 14  # a planting task dated to one day ("after last frost") stays open two weeks
+
+# Typical last spring frost by zone number where the ZIP index has no data;
+# the warmer "b" half-zone a week earlier
+ZONE_FROST = {1: (6, 1), 2: (5, 20), 3: (5, 10), 4: (5, 1), 5: (4, 20), 6: (4, 10), 7: (4, 1), 8: (3, 20),
+              9: (2, 20), 10: (1, 30), 11: (1, 15), 12: (1, 15), 13: (1, 15)}
+
+_TRANSPLANT = re.compile(r"\btransplant(?!ing)|\bset (?:them |plants )?out\b", re.IGNORECASE)
+_SOW = re.compile(r"\b(?:sow|direct[- ]seed|start(?:ed)? (?:seeds )?indoors|plant seeds?)\b", re.IGNORECASE)
+
+# start and end (inclusive) as dates
+Window = namedtuple("Window", "variety kind start end")
+
+
+class IntervalTree:
+    """Static centered interval tree over inclusive integer intervals."""
+
+    def __init__(self, start, end):
+        self.start = np.asarray(start, dtype=np.int64)
+        self.end = np.asarray(end, dtype=np.int64)
+        # per node: center, left, right, ids by start, their starts, ids by end (latest first), their -ends
+        self._nodes = []
+        self._root = self._build(np.arange(len(self.start)))
+
+    def __len__(self):
+        return len(self.start)
+
+    def _build(self, ids):
+        if not len(ids):
+            return -1
+        start, end = self.start[ids], self.end[ids]
+        center = int(np.floor(np.median(np.concatenate([start, end]))))
+        here = ids[(start <= center) & (end >= center)]
+        by_start = here[np.argsort(self.start[here], kind="stable")]
+        by_end = here[np.argsort(-self.end[here], kind="stable")]
+        node = len(self._nodes)
+        self._nodes.append(None)
+        left = self._build(ids[end < center])
+        right = self._build(ids[start > center])
+        self._nodes[node] = (center, left, right, by_start, self.start[by_start], by_end, -self.end[by_end])
+        return node
+
+    # Ids of the intervals containing `point`
+    def stab(self, point):
+        return self.overlapping(point, point)
+
+    # Ids of the intervals overlapping first..last
+    def overlapping(self, first, last):
+        found, stack = [], [self._root]
+        while stack:
+            node = stack.pop()
+            if node < 0:
+                continue
+            center, left, right, by_start, starts, by_end, neg_ends = self._nodes[node]
+            if last < center:
+                found.append(by_start[:np.searchsorted(starts, last, "right")])
+                stack.append(left)
+            elif first > center:
+                found.append(by_end[:np.searchsorted(neg_ends, -first, "right")])
+                stack.append(right)
+            else:
+                found.append(by_start)
+                stack.extend((left, right))
+        return np.concatenate(found) if found else np.zeros(0, dtype=np.int64)
+
+
+def _planting_kind(text, anchor):
+    if anchor.ref == "transplant":  # timed from transplanting, e.g. "Stake plants upon transplant"
+        return None
+    if _TRANSPLANT.search(text):
+        return TRANSPLANT
+    if _SOW.search(text):
+        return SOW
+    return None
+
+
+# Last frost for a zone like "8b": the median of the zone's ZIPs, else ZONE_FROST
+def zone_frost(zone, year):
+    index = zip_index()
+    code = zone_code(zone)
+    known = index.frost[(index.zone == code) & (index.frost > 0)] if code else []
+    if len(known):
+        month, day = frost_month_day(int(np.median(known)))
+        return date(year, month, day)
+    number = code // 2
+    if number not in ZONE_FROST:
+        raise ValueError(f"unknown USDA zone {zone!r}")
+    return date(year, *ZONE_FROST[number]) - timedelta(days=7 if code % 2 else 0)
+
+
+class PlantingIndex:
+    """Sow and transplant windows of one catalog for one year, per climate."""
+
+    def __init__(self, catalog, year):
+        self.catalog = catalog
+        self.year = year
+        self._origin = np.datetime64(date(year, 1, 1), "D")
+        plan = task_plan(catalog)
+        position = {}
+        for i, v in enumerate(catalog.varieties):
+            position.setdefault(v.name, i)
+        rows, kinds = [], []
+        for i, (text, anchor) in enumerate(zip(plan.text, plan.anchors)):
+            kind = None if plan.recurrence[i] else _planting_kind(text, anchor)
+            root = i
+            while plan.ref[root] >= 0:
+                root = plan.ref[root]
+            if kind and plan.kind[root] != START:  # start-date tasks have no window of their own
+                rows.append(i)
+                kinds.append(kind)
+        self._plan = plan
+        self._rows = np.array(rows, dtype=np.int64)
+        self.kind = np.array(kinds, dtype=object)
+        self.variety = np.array([position[plan.variety[i]] for i in rows], dtype=np.int64)
+        self.pre_frost = np.array([plan.anchors[i].kind == FROST and plan.anchors[i].offset < 0 for i in rows], dtype=bool)
+        self._length = np.maximum(plan.window[self._rows].astype(np.int64), MIN_WINDOW_DAYS - 1)
+        varieties = catalog.varieties
+        self._crop = np.array([v.crop for v in varieties], dtype=object)
+        self._level = np.array([v.level for v in varieties], dtype=object)
+        self._organic = np.array([v.organic for v in varieties], dtype=bool)
+        self._climates = {}  # zone or frost date -> (start days, end days, IntervalTree)
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._rows)
+
+    def _day(self, value):
+        if isinstance(value, datetime):
+            value = value.date()
+        return int((np.datetime64(value, "D") - self._origin).astype(np.int64))
+
+    def _date(self, day):
+        return (self._origin + np.timedelta64(int(day), "D")).item()
+
+    # A zone like "8b" or a last-frost date
+    def _climate(self, climate):
+        key = climate.date() if isinstance(climate, datetime) else climate
+        hit = self._climates.get(key)
+        if hit is not None:
+            return hit
+        with self._lock:
+            hit = self._climates.get(key)
+            if hit is None:
+                with metrics.span("build.planting_index"):
+                    frost = key if isinstance(key, date) else zone_frost(key, self.year)
+                    dates = self._plan.dates(frost, frost)[0][self._rows]
+                    start = (dates - self._origin).astype(np.int64)
+                    end = start + self._length
+                    hit = (start, end, IntervalTree(start, end))
+                self._climates[key] = hit
+        return hit
+
+    def _windows(self, ids, climate, kind, crop, level, organic, pre_frost):
+        start, end, _ = self._climate(climate)
+        ids = np.sort(ids)
+        keep = np.ones(len(ids), dtype=bool)
+        if kind is not None:
+            keep &= self.kind[ids] == kind
+        variety = self.variety[ids]
+        for values, wanted in ((self._crop, crop), (self._level, level)):
+            if wanted is not None:
+                keep &= values[variety] == wanted
+        if organic is not None:
+            keep &= self._organic[variety] == organic
+        if pre_frost is not None:
+            keep &= self.pre_frost[ids] == pre_frost
+        ids = ids[keep]
+        return [Window(self.catalog.varieties[v], k, self._date(s), self._date(e))
+                for v, k, s, e in zip(self.variety[ids].tolist(), self.kind[ids].tolist(),
+                                      start[ids].tolist(), end[ids].tolist())]
+
+    # Windows open on `day`, in catalog order; None filters match everything
+    def plantable(self, day, climate, kind=None, crop=None, level=None, organic=None, pre_frost=None):
+        ids = self._climate(climate)[2].stab(self._day(day))
+        return self._windows(ids, climate, kind, crop, level, organic, pre_frost)
+
+    # Windows open at any point from first to last (inclusive)
+    def between(self, first, last, climate, kind=None, crop=None, level=None, organic=None, pre_frost=None):
+        ids = self._climate(climate)[2].overlapping(self._day(first), self._day(last))
+        return self._windows(ids, climate, kind, crop, level, organic, pre_frost)
+
+    # Batch form of plantable() for every day from first to last: {date: [Window]}
+    def daily(self, first, last, climate, kind=None, crop=None, level=None, organic=None, pre_frost=None):
+        windows = self.between(first, last, climate, kind, crop, level, organic, pre_frost)
+        days = {}
+        for window in windows:
+            day, end = max(window.start, _as_date(first)), min(window.end, _as_date(last))
+            while day <= end:
+                days.setdefault(day, []).append(window)
+                day += timedelta(days=1)
+        return {d: days[d] for d in sorted(days)}
+
+
+def _as_date(value):
+    return value.date() if isinstance(value, datetime) else value
+
+
+# One index per catalog and year, shared like the task plan
+@lru_cache(maxsize=8)
+def planting_index(catalog, year):
+    return PlantingIndex(catalog, year)
+
+
+# Distinct varieties of some windows, in order
+def varieties(windows):
+    return list({w.variety.name: w.variety for w in windows}.values())
+
+
+# "Sow Mar 01 – Mar 14", for cards
+def label(window):
+    return f"{window.kind.capitalize()} {window.start:%b %d} – {window.end:%b %d}"
@@ -0,0 +1,71 @@
+# PDF previews rasterized off the script thread: poppler runs only when a
+# preview is actually asked for, a low-DPI first-page thumbnail comes first,
+# and finished renders are kept by PDF content hash for every session.
+
+import hashlib
+import io
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from gardener import metrics
+
+
+def pdf_digest(pdf_bytes):
+    return hashlib.sha256(pdf_bytes).hexdigest()
+
+
+# PNG bytes per page; first_page/last_page keep poppler from touching the rest
+@metrics.timed("preview.rasterize")
+def rasterize_pdf(pdf_bytes, dpi, first_page=None, last_page=None):
+    from pdf2image import convert_from_bytes
+
+    pages = convert_from_bytes(pdf_bytes, dpi=dpi, first_page=first_page, last_page=last_page,
+                               fmt="png", thread_count=1)
+    out = []
+    for page in pages:
+        buffer = io.BytesIO()
+        page.save(buffer, format="PNG", compress_level=1)
+        out.append(buffer.getvalue())
+    return out
+
+
+class PreviewService:
+    """Background PDF rasterizer; meant to be shared via st.cache_resource."""
+
+    def __init__(self, thumb_dpi=40, full_dpi=100, max_items=64, max_workers=1, rasterize=rasterize_pdf):
+        self.thumb_dpi = thumb_dpi
+        self.full_dpi = full_dpi
+        self.max_items = max_items
+        self.rasterize = rasterize
+        self._renders = OrderedDict()
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="preview")
+
+    # Future resolving to a list of PNG bytes. Repeated calls for the same PDF
+    # share one render, queued or finished, including a failure (no poppler).
+    def thumbnail(self, pdf_bytes):
+        return self._submit(pdf_bytes, self.thumb_dpi, 1, 1)
+
+    def pages(self, pdf_bytes):
+        return self._submit(pdf_bytes, self.full_dpi, None, None)
+
+    def _submit(self, pdf_bytes, dpi, first_page, last_page):
+        key = (pdf_digest(pdf_bytes), dpi, first_page, last_page)
+        with self._lock:
+            future = self._renders.get(key)
+            if future is not None:
+                self._renders.move_to_end(key)
+                metrics.count("cache.preview", result="hit")
+                return future
+            metrics.count("cache.preview", result="miss")
+            future = self._executor.submit(self.rasterize, pdf_bytes, dpi, first_page, last_page)
+            self._renders[key] = future
+            while len(self._renders) > self.max_items:
+                self._renders.popitem(last=False)
+            return future
+
+    def stats(self):
+        with self._lock:
+            done = sum(1 for f in self._renders.values() if f.done())
+            return {"items": len(self._renders), "done": done}
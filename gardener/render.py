@@ -0,0 +1,110 @@
+# Bed-layout images drawn straight into a pixel array: one color per crop,
+# grid lines, labels when cells are big enough and a legend below the grid.
+# Fast enough for 100x100 beds; callers memoize the bytes by layout hash.
+
+import io
+import zlib
+
+import numpy as np
+
+from gardener import metrics
+
+# Qualitative palette (tab20) so neighbouring crops stay distinguishable
+PALETTE = np.array([
+    (31, 119, 180), (174, 199, 232), (255, 127, 14), (255, 187, 120), (44, 160, 44),
+    (152, 223, 138), (214, 39, 40), (255, 152, 150), (148, 103, 189), (197, 176, 213),
+    (140, 86, 75), (196, 156, 148), (227, 119, 194), (247, 182, 210), (127, 127, 127),
+    (199, 199, 199), (188, 189, 34), (219, 219, 141), (23, 190, 207), (158, 218, 229),
+], dtype=np.uint8)
+EMPTY = (255, 255, 255)
+GRID = (90, 90, 90)
+TEXT = (20, 20, 20)
+
+
+# Each crop's stable color (crc32, unlike hash(), is the same in every
+# process), unless another crop in the same image already has it; then the
+# next unused palette entry
+def _distinct_colors(crops):
+    used, colors = set(), []
+    for name in crops:
+        slot = zlib.crc32(name.encode("utf-8")) % len(PALETTE)
+        if len(used) < len(PALETTE):
+            while slot in used:
+                slot = (slot + 1) % len(PALETTE)
+        used.add(slot)
+        colors.append(tuple(int(c) for c in PALETTE[slot]))
+    return colors
+
+
+def _font(size):
+    from PIL import ImageFont
+
+    try:
+        return ImageFont.load_default(size=size)
+    except TypeError:  # Pillow < 10.1 has a single bitmap font
+        return ImageFont.load_default()
+
+
+def _cell_size(rows, cols, max_px):
+    return int(max(4, min(80, max_px // max(rows, cols, 1))))
+
+
+def _label_mask(label, cell, font):
+    from PIL import Image, ImageDraw
+
+    tile = Image.new("L", (cell, cell), 0)
+    draw = ImageDraw.Draw(tile)
+    left, top, right, bottom = draw.textbbox((0, 0), label, font=font)
+    draw.text(((cell - (right - left)) / 2 - left, (cell - (bottom - top)) / 2 - top), label, fill=255, font=font)
+    return np.asarray(tile) > 96
+
+
+@metrics.timed("export.bed_png")
+def render_layout_png(layout, cell_px=None, max_px=2400, legend=True):
+    from PIL import Image, ImageDraw
+
+    rows, cols = len(layout), len(layout[0]) if layout else 0
+    if not rows or not cols:
+        rows, cols, layout = 1, 1, [[""]]
+    cell = cell_px or _cell_size(rows, cols, max_px)
+
+    # Names -> integer ids -> colors, then nearest-neighbour upscale to cell size
+    names = {"": 0}
+    ids = np.array([[names.setdefault(c or "", len(names)) for c in row] for row in layout], dtype=np.int32)
+    crops = [n for n in names if n]
+    lut = np.array([EMPTY] + _distinct_colors(crops), dtype=np.uint8)
+    pixels = np.repeat(np.repeat(lut[ids], cell, axis=0), cell, axis=1)
+
+    # Each label is drawn once into a cell-sized mask and stamped everywhere
+    # that crop is planted, rather than running the text layout per cell
+    if cell >= 36:
+        stamps = np.zeros((len(names), cell, cell), dtype=bool)
+        font = _font(max(8, cell // 6))
+        for k, crop in enumerate(crops, start=1):
+            stamps[k] = _label_mask(crop[:10], cell, font)
+        mask = stamps[ids].transpose(0, 2, 1, 3).reshape(rows * cell, cols * cell)
+        pixels[mask] = TEXT
+
+    pixels[::cell, :] = GRID
+    pixels[:, ::cell] = GRID
+    grid = np.full((rows * cell + 1, cols * cell + 1, 3), GRID, dtype=np.uint8)
+    grid[:-1, :-1] = pixels
+
+    legend_rows = (len(crops) + 2) // 3 if legend and crops else 0
+    line_h = 18
+    image = Image.new("RGB", (grid.shape[1], grid.shape[0] + legend_rows * line_h + (8 if legend_rows else 0)), EMPTY)
+    image.paste(Image.fromarray(grid), (0, 0))
+    draw = ImageDraw.Draw(image)
+
+    if legend_rows:
+        font = _font(12)
+        column_w = max(image.width // 3, 1)
+        top = grid.shape[0] + 6
+        for k, crop in enumerate(crops):
+            x, y = (k % 3) * column_w + 4, top + (k // 3) * line_h
+            draw.rectangle((x, y + 2, x + 12, y + 14), fill=tuple(int(c) for c in lut[k + 1]), outline=GRID)
+            draw.text((x + 18, y), crop, fill=TEXT, font=font)
+
+    buffer = io.BytesIO()
+    image.save(buffer, format="PNG", optimize=False, compress_level=3)
+    return buffer.getvalue()
@@ -0,0 +1,183 @@
+# Printable exports (variety guide PDF, task calendar, bed layout PDF with QR),
+# shared by the Streamlit pages and the headless batch exporter.
+# PDFs are laid out and streamed by gardener.pdfstream; qrcode and PIL are
+# imported on first use, not at module import.
+
+from collections import Counter
+from datetime import datetime
+from functools import lru_cache
+
+from gardener import metrics
+from gardener.ical import CalendarEvent, iter_ical
+from gardener.pdfstream import MARGIN, PAGE_W, PageTemplate, TextFlow, image_file, qr_image, render, text_width
+from gardener.schedule import describe, schedule_for, when
+
+GARDEN_TITLE = "Jamie's Backyard Garden"
+LOGO_URL = "https://upload.wikimedia.org/wikipedia/commons/thumb/3/3f/Leaf_green.svg/2048px-Leaf_green.svg.png"
+
+# FPDF's core fonts are latin-1 only: swap the glyphs our guides use for
+# printable stand-ins instead of failing the whole export
+PDF_GLYPHS = str.maketrans({"–": "-", "—": "-", "’": "'", "•": "-", "⟳": "~", "🌱": "*", "🌼": "+", "⚠": "!", "\ufe0f": None})
+
+
+def pdf_text(text):
+    return text.translate(PDF_GLYPHS).encode("latin-1", "replace").decode("latin-1")
+
+
+ROW_BATCH = 256  # table rows laid out per batch
+BED_TEMPLATE = PageTemplate()
+
+
+# Variety guide pages share one template per title, logo and day: the header
+# and footer are rendered once, the logo encoded once per process
+@lru_cache(maxsize=16)
+def variety_template(garden_title, logo, day):
+    try:
+        image = image_file(logo) if logo else None
+    except OSError:  # unreachable URL or unreadable file: print without it
+        image = None
+    return PageTemplate(title=pdf_text(garden_title), subtitle="Seasonal Variety Guide", logo=image,
+                        footer=f"Generated on {day}")
+
+
+# (text, line height, font size, style, indent) lines for `rows` table rows at a time
+def variety_lines(df, schedule=None, rows=ROW_BATCH):
+    columns = [df[c].tolist() for c in ("Crop", "Season", "Variety", "Experience Level", "Organic")]
+    for start in range(0, len(df), rows):
+        batch = []
+        for crop, season, name, level, organic in zip(*(c[start:start + rows] for c in columns)):
+            batch.append((pdf_text(f"{crop} ({season}) - {name} | Level: {level} | Organic: {organic}"), 10, 12, "", 0))
+            if schedule:
+                for entry in schedule.for_variety(name):
+                    mark = "⟳" if entry.recurrence else "•"
+                    batch.append((pdf_text(f"{mark} {when(entry)}: {entry.task}"), 6, 10, "", 8))
+        yield batch
+
+
+# PDF Export; with a schedule, each variety is followed by its dated tasks.
+# Written page by page into `out` when given (returns the byte count),
+# otherwise returned as bytes.
+@metrics.timed("export.variety_pdf")
+def export_variety_pdf(df, garden_title=GARDEN_TITLE, logo=LOGO_URL, schedule=None, out=None):
+    def write(stream):
+        flow = TextFlow(stream, variety_template(garden_title, logo, datetime.today().strftime("%B %d, %Y")))
+        for batch in variety_lines(df, schedule):
+            flow.lines(batch)
+        return flow.close()
+
+    return render(write, out, title=pdf_text(garden_title))
+
+
+# iCal Export with live logic and recurring support: one event per task, and one
+# event with a native RRULE per recurring care rule, dated from the season
+# schedule. Tasks already over by the start date are left out; ones still
+# open, and care rules, begin on it.
+def task_events(catalog, start_date=None, frost_date=None):
+    if not start_date:
+        start_date = datetime.today()
+    start = start_date.date() if isinstance(start_date, datetime) else start_date
+    for entry in schedule_for(catalog, frost_date, start).entries:
+        if entry.until < start:
+            continue
+        begin = datetime.combine(max(entry.date, start), datetime.min.time())
+        if entry.recurrence:
+            description = f"Ongoing Task: {entry.task} for {entry.variety}"
+        else:
+            description = f"Gardening Task: {entry.task} for {entry.variety}"
+            if entry.until > entry.date:
+                description += f"\nWindow: {when(entry)}"
+        if describe(entry.anchor):
+            description += f"\n{describe(entry.anchor)}"
+        yield CalendarEvent(f"{entry.variety} – {entry.task}", begin, description, entry.recurrence)
+
+
+# Written chunk by chunk into `out` (a binary file) when given, returning the
+# byte count; otherwise returned as text
+@metrics.timed("export.task_ical")
+def export_task_ical(catalog, start_date=None, frost_date=None, out=None):
+    chunks = iter_ical(task_events(catalog, start_date, frost_date))
+    if out is None:
+        return "".join(chunks)
+    size = 0
+    for chunk in chunks:
+        size += out.write(chunk.encode("utf-8"))
+    return size
+
+
+# Lines for one bed: its rows once each, then one block per variety planted
+# (however many squares it fills) with its next tasks, care and companions
+def bed_lines(layout_df, catalog, companion_guide, schedule):
+    yield [(pdf_text(f"Row {i + 1}: " + " | ".join(cell if cell else "[Empty]" for cell in row)), 8, 10, "", 0)
+           for i, row in enumerate(layout_df.itertuples(index=False))]
+    squares = Counter(cell for column in layout_df for cell in layout_df[column].tolist() if cell)
+    batch = []
+    for name, count in squares.items():
+        batch.append((pdf_text(f"🌱 {name} ({count} square{'s' if count > 1 else ''})"), 7, 10, "B", 0))
+        if catalog.get(name):
+            entries = schedule.for_variety(name)
+            for e in [e for e in entries if not e.recurrence][:2]:
+                batch.append((pdf_text(f"• {when(e)}: {e.task}"), 6, 10, "", 4))
+            for e in [e for e in entries if e.recurrence][:1]:
+                batch.append((pdf_text(f"⟳ {when(e)}: {e.task}"), 6, 10, "", 4))
+        if companion_guide.get(name):
+            batch.append((pdf_text(f"🌼 Companion Plants: {', '.join(companion_guide[name])}"), 6, 10, "", 4))
+        if len(batch) >= ROW_BATCH:
+            yield batch
+            batch = []
+    yield batch
+
+
+# PDF Export with QR Code to iCal; the QR image is encoded once per URL.
+# Streams into `out` like export_variety_pdf.
+@metrics.timed("export.bed_pdf")
+def export_bed_layout_pdf_qr(layout_df, ical_url, catalog, companion_guide, schedule=None, out=None):
+    schedule = schedule or schedule_for(catalog)
+
+    def write(stream):
+        flow = TextFlow(stream, BED_TEMPLATE)
+        flow.text("Garden Bed Layout", h=10, align="C")
+        flow.gap(4)
+        rows, *plants = bed_lines(layout_df, catalog, companion_guide, schedule)
+        flow.lines(rows)
+        flow.gap(4)
+        for batch in plants:
+            flow.lines(batch)
+        flow.gap(5)
+        flow.text("Scan to import garden calendar:", h=8, style="B")
+        flow.image(qr_image(ical_url), x=80, w=50)
+        return flow.close()
+
+    return render(write, out, title="Garden Bed Layout")
+
+
+# Any DataFrame as a PDF table (seed orders, harvest timelines): each column as
+# wide as its label or longest cell in the first batch, the widest ones capped
+# to fit the page; numbers right-aligned, the header row repeated on every page
+def table_columns(cells, numeric, width=PAGE_W - 2 * MARGIN, size=9):
+    labels = [pdf_text(str(c)) for c in cells.columns]
+    sample = cells.iloc[:ROW_BATCH]
+    widths = [2 + max([text_width(label, size, "B"), *(text_width(v, size) for v in sample[c].tolist())])
+              for label, c in zip(labels, cells.columns)]
+    cap, rest = width, sorted(widths)
+    while rest and rest[0] <= cap:
+        width -= rest.pop(0)
+        cap = width / len(rest) if rest else cap
+    return labels, [min(w, cap) for w in widths], ["R" if n else "L" for n in numeric]
+
+
+@metrics.timed("export.table_pdf")
+def export_table_pdf(df, title, subtitle=None, out=None):
+    cells = df.apply(lambda c: c.dt.strftime("%b %d, %Y") if c.dtype.kind == "M" else c)
+    cells = cells.astype(object).where(cells.notna(), "").astype(str).map(pdf_text)
+    labels, widths, aligns = table_columns(cells, [df[c].dtype.kind in "iuf" for c in df.columns])
+    template = PageTemplate(title=pdf_text(title), subtitle=pdf_text(subtitle) if subtitle else None,
+                            footer=f"Generated on {datetime.today().strftime('%B %d, %Y')}",
+                            columns=(labels, widths, aligns))
+
+    def write(stream):
+        flow = TextFlow(stream, template)
+        for row in cells.itertuples(index=False):
+            flow.row(row, widths, aligns=aligns)
+        return flow.close()
+
+    return render(write, out, title=pdf_text(title))
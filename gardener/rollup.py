@@ -0,0 +1,279 @@
+# Seed-order and harvest rollups over any number of beds. Every bed's cells
+# are counted in one np.bincount (each bed's crop ids offset past the previous
+# beds' names), and the counts are mapped onto catalog-wide ids with one
+# lookup per distinct name per bed, never per cell, so thousands of beds roll
+# up in milliseconds. Counts are then joined against per-variety arrays built
+# once per catalog: plants per square from the spacing guide, how the variety
+# is started, seeds per plant, days to harvest.
+#
+# Beds may be BedGrids, saved plan tokens, or layouts (DataFrames or lists of
+# rows of names; these are converted cell by cell, so prefer grids or tokens
+# for large runs). Names missing from the catalog are still counted.
+#
+#   python -m gardener.rollup plans/*.txt --csv seed_order.csv --pdf seed_order.pdf
+#   python -m gardener.rollup customers.jsonl --zip 78701 --harvest-csv harvest.csv
+
+import argparse
+import re
+import sys
+from datetime import date, timedelta
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+from gardener import metrics
+from gardener.autolayout import CELL_INCHES, footprint
+from gardener.bed import BedGrid
+
+# Seeds to buy per plant wanted: direct-sown spots get three seeds and are
+# thinned to one; indoor starts allow for poor germination and culls. Slips
+# (and other vegetative starts) are bought as plants.
+SEEDS_PER_PLANT = {"direct sow": 3, "transplant": 2, "slips": 0, "not in catalog": 0}
+
+# Seed-order columns that fit a printed page
+PRINTED = ["Variety", "Crop", "Organic", "Propagation", "Beds", "Squares", "Plants", "Transplants", "Seeds"]
+
+_SLIPS = re.compile(r"\bslips?\b", re.IGNORECASE)
+_TRANSPLANT = re.compile(r"\b(?:transplant|start(?:ed)? seeds indoors|sow indoors)", re.IGNORECASE)
+# The task that puts the crop in the bed: sowing outdoors or setting out transplants
+_PLANTING = re.compile(r"\b(?:direct[- ]s(?:ow|eed)|sow\b(?! indoors)|transplant(?!ing)|set out)", re.IGNORECASE)
+_HARVEST = re.compile(r"\bharvest", re.IGNORECASE)
+
+
+# "18–24 inches apart" -> 0.25 plants per 12-inch square, "4–6 inches" -> 9;
+# the closest recommended spacing, as footprint() reads it
+def plants_per_square(spacing_text, cell_inches=CELL_INCHES):
+    match = re.search(r"\d+", spacing_text or "")
+    if not match or int(match.group()) == 0:
+        return 1.0
+    inches = int(match.group())
+    if inches >= cell_inches:
+        return 1.0 / footprint(spacing_text, cell_inches) ** 2
+    return float((cell_inches // inches) ** 2)
+
+
+def propagation(variety):
+    tasks = " ".join(variety.tasks)
+    if _SLIPS.search(tasks):
+        return "slips"
+    if _TRANSPLANT.search(tasks):
+        return "transplant"
+    return "direct sow"
+
+
+def as_grid(bed):
+    if isinstance(bed, BedGrid):
+        return bed
+    if isinstance(bed, str):
+        return BedGrid.from_token(bed.strip())
+    if isinstance(bed, pd.DataFrame):
+        bed = bed.astype(object).where(bed.notna(), "").to_numpy().tolist()
+    return BedGrid.from_layout(bed)
+
+
+class RollupIndex:
+    """Per-variety attributes of a catalog as arrays in catalog id order; build once per catalog."""
+
+    def __init__(self, catalog, spacing=None):
+        spacing = spacing or {}
+        varieties = catalog.varieties
+        self.catalog = catalog
+        self.names = [v.name for v in varieties]
+        self.ids = {}
+        for i, name in enumerate(self.names):
+            self.ids.setdefault(name, i)
+        self.spacing = np.array([spacing.get(name, "") for name in self.names], dtype=object)
+        self.per_square = np.array([plants_per_square(s) for s in self.spacing], dtype=float)
+        self.method = np.array([propagation(v) for v in varieties], dtype=object)
+        self.seeds_per_plant = np.array([SEEDS_PER_PLANT[m] for m in self.method], dtype=np.int64)
+        self.crop = np.array([v.crop for v in varieties], dtype=object)
+        self.season = np.array([v.season for v in varieties], dtype=object)
+        self.organic = np.array([v.organic for v in varieties], dtype=bool)
+        self.link = np.array([v.link for v in varieties], dtype=object)
+        self.days_to_harvest = np.array([v.days_to_harvest for v in varieties], dtype=np.int64)
+        self.harvest_weeks = np.array([v.harvest_weeks for v in varieties], dtype=np.int64)
+
+    def __len__(self):
+        return len(self.names)
+
+    # Attribute arrays for ids, with blanks for names outside the catalog
+    def take(self, attr, ids, fill):
+        values = getattr(self, attr)
+        known = ids < len(self)
+        out = np.full(len(ids), fill, dtype=values.dtype)
+        out[known] = values[ids[known]]
+        return out
+
+
+class Rollup:
+    """Per-variety square and bed counts over a set of beds, with the tables built from them."""
+
+    def __init__(self, index, names, squares, beds, bed_count, cell_count):
+        self.index = index
+        self.names = names  # catalog names, then names found only in the beds
+        self.squares = squares
+        self.beds = beds
+        self.bed_count = bed_count
+        self.cell_count = cell_count
+        self.ids = np.flatnonzero(squares)
+
+    def _plants(self):
+        per_square = self.index.take("per_square", self.ids, 1.0)
+        return np.ceil(self.squares[self.ids] * per_square - 1e-9).astype(np.int64)
+
+    # One row per variety planted: how many beds and squares, plants to grow,
+    # transplants to start or buy and seeds to order
+    def seed_order(self):
+        ids, plants = self.ids, self._plants()
+        method = self.index.take("method", ids, "not in catalog")
+        transplants = np.where(np.isin(method, ("transplant", "slips")), plants, 0)
+        return pd.DataFrame({
+            "Variety": np.asarray(self.names, dtype=object)[ids],
+            "Crop": self.index.take("crop", ids, ""),
+            "Season": self.index.take("season", ids, ""),
+            "Organic": np.where(self.index.take("organic", ids, False), "Yes", "No"),
+            "Propagation": method,
+            "Spacing": self.index.take("spacing", ids, ""),
+            "Beds": self.beds[ids],
+            "Squares": self.squares[ids],
+            "Plants": plants,
+            "Transplants": transplants,
+            "Seeds": plants * self.index.take("seeds_per_plant", ids, 0),
+            "Seed Link": self.index.take("link", ids, ""),
+        })
+
+    # Expected first and last harvest per variety planted: setting-out (or
+    # sowing) window from the schedule plus days to harvest, picking for
+    # harvest_weeks. Without days to harvest, the schedule's own harvest tasks
+    # are used if it has any.
+    def harvest_timeline(self, schedule):
+        first, last = [], []
+        for i in self.ids.tolist():
+            window = _harvest_window(self.names[i], i, self.index, schedule)
+            first.append(window[0] if window else pd.NaT)
+            last.append(window[1] if window else pd.NaT)
+        table = pd.DataFrame({
+            "Variety": np.asarray(self.names, dtype=object)[self.ids],
+            "Crop": self.index.take("crop", self.ids, ""),
+            "Beds": self.beds[self.ids],
+            "Plants": self._plants(),
+            "Harvest From": pd.to_datetime(pd.Series(first, dtype="object")),
+            "Harvest Until": pd.to_datetime(pd.Series(last, dtype="object")),
+        })
+        return table.sort_values(["Harvest From", "Variety"], na_position="last", kind="stable").reset_index(drop=True)
+
+
+# Expected harvest window of every catalog variety that has one, by name;
+# both arguments are long-lived cached objects, so this is kept per pair
+@lru_cache(maxsize=8)
+def harvest_windows(index, schedule):
+    windows = {}
+    for i, name in enumerate(index.names):
+        window = _harvest_window(name, i, index, schedule)
+        if window:
+            windows.setdefault(name, window)
+    return windows
+
+
+def _harvest_window(name, i, index, schedule):
+    entries = schedule.for_variety(name)
+    days = int(index.days_to_harvest[i]) if i < len(index) else 0
+    if days:
+        planting = [e for e in entries if not e.recurrence and _PLANTING.search(e.task)]
+        if planting:
+            e = planting[-1]
+            weeks = int(index.harvest_weeks[i]) or 1
+            return e.date + timedelta(days=days), e.until + timedelta(days=days, weeks=weeks)
+    harvest = [e for e in entries if _HARVEST.search(e.task)]
+    if harvest:
+        return min(e.date for e in harvest), max(e.until for e in harvest)
+    return None
+
+
+# All beds' cells in one array, each bed's crop ids shifted past the previous
+# beds' names, so one bincount counts every (bed, name) pair; those are then
+# mapped onto catalog ids in a single pass over the beds' name lists
+@metrics.timed("build.rollup")
+def rollup(beds, index):
+    grids = [as_grid(bed) for bed in beds]
+    names = [name for grid in grids for name in grid.names]
+    starts = np.cumsum([0] + [len(grid.names) for grid in grids])
+    cells = np.concatenate([grid.cells.ravel() for grid in grids]) if grids else np.zeros(0, dtype=np.uint16)
+    sizes = [grid.cells.size for grid in grids]
+    pairs = np.bincount(cells + np.repeat(starts[:-1], sizes), minlength=len(names))
+
+    extra = {}
+    ids = np.empty(len(names), dtype=np.int64)
+    for i, name in enumerate(names):
+        found = index.ids.get(name)
+        if found is None:
+            found = -1 if name == "" else len(index) + extra.setdefault(name, len(extra))
+        ids[i] = found
+    planted = (pairs > 0) & (ids >= 0)
+    size = len(index) + len(extra)
+    squares = np.bincount(ids[planted], weights=pairs[planted], minlength=size).astype(np.int64)
+    bed_hits = np.bincount(ids[planted], minlength=size)
+    return Rollup(index, index.names + list(extra), squares, bed_hits, len(grids), int(sum(sizes)))
+
+
+def _read_beds(paths):
+    beds = []
+    for path in paths:
+        if path.endswith((".jsonl", ".csv")):
+            from gardener.batch import read_manifest
+
+            for job in read_manifest(path):
+                if job.get("status") == "error":
+                    print(f"{path}: skipped {job['id']}: {job['error']}", file=sys.stderr)
+                elif job["layout"]:
+                    beds.append(job["layout"])
+        else:
+            with open(path, encoding="ascii") as f:
+                beds.append(f.read())
+    return beds
+
+
+def main(argv=None):
+    from gardener import reports
+    from gardener.catalog_store import DEFAULT_CATALOG, load
+    from gardener.frost import default_last_frost
+    from gardener.schedule import schedule_for
+    from gardener.zipindex import zip_index
+
+    parser = argparse.ArgumentParser(prog="python -m gardener.rollup", description="Seed order and harvest rollup")
+    parser.add_argument("sources", nargs="+", help="saved plan files, or batch manifests (.jsonl/.csv) with layouts")
+    parser.add_argument("--catalog", default=DEFAULT_CATALOG)
+    parser.add_argument("--zip", help="ZIP for the frost date (default: the built-in March 15)")
+    parser.add_argument("--start", type=date.fromisoformat, help="season start, YYYY-MM-DD (default: today)")
+    parser.add_argument("--csv", help="seed order as CSV")
+    parser.add_argument("--pdf", help="seed order as PDF")
+    parser.add_argument("--harvest-csv", help="harvest timeline as CSV")
+    parser.add_argument("--harvest-pdf", help="harvest timeline as PDF")
+    args = parser.parse_args(argv)
+
+    data = load(catalog=args.catalog)
+    try:
+        result = rollup(_read_beds(args.sources), RollupIndex(data.catalog, data.spacing))
+    except (OSError, ValueError) as exc:
+        sys.exit(f"error: {exc}")
+    frost = zip_index().frost_estimate(args.zip) if args.zip else None
+    frost = date(date.today().year, *frost) if frost else default_last_frost()
+    orders = result.seed_order()
+    timeline = result.harvest_timeline(schedule_for(data.catalog, frost, args.start))
+    for path, table, title in ((args.csv, orders, None), (args.harvest_csv, timeline, None),
+                               (args.pdf, orders, "Seed Order"), (args.harvest_pdf, timeline, "Harvest Timeline")):
+        if path and title:
+            with open(path, "wb") as f:
+                reports.export_table_pdf(table[PRINTED] if table is orders else table, title,
+                                         f"{result.bed_count} beds, {args.catalog} catalog", out=f)
+        elif path:
+            table.to_csv(path, index=False)
+    if not any((args.csv, args.pdf, args.harvest_csv, args.harvest_pdf)):
+        print(orders.drop(columns=["Seed Link"]).to_string(index=False))
+    seeds, plants = int(orders["Seeds"].sum()), int(orders["Plants"].sum())
+    print(f"{result.bed_count} beds, {len(orders)} varieties, {plants:,} plants, {seeds:,} seeds", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,335 @@
+# Season schedule: every variety's task and care text is parsed once into an
+# anchor ("6 weeks before last frost", "mid-January", "10 days before
+# transplanting", or "some time after the previous task" for things like
+# "Thin seedlings"), and the dates for a whole catalog are then computed with
+# numpy datetime64 arithmetic, for one planting or for thousands of
+# (last frost, start date) pairs at once. The task calendar, the monthly view
+# and the PDFs all read the same Schedule.
+
+import calendar
+import re
+from collections import namedtuple
+from datetime import date, datetime
+from functools import lru_cache
+
+import numpy as np
+
+from gardener import metrics
+from gardener.ical import parse_recurrence
+
+FROST, FIXED, START, AFTER = range(4)  # anchor kinds
+
+# offset: days from the frost date / the start date / the referenced task;
+# month and day: for FIXED, and for FROST the earliest date when the task
+# names a month; window: days the task can slip past its date;
+# ref: "previous" or "transplant" for AFTER
+Anchor = namedtuple("Anchor", "kind offset month day window ref", defaults=(0, 0, 0, None))
+
+# One dated task or care rule; `until` ends the window (a care rule's last repeat)
+ScheduledTask = namedtuple("ScheduledTask", "variety task date until anchor recurrence")
+
+CARE_REPEATS = 6  # matches the calendar's RRULE COUNT
+FREQUENCY_DAYS = {"DAILY": 1, "WEEKLY": 7, "MONTHLY": 30}
+
+_MONTHS = {name.lower(): i for i, name in enumerate(calendar.month_name) if name}
+_MONTHS.update({name.lower(): i for i, name in enumerate(calendar.month_abbr) if name})
+_SEASONS = {"winter": 12, "spring": 3, "summer": 6, "fall": 9, "autumn": 9}
+_PARTS = {"early": 0, "mid": 1, "late": 2}
+
+_SPAN = r"(\d+)(?:\s*[–—-]\s*(\d+))?\s*(day|week)s?\s+(before|after)\s+"
+_FROST_SPAN = re.compile(_SPAN + r"(?:the\s+)?(?:last\s+)?frost")
+_TRANSPLANT_SPAN = re.compile(_SPAN + r"transplant")
+_AFTER_FROST = re.compile(r"\bafter\s+(?:the\s+)?(?:last\s+)?frost")
+_UPON_TRANSPLANT = re.compile(r"\b(?:upon|at|when)\s+transplant")
+# Full month names date a task anywhere in its text. "May", abbreviations and
+# seasons are ordinary words too ("plants may crowd", "mar the leaves", "may
+# fall over"), so they need a lead-in: "in May", "by Jan", "late fall".
+_FULL_MONTHS = [name.lower() for name in calendar.month_name if name and name != "May"]
+_LEAD_WORDS = sorted(set(_MONTHS) - set(_FULL_MONTHS), key=len, reverse=True) + list(_SEASONS)
+_WHEN = re.compile(r"\b(?:(early|mid|late)[\s-]+)?(" + "|".join(_FULL_MONTHS) + r")\b"
+                   r"|\b(?:(early|mid|late)[\s-]+|(?:in|by|from|until|through|during)\s+)(" + "|".join(_LEAD_WORDS) + r")\b")
+_TRANSPLANT = re.compile(r"\btransplant")
+_PLANTING = re.compile(r"\b(?:sow|seed|plant)")
+
+# Unanchored follow-ups ("Thin seedlings", "Harvest when pods...") land this
+# many days after the task before them
+FOLLOW_UP_DAYS = (("thin", 14), ("harden", 7), ("stake", 0), ("hill", 30), ("side-dress", 42),
+                  ("harvest", 56), ("transplant", 42))
+DEFAULT_FOLLOW_UP = 14
+
+
+def _span(match):
+    low, high, unit, side = match.groups()
+    scale = 7 if unit == "week" else 1
+    low, high = int(low) * scale, int(high or low) * scale
+    return (-high, high - low) if side == "before" else (low, high - low)
+
+
+# (month, first day, last day) of a month or season phrase, e.g. "late January"
+# or "mid-summer" (the middle month of the season)
+def _when(part, word):
+    part = part or None
+    if word in _SEASONS:
+        month = (_SEASONS[word] + (_PARTS[part] if part else 0) - 1) % 12 + 1
+        last = (month + (0 if part else 2) - 1) % 12 + 1
+        return month, 1, last, calendar.monthrange(2001, last)[1]
+    month = _MONTHS[word]
+    length = calendar.monthrange(2001, month)[1]
+    first, end = {None: (1, length), "early": (1, 10), "mid": (11, 20), "late": (21, length)}[part]
+    return month, first, month, end
+
+
+# (part, month or season word) of every month or season phrase in a text
+def _phrases(lower):
+    return [(part or lead_part, month or word) for part, month, lead_part, word in _WHEN.findall(lower)]
+
+
+# A frost-timed task that names a month ("after last frost in March") isn't
+# dated before the start of that month, or the part of it named
+def _no_earlier(anchor, lower):
+    found = _phrases(lower)
+    if not found:
+        return anchor
+    month, day, _, _ = _when(*found[0])
+    return anchor._replace(month=month, day=day)
+
+
+@lru_cache(maxsize=4096)
+def parse_task(text):
+    lower = text.lower()
+    match = _FROST_SPAN.search(lower)
+    if match:
+        offset, window = _span(match)
+        return _no_earlier(Anchor(FROST, offset, window=window), lower)
+    match = _TRANSPLANT_SPAN.search(lower)
+    if match:
+        offset, window = _span(match)
+        return Anchor(AFTER, offset, window=window, ref="transplant")
+    if _UPON_TRANSPLANT.search(lower):
+        return Anchor(AFTER, 0, ref="transplant")
+    if _AFTER_FROST.search(lower):
+        return _no_earlier(Anchor(FROST, 1), lower)
+    found = _phrases(lower)
+    if found:
+        month, day, last_month, last_day = _when(*found[0])
+        if len(found) > 1:  # "in July or early August"
+            _, _, last_month, last_day = _when(*found[-1])
+        first = date(2001, month, day)
+        end = date(2001 + (last_month < month), last_month, last_day)
+        return Anchor(FIXED, 0, month, day, (end - first).days)
+    gap = next((days for word, days in FOLLOW_UP_DAYS if lower.startswith(word)), DEFAULT_FOLLOW_UP)
+    return Anchor(AFTER, gap, ref="previous")
+
+
+def describe(anchor):
+    if anchor.kind == FROST:
+        weeks = -anchor.offset // 7
+        if anchor.offset > 0:
+            return "⚠️ Scheduled after estimated last frost."
+        if anchor.offset % 7 == 0:
+            return f"Scheduled {weeks} week{'s' * (weeks != 1)} before estimated last frost."
+        return f"Scheduled {-anchor.offset} days before estimated last frost."
+    if anchor.ref == "transplant":
+        return "Timed from transplanting (the day after estimated last frost unless the guide says otherwise)."
+    return ""
+
+
+class TaskPlan:
+    """Every task and care rule of a catalog as flat anchor arrays.
+
+    Built once per catalog; dates() resolves them for any number of plantings.
+    """
+
+    def __init__(self, catalog):
+        rows = []  # (variety, text, anchor, recurrence)
+        refs = []
+        for v in catalog:
+            first = len(rows)
+            anchors = [parse_task(t) for t in v.tasks]
+            transplant = next((first + i for i, (t, a) in enumerate(zip(v.tasks, anchors))
+                               if _TRANSPLANT.search(t.lower()) and a.ref != "transplant"), None)
+            if transplant is not None and anchors[transplant - first].ref == "previous":
+                anchors[transplant - first] = Anchor(FROST, 1)  # "Transplant seedlings": the default day
+            for i, (task, anchor) in enumerate(zip(v.tasks, anchors)):
+                if anchor.ref == "previous" and i == 0:
+                    anchor = Anchor(START, 0, window=anchor.window)
+                rows.append((v.name, task, anchor, None))
+                refs.append(self._ref(anchor, first + i - 1, transplant))
+
+            # Care starts with the task it shares a verb with ("Harvest every 2–3
+            # days" with "Harvest when..."), else at planting out
+            planted = transplant
+            if planted is None and any(a.ref == "transplant" for a in anchors):
+                planted = -1
+            if planted is None:
+                planted = next((first + i for i, t in enumerate(v.tasks) if _PLANTING.search(t.lower())),
+                               first if v.tasks else None)
+            for rule in v.recurring:
+                verb = rule.split()[0].lower() if rule.split() else ""
+                same = next((first + i for i, t in enumerate(v.tasks) if t.lower().startswith(verb)), None)
+                anchor_row = same if same is not None else planted
+                if anchor_row is None:
+                    anchor = Anchor(START, 0)
+                elif anchor_row == -1:
+                    anchor = Anchor(FROST, 1)
+                else:
+                    anchor = Anchor(AFTER, 0, ref="previous")
+                rows.append((v.name, rule, anchor, parse_recurrence(rule)))
+                refs.append(anchor_row if anchor.kind == AFTER else -1)
+
+        self.variety = [r[0] for r in rows]
+        self.text = [r[1] for r in rows]
+        self.anchors = [r[2] for r in rows]
+        self.recurrence = [r[3] for r in rows]
+        self.kind = np.array([a.kind for a in self.anchors], dtype=np.int8)
+        self.offset = np.array([a.offset for a in self.anchors], dtype=np.int64).astype("timedelta64[D]")
+        self.month = np.array([a.month or 1 for a in self.anchors], dtype=np.int64).astype("timedelta64[M]")
+        self.day = np.array([(a.day or 1) - 1 for a in self.anchors], dtype=np.int64).astype("timedelta64[D]")
+        self.window = np.array([a.window for a in self.anchors], dtype=np.int64).astype("timedelta64[D]")
+        self.bounded = np.array([a.kind == FROST and a.month > 0 for a in self.anchors], dtype=bool)
+        self.ref = np.array(refs, dtype=np.int64)
+
+        # Rows that depend on other rows, grouped so each group only reads
+        # rows resolved before it
+        depth = np.zeros(len(rows), dtype=np.int64)
+        for i in range(len(rows)):
+            r = i
+            while self.ref[r] >= 0:
+                r = self.ref[r]
+                depth[i] += 1
+        self.levels = [np.flatnonzero(depth == d) for d in range(1, int(depth.max(initial=0)) + 1)]
+
+        # A care rule's last repeat
+        self.span = np.array([
+            FREQUENCY_DAYS[r.freq] * r.interval * (CARE_REPEATS - 1) if r else 0 for r in self.recurrence
+        ], dtype=np.int64).astype("timedelta64[D]")
+        # Days from each row's date to the end of its window or last repeat
+        self.length = np.where(np.array([r is not None for r in self.recurrence], dtype=bool), self.span, self.window)
+
+    @staticmethod
+    def _ref(anchor, previous, transplant):
+        if anchor.kind != AFTER:
+            return -1
+        if anchor.ref == "transplant":
+            return -1 if transplant is None else transplant
+        return previous
+
+    def __len__(self):
+        return len(self.text)
+
+    # Dates for every (frost, start) planting: a (plantings, rows) datetime64[D]
+    # array. Fixed dates, and the earliest dates of frost-timed rows that name
+    # a month, fall in the frost date's year; rows timed from a transplant
+    # with no transplant task of their own use the day after frost.
+    def dates(self, frost, start):
+        frost = np.atleast_1d(np.asarray(frost, dtype="datetime64[D]"))
+        start = np.broadcast_to(np.asarray(start, dtype="datetime64[D]"), frost.shape)
+        out = np.empty((frost.size, len(self)), dtype="datetime64[D]")
+
+        frost_rows = (self.kind == FROST) | ((self.kind == AFTER) & (self.ref < 0))
+        extra = np.where(self.kind == AFTER, np.timedelta64(1, "D"), np.timedelta64(0, "D"))
+        out[:, frost_rows] = frost[:, None] + (self.offset + extra)[frost_rows]
+        rows = self.kind == START
+        out[:, rows] = start[:, None] + self.offset[rows]
+        rows = (self.kind == FIXED) | self.bounded
+        january = frost.astype("datetime64[Y]").astype("datetime64[M]")
+        named = (january[:, None] + self.month[rows] - np.timedelta64(1, "M")).astype("datetime64[D]") + self.day[rows]
+        out[:, rows] = np.where(self.bounded[rows], np.maximum(out[:, rows], named), named)
+        for level in self.levels:
+            out[:, level] = out[:, self.ref[level]] + self.offset[level]
+        return out
+
+    def schedule(self, frost, start):
+        return Schedule(self, self.dates(_day(frost), _day(start))[0])
+
+
+def _day(value):
+    if isinstance(value, datetime):
+        value = value.date()
+    return np.datetime64(value, "D")
+
+
+class Schedule:
+    """One planting's dated tasks, sorted by date."""
+
+    def __init__(self, plan, dates):
+        ends = dates + plan.length
+        self.entries = [
+            ScheduledTask(plan.variety[i], plan.text[i], dates[i].item(), ends[i].item(), plan.anchors[i],
+                          plan.recurrence[i])
+            for i in np.argsort(dates, kind="stable")
+        ]
+        self._by_variety = {}
+        for entry in self.entries:
+            self._by_variety.setdefault(entry.variety, []).append(entry)
+
+    def for_variety(self, name):
+        return self._by_variety.get(name, [])
+
+    # Entries whose window overlaps first..last (inclusive), by variety
+    def between(self, first, last):
+        found = {}
+        for entry in self.entries:
+            if entry.date > last:
+                break
+            if entry.until >= first:
+                found.setdefault(entry.variety, []).append(entry)
+        return found
+
+    def month(self, year, month):
+        return self.between(date(year, month, 1), date(year, month, calendar.monthrange(year, month)[1]))
+
+
+def when(entry):
+    if entry.recurrence:
+        return f"from {entry.date:%b %d}"
+    if entry.until > entry.date:
+        return f"{entry.date:%b %d} – {entry.until:%b %d}"
+    return f"{entry.date:%b %d}"
+
+
+@lru_cache(maxsize=8)
+@metrics.timed("build.task_plan")
+def task_plan(catalog):
+    return TaskPlan(catalog)
+
+
+# Shared across reruns and sessions: the same ZIP and start date reuse one Schedule
+@lru_cache(maxsize=256)
+@metrics.timed("build.schedule")
+def season_schedule(catalog, frost, start):
+    return task_plan(catalog).schedule(frost, start)
+
+
+# The last frost of the season a start date plans for: the frost's month and
+# day in the first of the start's previous, own and next year whose schedule
+# still has a task or care window open on or after the start date. A start
+# date after this year's season has ended plans next year's.
+@lru_cache(maxsize=256)
+def season_frost(catalog, frost, start):
+    plan = task_plan(catalog)
+    frosts = [_in_year(frost, year) for year in (start.year - 1, start.year, start.year + 1)]
+    if not len(plan):
+        return frosts[1]
+    ends = plan.dates(frosts, start) + plan.length
+    open_ = (ends >= np.datetime64(start, "D")).any(axis=1)
+    return frosts[int(np.argmax(open_))] if open_.any() else frosts[-1]
+
+
+def _in_year(day, year):
+    try:
+        return day.replace(year=year)
+    except ValueError:  # February 29
+        return day.replace(year=year, day=28)
+
+
+def schedule_for(catalog, frost_date=None, start_date=None):
+    from gardener.frost import default_last_frost
+
+    frost = _as_date(frost_date or default_last_frost())
+    start = _as_date(start_date or datetime.today())
+    return season_schedule(catalog, season_frost(catalog, frost, start), start)
+
+
+def _as_date(value):
+    return value.date() if isinstance(value, datetime) else value
@@ -0,0 +1,48 @@
+# Columnar variety table: built once per catalog with categorical crop/season/
+# level columns and a boolean organic column; every filter is a vectorized mask.
+
+import numpy as np
+import pandas as pd
+
+from gardener import metrics
+
+CATEGORICAL_COLUMNS = {"crop": "Crop", "season": "Season", "level": "Experience Level"}
+
+
+@metrics.timed("build.variety_table")
+def build_variety_table(catalog):
+    varieties = catalog.varieties
+    return pd.DataFrame({
+        "Crop": pd.Categorical([v.crop for v in varieties]),
+        "Season": pd.Categorical([v.season for v in varieties]),
+        "Variety": [v.name for v in varieties],
+        "Experience Level": pd.Categorical([v.level for v in varieties]),
+        "Organic": np.fromiter((v.organic for v in varieties), dtype=bool, count=len(varieties)),
+        "Seed Link": [v.link for v in varieties],
+    })
+
+
+# Compare category codes instead of strings; an unknown value matches nothing
+def _category_mask(column, value):
+    categories = column.cat.categories
+    if value not in categories:
+        return np.zeros(len(column), dtype=bool)
+    return column.cat.codes.to_numpy() == categories.get_loc(value)
+
+
+# None means "don't filter on this field"
+def variety_mask(table, crop=None, season=None, level=None, organic=None):
+    mask = np.ones(len(table), dtype=bool)
+    for field, value in (("crop", crop), ("season", season), ("level", level)):
+        if value is not None:
+            mask &= _category_mask(table[CATEGORICAL_COLUMNS[field]], value)
+    if organic is not None:
+        mask &= table["Organic"].to_numpy() == organic
+    return mask
+
+
+# Filtered rows as shown and exported: Organic rendered as Yes/No, plain index
+def display_table(table, mask):
+    rows = table[mask].reset_index(drop=True)
+    rows["Organic"] = np.where(rows["Organic"].to_numpy(), "Yes", "No")
+    return rows
@@ -0,0 +1,107 @@
+# WeatherAPI client: pooled HTTP session, hard timeouts and a circuit breaker so
+# a slow or failing API can't stall page runs
+
+import os
+import threading
+import time
+from datetime import datetime
+
+from gardener import metrics
+
+# Overridable so the app and benchmarks can point at a local stub server
+WEATHERAPI_URL = os.environ.get("WEATHERAPI_URL", "http://api.weatherapi.com/v1/forecast.json")
+
+
+class CircuitOpenError(RuntimeError):
+    pass
+
+
+class CircuitBreaker:
+    """Opens after `failure_threshold` consecutive failures; lets one probe through after `reset_timeout`."""
+
+    def __init__(self, failure_threshold=3, reset_timeout=60, clock=time.monotonic):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.clock = clock
+        self.failures = 0
+        self.opened_at = None
+        self._probing = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        if self.opened_at is None:
+            return "closed"
+        if self.clock() - self.opened_at >= self.reset_timeout:
+            return "half-open"
+        return "open"
+
+    def allow(self):
+        with self._lock:
+            state = self.state
+            if state == "closed":
+                return True
+            if state == "half-open" and not self._probing:
+                self._probing = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self._probing = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            self._probing = False
+            if self.failures >= self.failure_threshold:
+                self.opened_at = self.clock()
+
+
+class WeatherClient:
+    def __init__(self, api_key, base_url=None, timeout=(2, 5), breaker=None, pool_size=8):
+        import requests
+        from requests.adapters import HTTPAdapter
+
+        self.api_key = api_key
+        self.base_url = base_url or WEATHERAPI_URL
+        self.timeout = timeout
+        self.breaker = breaker or CircuitBreaker()
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    # First forecast day with a safe overnight low, or None if the forecast has none
+    def forecast_frost(self, zip_code):
+        if not self.api_key:
+            return None
+        if not self.breaker.allow():
+            raise CircuitOpenError(f"WeatherAPI circuit open, skipping lookup for {zip_code}")
+        metrics.count("http.requests", service="weatherapi")
+        try:
+            with metrics.span("fetch.weather"):
+                res = self.session.get(
+                    self.base_url,
+                    params={"key": self.api_key, "q": zip_code, "days": 10},
+                    timeout=self.timeout,
+                )
+                res.raise_for_status()
+                frost = _frost_from_payload(res.json())
+        # A 200 with a malformed or partial body counts against the breaker too
+        except Exception:
+            metrics.count("http.errors", service="weatherapi")
+            self.breaker.record_failure()
+            raise
+        self.breaker.record_success()
+        return frost
+
+
+# First forecast day with a low above 36°F (conservative buffer against frost);
+# every day is read first, so a payload with any malformed day raises
+def _frost_from_payload(data):
+    days = [(datetime.strptime(day["date"], "%Y-%m-%d"), float(day["day"]["mintemp_f"]))
+            for day in data["forecast"]["forecastday"]]
+    return next((day for day, low in days if low > 36), None)
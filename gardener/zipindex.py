@@ -0,0 +1,257 @@
+# ZIP -> USDA hardiness zone and median last spring frost, as a sorted
+# fixed-width binary file that is memory-mapped rather than parsed: opening it
+# costs a few microseconds, and every worker process of a server shares the
+# same page-cache copy. Lookups are binary searches (np.searchsorted), one ZIP
+# or a whole batch at a time.
+#
+# ZIPs missing from the index fall back to the summary of their 3-digit prefix
+# (most common zone, median frost date), then to the nearest prefix that has
+# one, within `max_gap` prefixes.
+#
+# File layout (little-endian), columns stored one after another so each is a
+# contiguous, aligned array:
+#   header  "GZIX", version u16, reserved u16, ZIP count n u32, prefix count m u32
+#   zips u4[n] (sorted) | prefixes u2[m] (sorted)
+#   frost u2[n] | prefix frost u2[m]     day of year in a non-leap year, 0 = unknown
+#   zone u1[n]  | prefix zone u1[m]      2 * number + (1 for "b"), 0 = unknown
+#
+# Build or rebuild it from CSVs with zip (or zipcode), zone and/or last_frost
+# (MM-DD) columns, e.g. the USDA hardiness-zone-by-ZIP table plus a frost
+# climatology; later files fill fields the earlier ones left empty:
+#
+#   python -m gardener.zipindex build gardener/data/frost_climatology.csv
+#   python -m gardener.zipindex lookup 77001 78759 10001
+
+import argparse
+import csv
+import mmap
+import os
+import re
+import struct
+import sys
+from collections import Counter, namedtuple
+from datetime import date, timedelta
+from functools import lru_cache
+
+import numpy as np
+
+from gardener.config import DATA_DIR
+
+ZIP_INDEX = os.path.join(DATA_DIR, "zip_index.bin")
+SOURCE_CSV = os.path.join(DATA_DIR, "frost_climatology.csv")
+VERSION = 1
+_HEADER = struct.Struct("<4sHHII")
+_MAGIC = b"GZIX"
+
+EXACT, PREFIX, NEAREST = "exact", "zip3", "nearest"
+_SOURCES = (None, EXACT, PREFIX, NEAREST)
+
+# zone like "8b" (None if unknown), last_frost as (month, day) (None if unknown),
+# source: which fallback answered
+ZipClimate = namedtuple("ZipClimate", "zip zone last_frost source")
+
+_ZIP = re.compile(r"^\s*(\d{5})(?:-\d{4})?\s*$")
+_ZONE = re.compile(r"^\s*(\d{1,2})\s*([ab])\s*$", re.IGNORECASE)
+
+
+def zone_code(zone):
+    match = _ZONE.match(zone or "")
+    return 2 * int(match.group(1)) + (match.group(2).lower() == "b") if match else 0
+
+
+def zone_name(code):
+    return f"{code // 2}{'ab'[code % 2]}" if code else None
+
+
+def frost_code(month_day):
+    if not month_day or not month_day.strip():
+        return 0
+    month, day = (int(x) for x in month_day.split("-"))
+    return (date(2001, month, day) - date(2001, 1, 1)).days + 1
+
+
+def frost_month_day(code):
+    if not code:
+        return None
+    d = date(2001, 1, 1) + timedelta(days=int(code) - 1)
+    return d.month, d.day
+
+
+def _zip_number(zip_code):
+    match = _ZIP.match(str(zip_code or ""))
+    return int(match.group(1)) if match else -1
+
+
+def _column(row, *names):
+    for name in names:
+        if row.get(name):
+            return row[name].strip()
+    return ""
+
+
+# {zip: [zone code, frost code]} merged over the source CSVs
+def read_sources(paths):
+    merged = {}
+    for path in paths:
+        with open(path, newline="", encoding="utf-8") as f:
+            for row in csv.DictReader(f):
+                number = _zip_number(_column(row, "zip", "zipcode", "zcta"))
+                if number < 0:
+                    continue
+                entry = merged.setdefault(number, [0, 0])
+                entry[0] = entry[0] or zone_code(_column(row, "zone"))
+                entry[1] = entry[1] or frost_code(_column(row, "last_frost"))
+    return merged
+
+
+def build(records, path=ZIP_INDEX):
+    zips = np.array(sorted(records), dtype="<u4")
+    zone = np.array([records[z][0] for z in zips.tolist()], dtype="u1")
+    frost = np.array([records[z][1] for z in zips.tolist()], dtype="<u2")
+
+    # Per-prefix summary: most common known zone, median known frost day
+    prefixes, starts = np.unique(zips // 100, return_index=True)
+    bounds = np.append(starts, len(zips))
+    prefix_zone = np.zeros(len(prefixes), dtype="u1")
+    prefix_frost = np.zeros(len(prefixes), dtype="<u2")
+    for i, (lo, hi) in enumerate(zip(bounds[:-1], bounds[1:])):
+        zones = zone[lo:hi][zone[lo:hi] > 0]
+        frosts = frost[lo:hi][frost[lo:hi] > 0]
+        if len(zones):
+            prefix_zone[i] = Counter(zones.tolist()).most_common(1)[0][0]
+        if len(frosts):
+            prefix_frost[i] = int(np.median(frosts))
+
+    with open(path + ".part", "wb") as f:
+        f.write(_HEADER.pack(_MAGIC, VERSION, 0, len(zips), len(prefixes)))
+        for column in (zips, prefixes.astype("<u2"), frost, prefix_frost, zone, prefix_zone):
+            f.write(column.tobytes())
+    os.replace(path + ".part", path)
+    return len(zips), len(prefixes)
+
+
+class ZipIndex:
+    """Read-only view over a zip_index.bin; safe to share between threads."""
+
+    def __init__(self, path=ZIP_INDEX, max_gap=10):
+        self.path = path
+        self.max_gap = max_gap
+        with open(path, "rb") as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            magic, version, _, n, m = _HEADER.unpack_from(self._map)
+        except struct.error:
+            raise ValueError(f"{path}: not a ZIP index") from None
+        if magic != _MAGIC or version != VERSION:
+            raise ValueError(f"{path}: not a version {VERSION} ZIP index")
+        if len(self._map) != _HEADER.size + 7 * n + 5 * m:
+            raise ValueError(f"{path}: truncated ZIP index")
+        offset = _HEADER.size
+        columns = []
+        for dtype, count in (("<u4", n), ("<u2", m), ("<u2", n), ("<u2", m), ("u1", n), ("u1", m)):
+            columns.append(np.frombuffer(self._map, dtype=dtype, count=count, offset=offset))
+            offset += np.dtype(dtype).itemsize * count
+        self.zips, self.prefixes, self.frost, self.prefix_frost, self.zone, self.prefix_zone = columns
+
+    def __len__(self):
+        return len(self.zips)
+
+    # Mapping-style access to exact entries only: (month, day) of last frost
+    def get(self, zip_code, default=None):
+        number = _zip_number(zip_code)
+        i = int(np.searchsorted(self.zips, number))
+        if number >= 0 and i < len(self.zips) and self.zips[i] == number and self.frost[i]:
+            return frost_month_day(self.frost[i])
+        return default
+
+    def __contains__(self, zip_code):
+        return self.get(zip_code) is not None
+
+    def __getitem__(self, zip_code):
+        hit = self.get(zip_code)
+        if hit is None:
+            raise KeyError(zip_code)
+        return hit
+
+    # Vectorized lookup: (zone codes, frost codes, source codes) arrays, each
+    # field falling back independently from exact to prefix to nearest prefix
+    def lookup_codes(self, zip_codes):
+        numbers = np.array([_zip_number(z) for z in zip_codes], dtype=np.int64)
+        zone = np.zeros(len(numbers), dtype="u1")
+        frost = np.zeros(len(numbers), dtype="<u2")
+        source = np.zeros(len(numbers), dtype="u1")
+        valid = numbers >= 0
+        if not len(self.zips) or not valid.any():
+            return zone, frost, source
+
+        i = np.minimum(np.searchsorted(self.zips, numbers), len(self.zips) - 1)
+        exact = valid & (self.zips[i] == numbers)
+        zone[exact], frost[exact], source[exact] = self.zone[i[exact]], self.frost[i[exact]], 1
+
+        prefix = numbers // 100
+        j = np.minimum(np.searchsorted(self.prefixes, prefix), len(self.prefixes) - 1)
+        left = np.maximum(j - 1, 0)
+        closer = np.abs(self.prefixes[left].astype(np.int64) - prefix) < np.abs(self.prefixes[j].astype(np.int64) - prefix)
+        nearest = np.where(closer, left, j)
+        gap = np.abs(self.prefixes[nearest].astype(np.int64) - prefix)
+        for level, rows in ((2, valid & (gap == 0)), (3, valid & (gap > 0) & (gap <= self.max_gap))):
+            need_zone = rows & (zone == 0)
+            need_frost = rows & (frost == 0)
+            zone[need_zone] = self.prefix_zone[nearest[need_zone]]
+            frost[need_frost] = self.prefix_frost[nearest[need_frost]]
+            source[(source == 0) & rows & ((zone > 0) | (frost > 0))] = level
+        return zone, frost, source
+
+    def lookup_many(self, zip_codes):
+        zip_codes = list(zip_codes)
+        zone, frost, source = self.lookup_codes(zip_codes)
+        return [ZipClimate(z, zone_name(a), frost_month_day(b), _SOURCES[c])
+                for z, a, b, c in zip(zip_codes, zone.tolist(), frost.tolist(), source.tolist())]
+
+    def lookup(self, zip_code):
+        return self.lookup_many([zip_code])[0]
+
+    # Best (month, day) estimate including the prefix fallbacks
+    def frost_estimate(self, zip_code):
+        return self.lookup(zip_code).last_frost
+
+
+# One mapping per process; the pages behind it are shared between processes
+@lru_cache(maxsize=None)
+def zip_index(path=ZIP_INDEX):
+    return ZipIndex(path)
+
+
+def usda_zone(zip_code):
+    return zip_index().lookup(zip_code).zone
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m gardener.zipindex", description="ZIP climate index")
+    commands = parser.add_subparsers(dest="command", required=True)
+    build_cmd = commands.add_parser("build", help="build the index from CSV sources")
+    build_cmd.add_argument("sources", nargs="*", default=[SOURCE_CSV])
+    build_cmd.add_argument("--out", default=ZIP_INDEX)
+    lookup_cmd = commands.add_parser("lookup", help="look up ZIPs (arguments, or one per line from a file)")
+    lookup_cmd.add_argument("zips", nargs="*")
+    lookup_cmd.add_argument("--file")
+    lookup_cmd.add_argument("--index", default=ZIP_INDEX)
+    args = parser.parse_args(argv)
+
+    if args.command == "build":
+        n, m = build(read_sources(args.sources), args.out)
+        print(f"{args.out}: {n} ZIPs in {m} prefixes, {os.path.getsize(args.out):,} bytes")
+        return
+    zips = list(args.zips)
+    if args.file:
+        with open(args.file, encoding="utf-8") as f:
+            zips += [line.strip() for line in f if line.strip()]
+    writer = csv.writer(sys.stdout)
+    writer.writerow(["zip", "zone", "last_frost", "source"])
+    for hit in ZipIndex(args.index).lookup_many(zips):
+        frost = f"{hit.last_frost[0]:02d}-{hit.last_frost[1]:02d}" if hit.last_frost else ""
+        writer.writerow([hit.zip, hit.zone or "", frost, hit.source or ""])
+
+
+if __name__ == "__main__":
+    main()
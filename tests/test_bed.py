@@ -0,0 +1,29 @@
+import numpy as np
+import pytest
+
+from gardener.bed import BedGrid
+
+
+def _random_grid(rows, cols, names, seed=0):
+    rng = np.random.default_rng(seed)
+    return BedGrid.from_ids(rng.integers(0, len(names), size=(rows, cols)).astype(np.uint16), names)
+
+
+@pytest.mark.parametrize("grid", [
+    BedGrid(4, 6),
+    BedGrid.from_layout([["Okra"] * 100] * 100),  # a few long runs: run-length encoded
+    _random_grid(20, 40, [""] + [f"Crop {i}" for i in range(30)]),  # short runs: raw ids
+    _random_grid(10, 10, [""] + [f"Crop {i}" for i in range(300)]),  # more names than fit a byte
+])
+def test_token_round_trips_the_layout(grid):
+    assert BedGrid.from_token(grid.to_token()).to_layout() == grid.to_layout()
+
+
+def test_uniform_bed_token_stays_short():
+    assert len(BedGrid.from_layout([["Okra"] * 200] * 200).to_token()) < 100
+
+
+@pytest.mark.parametrize("token", ["", "not a plan", BedGrid.from_layout([["Okra"]]).to_token()[:-4]])
+def test_bad_tokens_raise_value_error(token):
+    with pytest.raises(ValueError):
+        BedGrid.from_token(token)
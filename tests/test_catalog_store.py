@@ -0,0 +1,20 @@
+import sqlite3
+
+import pytest
+
+from gardener import catalog_store
+
+
+def test_catalogs_closes_its_connection(monkeypatch):
+    opened = []
+
+    def connect(path, readonly=True):
+        db = real(path, readonly)
+        opened.append(db)
+        return db
+
+    real = catalog_store._connect
+    monkeypatch.setattr(catalog_store, "_connect", connect)
+    assert "texas" in catalog_store.catalogs()
+    with pytest.raises(sqlite3.ProgrammingError):
+        opened[0].execute("SELECT 1")
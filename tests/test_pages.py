@@ -0,0 +1,85 @@
+# Rerun scoping and timing of both pages, driven through AppTest: bed edits
+# and the bed editor's controls must rerun only the sections that show the
+# bed (gardener.fragments), never the whole page, within a time budget.
+
+import os
+import statistics
+import time
+
+import pytest
+from streamlit.testing.v1 import AppTest
+
+from benchmarks.suite import PAGES, ROOT, _edit_cells, _full_runs
+from gardener import metrics
+
+# Median seconds for one bed edit or section rerun; they take tens of
+# milliseconds, so this only catches a rerun that went back to the full page
+BUDGET = 0.5
+EDITS = 5
+
+# Bed editor controls; their callbacks rerun the bed sections by key. (AppTest
+# reruns the whole script for a plain widget inside a section, so sections
+# without callbacks, like the container pickers, aren't covered here.)
+ACTIONS = {
+    "resize": lambda at: at.number_input(key="bed_rows").set_value(6).run(),
+    "bulk_fill": lambda at: at.button(key="bed_apply").click().run(),
+    "clear": lambda at: at.button(key="bed_clear").click().run(),
+}
+PAGE_SCRIPTS = [(page, script) for page, script, _ in PAGES]
+
+
+@pytest.fixture(autouse=True)
+def timed_metrics():
+    was_enabled = metrics.enabled()
+    metrics.configure(True)
+    metrics.reset()
+    yield
+    metrics.configure(was_enabled)
+
+
+def _page(script):
+    at = AppTest.from_file(os.path.join(ROOT, script), default_timeout=120)
+    at.run()
+    assert not at.exception, [e.value for e in at.exception]
+    return at
+
+
+def _selectbox(at, label):
+    return next(box for box in at.selectbox if box.label == label)
+
+
+@pytest.mark.parametrize("page,script", PAGE_SCRIPTS)
+def test_bed_edits_rerun_only_the_bed_sections(page, script):
+    at = _page(script)
+    names = _selectbox(at, at.selectbox[0].label).options
+    full_runs = _full_runs(page)
+    edits, times = {}, []
+    for k in range(EDITS):
+        edits[(k % 4, k % 6)] = names[k % len(names)]
+        t0 = time.perf_counter()
+        _edit_cells(at, edits)
+        times.append(time.perf_counter() - t0)
+        assert not at.exception, [e.value for e in at.exception]
+    assert _full_runs(page) == full_runs
+    assert "bed_planner" in metrics.fragment_runs(page)
+    assert statistics.median(times) < BUDGET
+
+
+@pytest.mark.parametrize("action", sorted(ACTIONS))
+@pytest.mark.parametrize("page,script", PAGE_SCRIPTS)
+def test_bed_actions_rerun_only_the_bed_sections(page, script, action):
+    at = _page(script)
+    full_runs = _full_runs(page)
+    t0 = time.perf_counter()
+    ACTIONS[action](at)
+    elapsed = time.perf_counter() - t0
+    assert not at.exception, [e.value for e in at.exception]
+    assert _full_runs(page) == full_runs
+    assert "bed_planner" in metrics.fragment_runs(page)
+    assert elapsed < BUDGET
+
+
+def test_bed_actions_on_the_agent_page_also_rerun_the_rollup():
+    at = _page("beginner_gardener_ai_agent.py")
+    ACTIONS["bulk_fill"](at)
+    assert set(metrics.fragment_runs("agent")) >= {"bed_planner", "rollup"}
@@ -0,0 +1,24 @@
+import io
+
+from gardener.pdfstream import BOTTOM, FOOTER, PAGE_H, PageTemplate, TextFlow, render
+
+
+def test_full_page_stops_above_the_footer():
+    assert BOTTOM >= FOOTER
+
+    def write(stream):
+        flow = TextFlow(stream, PageTemplate(title="Plan", footer="Generated today"))
+        lowest = 0.0
+        for i in range(200):
+            flow.text(f"line {i}")
+            lowest = max(lowest, flow.y)
+        flow.close()
+        return lowest
+
+    lowest = render(write, io.BytesIO())
+    assert lowest <= PAGE_H - FOOTER
+
+
+def test_render_returns_a_pdf_document():
+    data = render(lambda stream: TextFlow(stream, PageTemplate(title="Plan")).close())
+    assert data.startswith(b"%PDF-") and data.rstrip().endswith(b"%%EOF")
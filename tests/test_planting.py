@@ -0,0 +1,43 @@
+from datetime import date
+
+import numpy as np
+import pytest
+
+from gardener.catalog_store import load
+from gardener.planting import SOW, IntervalTree, label, planting_index, varieties
+
+
+@pytest.fixture(scope="module")
+def index():
+    return planting_index(load().catalog, 2026)
+
+
+def test_pre_frost_filter_keeps_only_crops_sown_cold(index):
+    day = date(2026, 1, 15)
+    sown = [v.name for v in varieties(index.plantable(day, "9a", kind=SOW))]
+    cold = [v.name for v in varieties(index.plantable(day, "9a", kind=SOW, pre_frost=True))]
+    assert "Early Girl" in sown  # started indoors mid-January
+    assert cold == ["Bloomsdale Spinach", "Winterbor Kale"]
+
+
+def test_interval_tree_matches_a_linear_scan():
+    rng = np.random.default_rng(7)
+    start = rng.integers(0, 365, size=2000)
+    end = start + rng.integers(0, 60, size=2000)
+    tree = IntervalTree(start, end)
+    for day in range(-5, 430, 7):
+        assert np.array_equal(np.sort(tree.stab(day)), np.flatnonzero((start <= day) & (end >= day)))
+    for first, last in [(0, 0), (30, 59), (200, 400), (500, 600)]:
+        found = np.sort(tree.overlapping(first, last))
+        assert np.array_equal(found, np.flatnonzero((start <= last) & (end >= first)))
+
+
+def test_empty_interval_tree():
+    assert len(IntervalTree([], []).stab(10)) == 0
+
+
+def test_windows_follow_the_zone_frost(index):
+    warm = [w for w in index.between(date(2026, 1, 1), date(2026, 12, 31), "9a") if w.variety.name == "Bloomsdale Spinach"]
+    cold = [w for w in index.between(date(2026, 1, 1), date(2026, 12, 31), "6a") if w.variety.name == "Bloomsdale Spinach"]
+    assert warm[0].start < cold[0].start
+    assert label(warm[0]).startswith("Sow ")
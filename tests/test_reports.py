@@ -0,0 +1,14 @@
+import io
+from datetime import date
+
+from gardener.catalog_store import load
+from gardener.reports import export_task_ical
+
+
+def test_task_calendar_streams_the_same_bytes_into_a_file():
+    catalog = load().catalog
+    text = export_task_ical(catalog, date(2026, 10, 17), date(2026, 2, 14))
+    out = io.BytesIO()
+    size = export_task_ical(catalog, date(2026, 10, 17), date(2026, 2, 14), out=out)
+    assert out.getvalue() == text.encode("utf-8")
+    assert size == len(out.getvalue())
@@ -0,0 +1,84 @@
+from datetime import date
+
+import pytest
+
+from gardener.catalog import Variety, VarietyCatalog
+from gardener.catalog_store import load
+from gardener.reports import export_task_ical
+from gardener.schedule import AFTER, FIXED, FROST, START, parse_task, schedule_for, season_frost
+
+HOUSTON_FROST = date(2026, 2, 14)  # ZIP 77001 in the bundled index
+
+
+@pytest.fixture(scope="module")
+def catalog():
+    return load().catalog
+
+
+@pytest.mark.parametrize("text,kind,offset,window", [
+    ("Direct sow 6 weeks before last frost", FROST, -42, 0),
+    ("Sow indoors or direct-seed 4–6 weeks before frost", FROST, -42, 14),
+    ("Transplant 1-2 weeks after the last frost", FROST, 7, 7),
+    ("Transplant outdoors after last frost", FROST, 1, 0),
+    ("Harden off 10 days before transplanting", AFTER, -10, 0),
+    ("Stake plants upon transplant", AFTER, 0, 0),
+    ("Thin seedlings to 3 inches", AFTER, 14, 0),
+    ("Harvest when pods are 2–3 inches long", AFTER, 56, 0),
+])
+def test_parse_task_anchors(text, kind, offset, window):
+    anchor = parse_task(text)
+    assert (anchor.kind, anchor.offset, anchor.window) == (kind, offset, window)
+
+
+@pytest.mark.parametrize("text,month,day,window", [
+    ("Start seeds indoors mid-January", 1, 11, 9),
+    ("Side-dress with compost in May", 5, 1, 30),
+    ("Direct sow in July or early August", 7, 1, 40),
+    ("Transplant slips in mid-summer", 7, 1, 30),
+    ("Plant garlic in late fall", 11, 1, 29),
+])
+def test_parse_task_fixed_dates(text, month, day, window):
+    assert parse_task(text) == (FIXED, 0, month, day, window, None)
+
+
+@pytest.mark.parametrize("text", ["Pinch tips so plants may branch", "Mulch so leaves don't mar", "Stake if stems fall over"])
+def test_ordinary_words_are_not_dates(text):
+    assert parse_task(text).kind != FIXED
+
+
+def test_default_task_calendar_is_not_empty(catalog):
+    assert export_task_ical(catalog).count("BEGIN:VEVENT") > 0
+
+
+@pytest.mark.parametrize("start", [date(2026, 1, 1), date(2026, 4, 1), date(2026, 10, 17), date(2027, 5, 1)])
+def test_task_calendar_has_events_for_any_start(catalog, start):
+    assert export_task_ical(catalog, start, HOUSTON_FROST).count("BEGIN:VEVENT") > 0
+
+
+def test_season_rolls_to_next_frost_after_it_ends(catalog):
+    assert season_frost(catalog, HOUSTON_FROST, date(2026, 4, 1)) == HOUSTON_FROST
+    assert season_frost(catalog, HOUSTON_FROST, date(2026, 10, 17)) == date(2027, 2, 14)
+    assert season_frost(catalog, HOUSTON_FROST, date(2028, 1, 10)) == date(2028, 2, 14)
+
+
+def test_first_unanchored_task_starts_on_the_start_date():
+    custom = VarietyCatalog([Variety(id=0, name="Radish", crop="Root", season="Spring", level="Beginner", organic=False,
+                                     link="", image="", tasks=("Direct sow in cool soil", "Thin seedlings"),
+                                     recurring=(), days_to_harvest=0, harvest_weeks=0)])
+    schedule = schedule_for(custom, HOUSTON_FROST, date(2026, 3, 3))
+    assert [(e.anchor.kind, e.date) for e in schedule.entries] == [(START, date(2026, 3, 3)), (AFTER, date(2026, 3, 17))]
+
+
+def test_pre_frost_sowing_reaches_the_calendar(catalog):
+    schedule = schedule_for(catalog, HOUSTON_FROST, date(2026, 1, 1))
+    sowing = [e for e in schedule.for_variety("Bloomsdale Spinach") if e.task.startswith("Direct sow")]
+    assert sowing and sowing[0].date < HOUSTON_FROST
+    assert "Bloomsdale Spinach – Direct sow" in export_task_ical(catalog, date(2026, 1, 1), HOUSTON_FROST)
+
+
+def test_frost_task_naming_a_month_waits_for_it(catalog):
+    schedule = schedule_for(catalog, HOUSTON_FROST, date(2026, 1, 1))
+    transplant = next(e for e in schedule.for_variety("Early Girl") if e.task.startswith("Transplant"))
+    assert transplant.date == date(2026, 3, 1)
+    late = schedule_for(catalog, date(2026, 4, 10), date(2026, 1, 1))
+    assert next(e for e in late.for_variety("Early Girl") if e.task.startswith("Transplant")).date == date(2026, 4, 11)
@@ -0,0 +1,51 @@
+import pytest
+
+from gardener.weather import CircuitBreaker, CircuitOpenError, WeatherClient
+
+
+class Response:
+    def __init__(self, payload):
+        self.payload = payload
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        if isinstance(self.payload, Exception):
+            raise self.payload
+        return self.payload
+
+
+class Session:
+    def __init__(self, payload):
+        self.payload = payload
+
+    def get(self, url, params=None, timeout=None):
+        return Response(self.payload)
+
+
+def client(payload):
+    weather = WeatherClient("key", breaker=CircuitBreaker(failure_threshold=2))
+    weather.session = Session(payload)
+    return weather
+
+
+def test_forecast_frost_reads_the_first_day_above_the_buffer():
+    days = [{"date": "2026-03-01", "day": {"mintemp_f": 30}}, {"date": "2026-03-02", "day": {"mintemp_f": 40}}]
+    assert client({"forecast": {"forecastday": days}}).forecast_frost("77001").day == 2
+
+
+@pytest.mark.parametrize("payload", [
+    {"error": "degraded"},
+    {"forecast": {"forecastday": [{"date": "2026-03-01"}]}},
+    {"forecast": {"forecastday": [{"date": "2026-03-01", "day": {"mintemp_f": 40}}, {"day": {}}]}},
+    ValueError("not JSON"),
+])
+def test_malformed_payloads_open_the_breaker(payload):
+    weather = client(payload)
+    for _ in range(2):
+        with pytest.raises(Exception):
+            weather.forecast_frost("77001")
+    assert weather.breaker.state == "open"
+    with pytest.raises(CircuitOpenError):
+        weather.forecast_frost("77001")
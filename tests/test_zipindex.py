@@ -0,0 +1,57 @@
+import os
+
+import pytest
+
+from gardener.zipindex import EXACT, NEAREST, PREFIX, ZipIndex, build, frost_code, frost_month_day, zone_code, zone_name
+
+
+@pytest.fixture
+def index(tmp_path):
+    path = str(tmp_path / "zip_index.bin")
+    records = {
+        77001: [zone_code("9a"), frost_code("02-14")],
+        77005: [zone_code("9a"), frost_code("02-20")],
+        78701: [zone_code("8b"), frost_code("03-01")],
+        78702: [0, frost_code("03-03")],
+    }
+    assert build(records, path) == (4, 2)
+    return ZipIndex(path, max_gap=5)
+
+
+def test_codes_round_trip():
+    assert zone_name(zone_code("8b")) == "8b" and zone_name(zone_code("10A")) == "10a"
+    assert zone_code("z") == 0 and zone_name(0) is None
+    assert frost_month_day(frost_code("03-15")) == (3, 15)
+    assert frost_code("") == 0 and frost_month_day(0) is None
+
+
+def test_exact_prefix_and_nearest_lookups(index):
+    assert index.get("77001") == (2, 14) and "77001-1234" in index
+    assert index.lookup("77001").source == EXACT
+    assert index.lookup("77003") == ("77003", "9a", frost_month_day(frost_code("02-17")), PREFIX)
+    assert index.lookup("77401").source == NEAREST  # prefix 774, 4 from 770
+    assert index.lookup("79999").source is None  # no prefix within max_gap
+    assert index.lookup("bad zip").zone is None
+
+
+def test_missing_fields_fall_back_independently(index):
+    climate = index.lookup("78702")
+    assert climate.zone == "8b" and climate.last_frost == (3, 3)
+
+
+def test_lookup_many_matches_single_lookups(index):
+    zips = ["77001", "77003", "78702", "12345", ""]
+    assert index.lookup_many(zips) == [index.lookup(z) for z in zips]
+
+
+def test_truncated_or_foreign_files_are_rejected(index, tmp_path):
+    truncated = str(tmp_path / "truncated.bin")
+    with open(index.path, "rb") as f, open(truncated, "wb") as out:
+        out.write(f.read()[:-1])
+    with pytest.raises(ValueError):
+        ZipIndex(truncated)
+    foreign = str(tmp_path / "foreign.bin")
+    with open(foreign, "wb") as out:
+        out.write(b"PK\x03\x04" + os.urandom(32))
+    with pytest.raises(ValueError):
+        ZipIndex(foreign)